@@ -0,0 +1,168 @@
+"""Cost anomalies: Actual diverging from Estimated, or from service peers.
+
+Rows are scored on their actual and estimated cost and their service (the
+Overview's ``Actual`` / ``Estimated`` per service and project, or a
+resource's current and target cost). Two features are robust z-scores
+against the rows of the same service, computed from medians and median
+absolute deviations (never below ``SCALE_FLOOR``) in whole-array operations:
+
+* ``z_ratio``: of log(actual / estimated), how far the row's divergence from
+  its estimate strays from its peers';
+* ``z_peer``: of log(actual), how far its cost strays from its peers'.
+
+A row is flagged when either exceeds ``Z_THRESHOLD`` in magnitude or when an
+``IsolationForest`` over both and the log ratio isolates it as an outlier.
+
+``CostAnomalies`` fits the peer statistics and the forest once and keeps
+them. Later versions of the data only score the rows that are new or whose
+costs changed, reusing the stored scores of the others; the model is refit
+when the data has grown ``REFIT_GROWTH`` times beyond the rows it was fit on,
+or shrunk below them.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+import bitmaps
+
+Z_THRESHOLD = 3.5
+CONTAMINATION = 0.05
+REFIT_GROWTH = 2.0
+
+# Smallest peer scale (log units, ~5%): peers that agree almost exactly do
+# not turn small differences into anomalies
+SCALE_FLOOR = 0.05
+
+# Fewer rows than this are scored on the z-scores alone
+MIN_FOREST_ROWS = 16
+
+INPUT_COLUMNS = ['service', 'actual', 'estimated']
+
+
+# The service, actual and estimated cost columns of a frame, under INPUT_COLUMNS names
+def inputs(frame, actual, estimated, service='service'):
+    return pd.DataFrame({
+        'service': frame[service].astype(object).to_numpy(),
+        'actual': frame[actual].to_numpy(dtype=float),
+        'estimated': frame[estimated].to_numpy(dtype=float),
+    }, index=frame.index)
+
+
+def _log_features(rows):
+    actual = np.clip(np.nan_to_num(rows['actual'].to_numpy()), 0, None)
+    estimated = np.clip(np.nan_to_num(rows['estimated'].to_numpy()), 0, None)
+    return np.log1p(actual) - np.log1p(estimated), np.log1p(actual)
+
+
+# Median and scale of values per group: 1.4826 x MAD, or 1.2533 x the mean
+# absolute deviation where more than half the values are equal; at least
+# SCALE_FLOOR
+def _peer_statistics(values, groups):
+    frame = pd.DataFrame({'value': values, 'group': groups})
+    median = frame.groupby('group')['value'].median()
+    deviation = (frame['value'] - median.reindex(frame['group']).to_numpy()).abs()
+    grouped = deviation.groupby(frame['group'])
+    scale = grouped.median() * 1.4826
+    scale = scale.where(scale > 0, grouped.mean() * 1.2533).clip(lower=SCALE_FLOOR)
+    return pd.DataFrame({'median': median, 'scale': scale})
+
+
+def _robust_z(values, groups, statistics):
+    median = statistics['median'].reindex(groups).to_numpy()
+    scale = statistics['scale'].reindex(groups).to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (values - median) / scale
+    # No peers
+    return np.where(np.isfinite(z), z, 0.0)
+
+
+class CostAnomalies:
+    def __init__(self, contamination=CONTAMINATION):
+        self.contamination = contamination
+        self.version = None
+        self.fitted_rows = 0
+        self.scored = None
+        self._lock = threading.Lock()
+
+    def _fit(self, rows):
+        log_ratio, log_actual = _log_features(rows)
+        groups = rows['service'].to_numpy()
+        self.ratio_peers = _peer_statistics(log_ratio, groups)
+        self.actual_peers = _peer_statistics(log_actual, groups)
+        self.forest = None
+        if len(rows) >= MIN_FOREST_ROWS:
+            from sklearn.ensemble import IsolationForest
+
+            self.forest = IsolationForest(contamination=self.contamination, random_state=0)
+            self.forest.fit(self._features(log_ratio, log_actual, groups))
+        self.fitted_rows = len(rows)
+
+    def _features(self, log_ratio, log_actual, groups):
+        return np.column_stack([
+            log_ratio,
+            _robust_z(log_ratio, groups, self.ratio_peers),
+            _robust_z(log_actual, groups, self.actual_peers),
+        ])
+
+    def _score(self, rows):
+        log_ratio, log_actual = _log_features(rows)
+        features = self._features(log_ratio, log_actual, rows['service'].to_numpy())
+        scored = rows.copy()
+        scored['log_ratio'] = log_ratio
+        scored['z_ratio'] = features[:, 1]
+        scored['z_peer'] = features[:, 2]
+        off_estimate = np.abs(scored['z_ratio'].to_numpy()) > Z_THRESHOLD
+        off_peers = np.abs(scored['z_peer'].to_numpy()) > Z_THRESHOLD
+        if self.forest is not None:
+            scored['anomaly_score'] = -self.forest.score_samples(features)
+            isolated = self.forest.predict(features) == -1
+        else:
+            scored['anomaly_score'] = np.maximum(np.abs(features[:, 1]), np.abs(features[:, 2]))
+            isolated = np.zeros(len(rows), dtype=bool)
+        reasons = np.select(
+            [off_estimate & off_peers, off_estimate, off_peers, isolated],
+            ['Actual vs Estimated and service peers', 'Actual vs Estimated', 'Actual vs service peers',
+             'Isolated by the forest'],
+            '',
+        )
+        scored['flagged'] = reasons != ''
+        scored['reason'] = reasons
+        return scored
+
+    # Scores of every row of rows (INPUT_COLUMNS, indexed by a unique key such
+    # as (service, project_id)). Only rows new since the last
+    # version or with changed inputs are scored; the result is shared and
+    # must not be mutated.
+    def update(self, rows, version):
+        with self._lock:
+            if self.version == version and self.scored is not None:
+                return self.scored
+            if self.scored is None or len(rows) > REFIT_GROWTH * self.fitted_rows or len(rows) < self.fitted_rows:
+                self._fit(rows)
+                self.scored = self._score(rows)
+            else:
+                previous = self.scored.reindex(rows.index)
+                same = (previous[INPUT_COLUMNS].to_numpy() == rows[INPUT_COLUMNS].to_numpy()).all(axis=1)
+                kept = self.scored.loc[rows.index[same]]
+                self.scored = pd.concat([kept, self._score(rows[~same])]).reindex(rows.index)
+            self.version = version
+            return self.scored
+
+
+# Flagged rows, most anomalous first
+def flagged(scored):
+    return scored[scored['flagged']].sort_values('anomaly_score', ascending=False)
+
+
+# Rows matching {column: value or values} on the levels of their index (such
+# as service and project_id); selections of other columns do not apply
+def select(scored, selections):
+    mask = None
+    for col, selection in (selections or {}).items():
+        values = bitmaps.selected_values(selection)
+        if col not in scored.index.names or values is None:
+            continue
+        matches = scored.index.get_level_values(col).isin(values)
+        mask = matches if mask is None else mask & matches
+    return scored if mask is None else scored[mask]
@@ -0,0 +1,277 @@
+"""Read-only JSON API over the dashboard's fact table.
+
+Serves the KPIs and summary tables of every service tab and the Overview
+rollup for any filter selection, so other teams can poll the numbers without
+driving the Streamlit app:
+
+    GET /api                      datasets, filters and data version
+    GET /api/<dataset>?region=europe-west3&project_id=...
+    GET /api/overview?service=CloudSQL&project_id=...
+
+Repeating a filter selects any of its values: ``?region=a&region=b``. Once a
+resource has been reported by several runs, only its latest row counts, as in
+the dashboard; ``?latest=0`` counts the superseded rows too.
+
+Every response carries an ETag built from the fact table's version and the
+request. A poller sending it back in ``If-None-Match`` gets an empty 304
+without anything being recomputed until the source files change; response
+bodies are memoized per version as well.
+
+The dashboard serves the API from its own process, reusing its cached fact
+table, when ``DASHBOARD_API_PORT`` is set. It can also run alongside the
+dashboard on its own, reloading the table whenever the source files change:
+
+    python -m api --port 8502
+"""
+import argparse
+import functools
+import hashlib
+import http.server
+import json
+import os
+import threading
+import urllib.parse
+
+import data_store
+import facts
+from streaming import DIMENSIONS, MEAN_COLUMNS, SUM_COLUMNS
+
+API_PORT = os.environ.get('DASHBOARD_API_PORT')
+DEFAULT_PORT = 8502
+CACHE_ENTRIES = 1024
+TOP_RESOURCES = 20
+
+OVERVIEW_FILTERS = ['service', 'project_id']
+
+# Values of ?latest= that count superseded rows too
+LATEST_OFF = ('0', 'false', 'no', 'off')
+
+
+def _records(frame):
+    # NaN is not valid JSON
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient='records')
+
+
+def _pct(part, whole):
+    return float(part / whole * 100) if whole else 0.0
+
+
+def kpis(frame):
+    result = {
+        'rows': len(frame),
+        'projects': int(frame['project_id'].nunique()),
+    }
+    for col in SUM_COLUMNS:
+        if col in frame.columns:
+            result[col] = float(frame[col].sum())
+    for col in MEAN_COLUMNS:
+        if col in frame.columns:
+            result[f"avg_{col}"] = float(frame[col].mean()) if len(frame) else 0.0
+    result['savings_pct'] = _pct(result['savings'], result['current_cost'])
+    return result
+
+
+def summary(frame, dimension):
+    grouped = frame.groupby(dimension, observed=True)
+    table = grouped[[col for col in SUM_COLUMNS if col in frame.columns]].sum()
+    table['rows'] = grouped.size()
+    table['projects'] = grouped['project_id'].nunique()
+    table['savings_pct'] = (table['savings'] / table['current_cost'] * 100).where(table['current_cost'] != 0, 0.0)
+    return table.sort_values('savings', ascending=False).reset_index()
+
+
+def dataset_payload(fact_table, dataset, selections):
+    frame = fact_table.detail(dataset, selections)
+    resource_column = data_store.RESOURCE_COLUMNS[dataset]
+    top = frame.nlargest(TOP_RESOURCES, 'savings')[[resource_column] + DIMENSIONS + ['current_cost', 'target_cost', 'savings']]
+    return {
+        'dataset': dataset,
+        'service': facts.SERVICE_NAMES[dataset],
+        'kpis': kpis(frame),
+        'summaries': {dimension: _records(summary(frame, dimension)) for dimension in DIMENSIONS},
+        'top_resources': _records(top),
+    }
+
+
+def overview_payload(fact_table, selections):
+    rollup = fact_table.overview(selections)
+    by_service = rollup.groupby('service', observed=True)[['Estimated', 'Actual', 'Savings']].sum()
+    by_service['projects'] = rollup.groupby('service', observed=True)['project_id'].nunique()
+    by_service = by_service.sort_values('Actual', ascending=False).reset_index()
+    actual, savings = rollup['Actual'].sum(), rollup['Savings'].sum()
+    return {
+        'dataset': 'overview',
+        'kpis': {
+            'actual': float(actual),
+            'estimated': float(rollup['Estimated'].sum()),
+            'savings': float(savings),
+            'savings_pct': _pct(savings, actual),
+            'services': int(rollup['service'].nunique()),
+            'projects': int(rollup['project_id'].nunique()),
+            'entries': len(rollup),
+        },
+        'by_service': _records(by_service),
+        'rows': _records(rollup),
+    }
+
+
+def index_payload(fact_table):
+    return {
+        'datasets': {name: f"/api/{name}" for name in fact_table.datasets},
+        'overview': '/api/overview',
+        'available_filters': {'<dataset>': DIMENSIONS, 'overview': OVERVIEW_FILTERS},
+        'services': fact_table.services(),
+        'superseded_rows': fact_table.superseded(),
+    }
+
+
+# Query items grouped by name; a repeated filter (?region=a&region=b) selects any of its values
+def _grouped(query):
+    grouped = {}
+    for name, value in query:
+        grouped.setdefault(name, []).append(value)
+    return {name: values[0] if len(values) == 1 else values for name, values in grouped.items()}
+
+
+def _selections(query, allowed):
+    selections = _grouped(query)
+    unknown = sorted(set(selections) - set(allowed))
+    if unknown:
+        raise ValueError(f"unknown filter(s) {', '.join(unknown)}; expected {', '.join(allowed)}")
+    return {name: tuple(value) if isinstance(value, list) else value for name, value in selections.items()}
+
+
+# The selections with the latest-row-per-resource mode applied: ?latest=, or on
+# by default when the service (or any) has superseded rows
+def _with_latest(selections, fact_table, service=None):
+    flag = selections.pop('latest', None)
+    on = fact_table.superseded(service) > 0 if flag is None else str(flag).lower() not in LATEST_OFF
+    if on:
+        selections[facts.LATEST_COLUMN] = facts.LATEST_SELECTION
+    return selections
+
+
+class DashboardAPI:
+    def __init__(self, table_provider):
+        # table_provider returns the current FactTable; a new table means a new version
+        self.table_provider = table_provider
+        self._lock = threading.Lock()
+        self._memo = None
+
+    # The current table and its memoized bodies by (path, query). Each table
+    # gets a memo of its own, so a superseded table is released with its
+    # bodies instead of staying referenced from the cache keys.
+    def _current(self):
+        fact_table = self.table_provider()
+        memo = self._memo
+        if memo is None or memo[0].version != fact_table.version:
+            with self._lock:
+                if self._memo is None or self._memo[0].version != fact_table.version:
+                    body = functools.lru_cache(maxsize=CACHE_ENTRIES)(functools.partial(self._render, fact_table))
+                    self._memo = (fact_table, body)
+                memo = self._memo
+        return memo
+
+    def _render(self, fact_table, path, query):
+        parts = [part for part in path.split('/') if part]
+        if parts == ['api']:
+            payload = index_payload(fact_table)
+        elif len(parts) == 2 and parts[0] == 'api' and parts[1] == 'overview':
+            selections = _with_latest(_selections(query, OVERVIEW_FILTERS + ['latest']), fact_table)
+            payload = overview_payload(fact_table, selections)
+        elif len(parts) == 2 and parts[0] == 'api' and parts[1] in fact_table.datasets:
+            selections = _with_latest(_selections(query, DIMENSIONS + ['latest']), fact_table,
+                                      facts.SERVICE_NAMES[parts[1]])
+            payload = dataset_payload(fact_table, parts[1], selections)
+        else:
+            raise LookupError(f"no such resource: {path}")
+        payload = {'version': fact_table.version, 'filters': _grouped(query), **payload}
+        return json.dumps(payload).encode('utf-8')
+
+    # (status, etag, body) for a GET of path with sorted ((name, value), ...) query items
+    def respond(self, path, query, if_none_match=None):
+        fact_table, body = self._current()
+        request_key = hashlib.sha1(repr((path, query)).encode('utf-8')).hexdigest()[:12]
+        etag = f'"{fact_table.version}-{request_key}"'
+        if if_none_match and (if_none_match.strip() == '*' or etag in (tag.strip() for tag in if_none_match.split(','))):
+            return 304, etag, None
+        try:
+            return 200, etag, body(path, query)
+        except LookupError as e:
+            return 404, None, json.dumps({'error': str(e)}).encode('utf-8')
+        except ValueError as e:
+            return 400, None, json.dumps({'error': str(e)}).encode('utf-8')
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = tuple(sorted(urllib.parse.parse_qsl(url.query)))
+        status, etag, body = self.server.api.respond(url.path, query, self.headers.get('If-None-Match'))
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+        # Clients may keep responses but must revalidate them
+        self.send_header('Cache-Control', 'no-cache')
+        if body is not None:
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(table_provider, port, host='127.0.0.1', verbose=False):
+    server = http.server.ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.api = DashboardAPI(table_provider)
+    server.verbose = verbose
+    return server
+
+
+# Serve from a daemon thread of the calling process; raises OSError when the port is taken
+def serve_in_thread(table_provider, port, host='127.0.0.1'):
+    server = make_server(table_provider, port, host)
+    threading.Thread(target=server.serve_forever, name='dashboard-api', daemon=True).start()
+    return server
+
+
+# Fact table of a standalone server, reloaded when the source files change
+class ReloadingFactTable:
+    def __init__(self, datasets):
+        self.datasets = list(datasets)
+        self._lock = threading.Lock()
+        self._table = facts.load_fact_table(self.datasets)
+
+    def __call__(self):
+        if facts.source_version(self.datasets) != self._table.version:
+            with self._lock:
+                if facts.source_version(self.datasets) != self._table.version:
+                    self._table = facts.load_fact_table(self.datasets)
+        return self._table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=int(API_PORT or DEFAULT_PORT))
+    parser.add_argument('--quiet', action='store_true', help='do not log requests')
+    args = parser.parse_args()
+
+    datasets = [name for name in data_store.RESOURCE_COLUMNS if not data_store.use_streaming(name)]
+    server = make_server(ReloadingFactTable(datasets), args.port, args.host, verbose=not args.quiet)
+    print(f"Serving dashboard API on http://{args.host}:{args.port}/api")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
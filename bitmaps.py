@@ -0,0 +1,128 @@
+"""Per-value bitmap indexes over the fact table's dimension columns.
+
+For every value of an indexed categorical column the index holds a bitmap with
+one bit per fact row, packed 64 rows to a word. A filter selection such as
+``{'region': ('europe-west1', 'us-central1'), 'project_id': ('p-1',)}`` is
+then an OR of the chosen values' bitmaps within each column and an AND across
+columns, on words, unpacked once into a row mask. Only the words covering the
+queried rows are touched, so a service's contiguous slice of the fact table
+costs in proportion to its own rows.
+
+The same bitmaps give each filter's options with their row counts under the
+other filters' selections: AND the other selections together, then count the
+bits each value's bitmap shares with the result. Counts are exact for any
+combination of selections.
+
+The bitmaps are built once, when the fact table is loaded, at
+``values x rows / 8`` bytes per column. A column whose bitmaps would exceed
+``MAX_COLUMN_BYTES`` (many distinct values over many rows) is not indexed; the
+fact table filters it by comparing values instead.
+"""
+import numpy as np
+import pandas as pd
+
+MAX_COLUMN_BYTES = 128 * 2**20
+
+# Selection value meaning "no filter"
+ALL = 'All'
+
+
+# The values a filter selection keeps, or None when it keeps every row:
+# 'All', None or an empty multi-select; a single value or a list of values
+def selected_values(selection):
+    if selection is None or isinstance(selection, str):
+        return None if selection in (None, ALL) else (selection,)
+    if not isinstance(selection, (list, tuple, set, frozenset)):
+        return (selection,)
+    values = tuple(selection)
+    return None if not values or ALL in values else values
+
+
+# Set bits of every word (numpy >= 2 counts them natively)
+if hasattr(np, 'bitwise_count'):
+    def _popcount(words):
+        return np.bitwise_count(words)
+else:
+    _BYTE_BITS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words):
+        return _BYTE_BITS[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1)
+
+
+class BitmapIndex:
+    def __init__(self, frame, columns, max_column_bytes=MAX_COLUMN_BYTES):
+        self.rows = len(frame)
+        words = -(-self.rows // 64)
+        positions = np.arange(self.rows)
+        self.bitmaps = {}
+        for col in columns:
+            categories = frame[col].cat.categories
+            if len(categories) * words * 8 > max_column_bytes:
+                continue
+            codes = frame[col].cat.codes.to_numpy()
+            present = codes >= 0
+            bits = np.zeros((len(categories), words * 8), dtype=np.uint8)
+            # Row p is bit p % 8 of byte p // 8 of its value's bitmap
+            np.bitwise_or.at(bits, (codes[present], positions[present] >> 3),
+                             np.left_shift(1, positions[present] & 7).astype(np.uint8))
+            self.bitmaps[col] = (categories, bits.view(np.uint64))
+
+    def __contains__(self, column):
+        return column in self.bitmaps
+
+    @property
+    def nbytes(self):
+        return sum(bitmaps.nbytes for _, bitmaps in self.bitmaps.values())
+
+    # Words of rows [start, stop) of the rows holding any of values in column
+    def _union(self, column, values, first, last):
+        categories, bitmaps = self.bitmaps[column]
+        codes = categories.get_indexer(list(values))
+        codes = codes[codes >= 0]
+        if not len(codes):
+            return np.zeros(last - first, dtype=np.uint64)
+        return np.bitwise_or.reduce(bitmaps[codes, first:last], axis=0)
+
+    # Words with the bits of rows [start, stop) set, or only those of the
+    # given row positions within it
+    def _range(self, start, stop, first, last, rows=None):
+        bits = np.zeros((last - first) * 64, dtype=bool)
+        if rows is None:
+            bits[start - first * 64:stop - first * 64] = True
+        else:
+            bits[np.asarray(rows, dtype=np.int64) - first * 64] = True
+        return np.packbits(bits, bitorder='little').view(np.uint64)
+
+    # Rows per value of column among rows [start, stop) (or the given row
+    # positions within them) that match the selections of the other columns:
+    # the values still reachable from them
+    def counts(self, column, selections, start=0, stop=None, rows=None):
+        stop = self.rows if stop is None else stop
+        first, last = start // 64, -(-stop // 64)
+        words = self._range(start, stop, first, last, rows)
+        for other, values in selections.items():
+            if other != column:
+                words &= self._union(other, values, first, last)
+        categories, bitmaps = self.bitmaps[column]
+        counts = np.empty(len(categories), dtype=np.int64)
+        # A block of values at a time bounds the temporary to ~8 MB
+        block = max(1, 2**20 // max(last - first, 1))
+        for begin in range(0, len(categories), block):
+            matched = bitmaps[begin:begin + block, first:last] & words
+            counts[begin:begin + block] = _popcount(matched).sum(axis=1)
+        return pd.Series(counts, index=categories)
+
+    # Boolean mask over rows [start, stop) of the rows matching every
+    # {column: values} selection
+    def select(self, selections, start=0, stop=None):
+        stop = self.rows if stop is None else stop
+        first, last = start // 64, -(-stop // 64)
+        combined = None
+        for column, values in selections.items():
+            words = self._union(column, values, first, last)
+            combined = words if combined is None else combined & words
+        if combined is None:
+            return np.ones(stop - start, dtype=bool)
+        bits = np.unpackbits(combined.view(np.uint8), bitorder='little')
+        offset = start - first * 64
+        return bits[offset:offset + stop - start].view(bool)
@@ -0,0 +1,111 @@
+"""Machine-type catalog: family, vCPUs and memory of every machine type.
+
+The results files name machine types only as strings: Compute Engine types
+(``n1-standard-1``, ``e2-medium``, ``f1-micro``, ``n2-custom-4-16384``) and
+Cloud SQL tiers (``db-custom-2-3840``, ``db-custom-n4-16-65536``,
+``db-n1-standard-2``, ``db-f1-micro``). ``parse`` turns one into its spec:
+
+* family: the machine series (``n1``, ``e2``, ``c4a``, ...); Compute Engine
+  custom types without a series are N1, Cloud SQL custom tiers without one
+  are ``db-custom``;
+* vcpus: shared-core types count the fraction of a vCPU they sustain
+  (``e2-micro`` 0.25, ``f1-micro`` 0.2);
+* memory_gb: from the type name for custom types, from the series' memory per
+  vCPU for predefined ones.
+
+Machine type columns are categoricals, so ``specs`` parses each distinct type
+once (memoized across calls) and expands the result to the rows through the
+category codes. Unknown types get no family and missing vCPUs and memory.
+"""
+import functools
+import re
+
+import numpy as np
+import pandas as pd
+
+SPEC_COLUMNS = ['family', 'vcpus', 'memory_gb']
+
+# Shared-core types: (sustained vCPUs, memory GB)
+SHARED_CORE = {
+    'e2-micro': (0.25, 1.0),
+    'e2-small': (0.5, 2.0),
+    'e2-medium': (1.0, 4.0),
+    'f1-micro': (0.2, 0.6),
+    'g1-small': (0.5, 1.7),
+}
+
+# Memory per vCPU (GB) of predefined types by type, and by series where the
+# series differs
+MEMORY_PER_VCPU = {'standard': 4.0, 'highmem': 8.0, 'highcpu': 2.0}
+SERIES_MEMORY_PER_VCPU = {
+    ('n1', 'standard'): 3.75,
+    ('n1', 'highmem'): 6.5,
+    ('n1', 'highcpu'): 0.9,
+    ('e2', 'highcpu'): 1.0,
+    ('n2', 'highcpu'): 1.0,
+    ('n2d', 'highcpu'): 1.0,
+    ('m1', 'megamem'): 14.9333,
+    ('m1', 'ultramem'): 24.025,
+    ('m2', 'ultramem'): 28.3,
+    ('m3', 'megamem'): 15.25,
+    ('m3', 'ultramem'): 30.5,
+}
+
+# Cloud SQL Enterprise Plus tiers: memory per vCPU (GB)
+PERF_OPTIMIZED_MEMORY_PER_VCPU = 8.0
+
+# Compute Engine puts the series before 'custom' (n2-custom-4-16384), Cloud SQL after it (custom-n4-4-16384)
+_CUSTOM = re.compile(r'^(?:(?P<series>[a-z]\w*?)-)?custom-(?:(?P<tier_series>[a-z]\w*?)-)?'
+                     r'(?P<vcpus>\d+)-(?P<memory_mb>\d+)(?:-ext)?$')
+_PREDEFINED = re.compile(r'^(?P<series>[a-z]\w*?)-(?P<kind>[a-z]+)-(?P<vcpus>\d+)(?:-\w+)?$')
+_PERF_OPTIMIZED = re.compile(r'^perf-optimized-n-(?P<vcpus>\d+)$')
+
+
+# (family, vcpus, memory_gb) of one machine type; (None, nan, nan) when unknown
+@functools.lru_cache(maxsize=None)
+def parse(machine_type):
+    name = str(machine_type).strip().lower()
+    cloud_sql = name.startswith('db-')
+    if cloud_sql:
+        name = name[3:]
+
+    if name in SHARED_CORE:
+        vcpus, memory_gb = SHARED_CORE[name]
+        return name.split('-')[0], vcpus, memory_gb
+
+    match = _CUSTOM.match(name)
+    if match:
+        series = match['series'] or match['tier_series'] or ('db-custom' if cloud_sql else 'n1')
+        return series, float(match['vcpus']), int(match['memory_mb']) / 1024
+
+    match = _PERF_OPTIMIZED.match(name) if cloud_sql else None
+    if match:
+        vcpus = float(match['vcpus'])
+        return 'db-perf-optimized', vcpus, vcpus * PERF_OPTIMIZED_MEMORY_PER_VCPU
+
+    match = _PREDEFINED.match(name)
+    if match:
+        series, kind, vcpus = match['series'], match['kind'], float(match['vcpus'])
+        per_vcpu = SERIES_MEMORY_PER_VCPU.get((series, kind), MEMORY_PER_VCPU.get(kind))
+        return series, vcpus, vcpus * per_vcpu if per_vcpu is not None else np.nan
+
+    return None, np.nan, np.nan
+
+
+# family, vcpus and memory_gb of every row of a machine type column, named
+# prefix + column; the column's distinct types are parsed once
+def specs(column, prefix=''):
+    if not isinstance(column.dtype, pd.CategoricalDtype):
+        column = column.astype('category')
+    codes = column.cat.codes.to_numpy()
+    parsed = [parse(machine_type) for machine_type in column.cat.categories]
+    families = pd.Categorical([family for family, _, _ in parsed])
+    # Code -1 (no machine type) picks the missing entry appended last
+    family_codes = np.append(families.codes, -1)[codes]
+    vcpus = np.append(np.array([spec[1] for spec in parsed], dtype=float), np.nan)[codes]
+    memory_gb = np.append(np.array([spec[2] for spec in parsed], dtype=float), np.nan)[codes]
+    return pd.DataFrame({
+        f'{prefix}family': pd.Categorical.from_codes(family_codes, dtype=families.dtype),
+        f'{prefix}vcpus': vcpus,
+        f'{prefix}memory_gb': memory_gb,
+    }, index=column.index)
@@ -0,0 +1,129 @@
+"""Workload clusters of a service's resources with mini-batch k-means.
+
+Every row of a results dataset is described by the ``FEATURES`` it has:
+current cost, current hourly rate, savings ratio, node count and predicted
+CPU and memory peaks. Costs, rates, counts and peaks are log-scaled (they span
+orders of magnitude), then all features are standardized with the scaling
+learned from the first rows the model sees.
+
+``WorkloadClusters`` keeps one ``MiniBatchKMeans`` model per dataset and
+trains it with ``partial_fit`` in batches. Results files grow by appending
+runs, so when a new version of the dataset arrives only the source rows the
+model has not seen yet are fed to it. The model keeps a digest of the rows it
+was trained on: a file that shrank, or was rewritten so that those rows
+changed, is refit from scratch. Clusters are labelled ``Cluster 1``,
+``Cluster 2``, ... by ascending current cost of their centers.
+"""
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CLUSTERS = 4
+BATCH_ROWS = 4096
+
+# (column, log-scaled), in the order used by the model
+FEATURES = [
+    ('current_cost', True),
+    ('current_machine_hourly_rate', True),
+    ('savings_ratio', False),
+    ('node_count', True),
+    ('predicted_cpu', True),
+    ('predicted_mem_gb', True),
+]
+
+FEATURE_LABELS = {
+    'current_cost': 'Current Cost',
+    'current_machine_hourly_rate': 'Current Rate/hr',
+    'savings_ratio': 'Savings Ratio',
+    'node_count': 'Nodes',
+    'predicted_cpu': 'Predicted CPU',
+    'predicted_mem_gb': 'Predicted Memory (GB)',
+}
+
+
+# The FEATURES columns a results frame has, with savings_ratio derived
+def feature_frame(frame):
+    columns = {}
+    for column, _ in FEATURES:
+        if column == 'savings_ratio':
+            cost = frame['current_cost'].to_numpy(dtype=float)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                columns[column] = np.where(cost > 0, frame['savings'].to_numpy(dtype=float) / cost, 0.0)
+        elif column in frame.columns:
+            columns[column] = frame[column].to_numpy(dtype=float)
+    return pd.DataFrame(columns, index=frame.index)
+
+
+def _matrix(features):
+    logged = {column for column, log in FEATURES if log}
+    values = np.column_stack([
+        np.log1p(np.clip(features[column].to_numpy(), 0, None)) if column in logged else features[column].to_numpy()
+        for column in features.columns
+    ])
+    return np.nan_to_num(values)
+
+
+def _digest(values):
+    return hashlib.sha1(np.ascontiguousarray(values).tobytes()).hexdigest()
+
+
+class WorkloadClusters:
+    def __init__(self, clusters=DEFAULT_CLUSTERS):
+        self.clusters = clusters
+        self.version = None
+        self.columns = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.model = None
+        self.scaler = None
+        self.rows_seen = 0
+        self.digest = None
+
+    def _fit(self, values):
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.preprocessing import StandardScaler
+
+        if self.model is None:
+            self.scaler = StandardScaler().fit(values)
+            self.model = MiniBatchKMeans(n_clusters=min(self.clusters, len(values)), batch_size=BATCH_ROWS,
+                                         random_state=0, n_init=3)
+        scaled = self.scaler.transform(values)
+        for start in range(0, len(scaled), BATCH_ROWS):
+            self.model.partial_fit(scaled[start:start + BATCH_ROWS])
+
+    # Train on the rows of frame (all rows of the dataset in source order)
+    # beyond those seen by earlier versions, or on every row when the rows
+    # seen have changed, then label every row. Returns (labels, centers): a
+    # categorical Series of cluster names aligned with frame, and one row per
+    # cluster in the features' own units.
+    def update(self, frame, version):
+        features = feature_frame(frame)
+        with self._lock:
+            if self.version != version:
+                values = _matrix(features)
+                if (list(features.columns) != self.columns or len(frame) < self.rows_seen
+                        or _digest(values[:self.rows_seen]) != self.digest):
+                    self.columns = list(features.columns)
+                    self._reset()
+                if len(frame) > self.rows_seen:
+                    self._fit(values[self.rows_seen:])
+                    self.rows_seen = len(frame)
+                    self.digest = _digest(values)
+            self.version = version
+            if self.model is None:
+                return pd.Series([], index=frame.index, dtype='category', name='cluster'), pd.DataFrame(columns=self.columns)
+            codes = self.model.predict(self.scaler.transform(_matrix(features)))
+            centers = self.scaler.inverse_transform(self.model.cluster_centers_)
+
+        logged = [i for i, column in enumerate(self.columns) if dict(FEATURES)[column]]
+        centers[:, logged] = np.expm1(centers[:, logged])
+        order = np.argsort(centers[:, 0], kind='stable')
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(len(order))
+        names = [f"Cluster {rank + 1}" for rank in range(len(order))]
+        labels = pd.Series(pd.Categorical.from_codes(ranks[codes], categories=names), index=frame.index, name='cluster')
+        return labels, pd.DataFrame(centers[order], columns=self.columns, index=pd.Index(names, name='cluster'))
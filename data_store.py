@@ -0,0 +1,261 @@
+"""Dataset loading for the cost optimization dashboard.
+
+Every dataset is read from its CSV export in ``dashboard_data``. When pyarrow
+is available a parsed copy is also kept next to the CSV as an Arrow IPC file;
+later loads memory-map that file instead of parsing the CSV again, so several
+server processes on one host share a single copy of the data through the OS
+page cache.
+
+Set ``DASHBOARD_ARROW=0`` to always read the CSV files.
+
+The ``justification`` text is never part of the loaded frames. It lives in a
+compressed side store per dataset (see justifications.py) addressed by source
+row number; every loaded frame keeps the source row number as its index, so
+``store.get(row_id)`` fetches the text of any row of any filtered frame.
+
+Low-to-medium cardinality string columns are parsed straight into pandas
+categoricals (stored as dictionary arrays in the Arrow files), and
+``share_dictionaries`` gives each of them one dictionary shared by all datasets.
+Group by these columns with ``observed=True`` so categories that only occur in
+another dataset do not show up as empty groups.
+
+Results files larger than ``DASHBOARD_STREAMING_BYTES`` (default 1 GiB) are
+not loaded at all; the dashboard aggregates them chunk by chunk instead (see
+streaming.py). ``DASHBOARD_STREAMING=1`` forces that mode for every results
+file and ``DASHBOARD_STREAMING=0`` disables it.
+"""
+import concurrent.futures
+import hashlib
+import multiprocessing
+import os
+
+import pandas as pd
+
+from justifications import JustificationStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover - pyarrow is a pinned requirement
+    pa = None
+
+DATA_DIR = os.environ.get('DASHBOARD_DATA_DIR', 'dashboard_data')
+USE_ARROW = pa is not None and os.environ.get('DASHBOARD_ARROW', '1') != '0'
+STREAMING = os.environ.get('DASHBOARD_STREAMING', 'auto')
+STREAMING_THRESHOLD_BYTES = int(os.environ.get('DASHBOARD_STREAMING_BYTES', 2**30))
+PROCESS_PARSE_BYTES = int(os.environ.get('DASHBOARD_PROCESS_PARSE_BYTES', 64 * 2**20))
+
+# Source CSV export for every dataset
+DATASETS = {
+    'dataflow': 'rightsizing_results_dataflow.csv',
+    'cloudsql': 'rightsizing_results_cloudsql.csv',
+    'kubernetes': 'rightsizing_results.csv',
+    'overview': 'overview.csv',
+}
+
+# Column naming the optimized resource in each rightsizing results file
+RESOURCE_COLUMNS = {
+    'dataflow': 'job_name',
+    'cloudsql': 'resource_name',
+    'kubernetes': 'cluster_name',
+}
+
+JUSTIFICATION_COLUMN = 'justification'
+
+# Dimension columns stored dictionary-encoded
+CATEGORICAL_COLUMNS = [
+    'project_id', 'region', 'current_machine_type', 'target_machine_type',
+    'service', 'job_name', 'cluster_name', 'resource_name',
+]
+
+
+def csv_path(name):
+    return os.path.join(DATA_DIR, DATASETS[name])
+
+
+def arrow_path(name):
+    return os.path.splitext(csv_path(name))[0] + '.arrow'
+
+
+def justification_path(name):
+    return os.path.splitext(csv_path(name))[0] + '.justifications'
+
+
+# Fingerprint of the source files behind a set of datasets; changes whenever
+# any of them is replaced or rewritten
+def source_version(names):
+    digest = hashlib.sha1()
+    for name in sorted(names):
+        path = csv_path(name)
+        stat = os.stat(path) if os.path.exists(path) else None
+        digest.update(f"{name}:{stat.st_mtime_ns if stat else 0}:{stat.st_size if stat else 0};".encode())
+    return digest.hexdigest()[:16]
+
+
+def use_streaming(name):
+    if name not in RESOURCE_COLUMNS or STREAMING == '0':
+        return False
+    if STREAMING == '1':
+        return True
+    path = csv_path(name)
+    return os.path.exists(path) and os.path.getsize(path) > STREAMING_THRESHOLD_BYTES
+
+
+def read_csv_dataset(name):
+    df = pd.read_csv(
+        csv_path(name),
+        usecols=lambda col: col != JUSTIFICATION_COLUMN,
+        dtype={col: 'category' for col in CATEGORICAL_COLUMNS}
+    )
+    # Convert created_at to datetime if it exists
+    if 'created_at' in df.columns:
+        df['created_at'] = pd.to_datetime(df['created_at'], errors='coerce')
+    return df
+
+
+# A derived file is only trusted while it is at least as new as its CSV
+def _is_fresh(name, path):
+    if not os.path.exists(path):
+        return False
+    source = csv_path(name)
+    return not os.path.exists(source) or os.path.getmtime(path) >= os.path.getmtime(source)
+
+
+def arrow_is_fresh(name):
+    return _is_fresh(name, arrow_path(name))
+
+
+# Write an Arrow table under a private name first so concurrent readers never see a partial file
+def write_ipc(table, path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def read_ipc(path):
+    source = pa.memory_map(path, 'r')
+    return pa.ipc.open_file(source).read_all()
+
+
+def write_arrow(name, df):
+    return write_ipc(pa.Table.from_pandas(df, preserve_index=False), arrow_path(name))
+
+
+def read_arrow(name):
+    table = read_ipc(arrow_path(name))
+    if JUSTIFICATION_COLUMN in table.column_names:
+        table = table.drop_columns([JUSTIFICATION_COLUMN])
+    # split_blocks keeps every numeric column as a read-only view of the mapping
+    # instead of consolidating them into freshly allocated 2D blocks
+    return table.to_pandas(split_blocks=True)
+
+
+def load_dataset(name):
+    if USE_ARROW and arrow_is_fresh(name):
+        return read_arrow(name)
+    df = read_csv_dataset(name)
+    if USE_ARROW:
+        try:
+            write_arrow(name, df)
+        except OSError:
+            # Read-only data directory: keep serving from the CSV
+            pass
+    return df
+
+
+def _convert_to_arrow(name):
+    return write_arrow(name, read_csv_dataset(name))
+
+
+# pandas holds the GIL for most of a CSV parse, so large stale exports are
+# parsed in worker processes that hand the result over as Arrow files. Any
+# failure is left for the regular load to hit and report.
+def _parse_in_processes(names):
+    stale = [name for name in names if os.path.exists(csv_path(name)) and not arrow_is_fresh(name)]
+    workers = min(len(stale), os.cpu_count() or 1)
+    if not USE_ARROW or workers < 2 or sum(os.path.getsize(csv_path(name)) for name in stale) < PROCESS_PARSE_BYTES:
+        return
+    try:
+        # spawn: the dashboard process is multi-threaded, which rules out fork
+        context = multiprocessing.get_context('spawn')
+        with concurrent.futures.ProcessPoolExecutor(workers, mp_context=context) as pool:
+            for future in [pool.submit(_convert_to_arrow, name) for name in stale]:
+                future.exception()
+    except (OSError, concurrent.futures.process.BrokenProcessPool):
+        pass
+
+
+# Load independent datasets concurrently, off the calling thread, so the total
+# takes about as long as the slowest file. Returns ({name: frame or None},
+# {name: exception}) so callers can report every failure at once.
+def load_datasets(names):
+    frames, errors = {}, {}
+    if not names:
+        return frames, errors
+    _parse_in_processes(names)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(names), thread_name_prefix='load') as pool:
+        futures = {name: pool.submit(load_dataset, name) for name in names}
+        for name, future in futures.items():
+            try:
+                frames[name] = future.result()
+            except Exception as e:
+                frames[name] = None
+                errors[name] = e
+    return frames, errors
+
+
+def has_justifications(name):
+    return JUSTIFICATION_COLUMN in pd.read_csv(csv_path(name), nrows=0).columns
+
+
+def build_justifications(name):
+    texts = pd.read_csv(csv_path(name), usecols=[JUSTIFICATION_COLUMN])[JUSTIFICATION_COLUMN]
+    return JustificationStore.from_texts(texts)
+
+
+# Memory-map the side store, (re)building it from the CSV when it is missing or stale
+def load_justifications(name):
+    path = justification_path(name)
+    if _is_fresh(name, f"{path}.bin") and _is_fresh(name, f"{path}.idx.npy"):
+        return JustificationStore.open(path)
+    store = build_justifications(name)
+    try:
+        store.save(path)
+        return JustificationStore.open(path)
+    except OSError:
+        # Read-only data directory: keep the compressed store in memory
+        return store
+
+
+def _categories(column):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.categories
+    return pd.Index(column.dropna().unique())
+
+
+# Re-code every dimension column against one sorted dictionary per dimension,
+# shared by all frames, so equal values have equal codes across datasets.
+# Returns new {name: frame}; the frames passed in are left as they were, and
+# their other columns are shared rather than copied.
+def share_dictionaries(frames):
+    shared = {name: df.copy(deep=False) if df is not None else None for name, df in frames.items()}
+    present = [df for df in shared.values() if df is not None]
+    for col in CATEGORICAL_COLUMNS:
+        columns = [df[col] for df in present if col in df.columns]
+        if not columns:
+            continue
+        categories = columns[0].pipe(_categories)
+        for column in columns[1:]:
+            categories = categories.union(_categories(column))
+        dtype = pd.CategoricalDtype(categories.sort_values())
+        for df in present:
+            if col in df.columns:
+                df[col] = df[col].astype(dtype)
+    return shared
@@ -0,0 +1,246 @@
+"""Memory accounting for the dashboard process.
+
+Reports the bytes held by the fact table and its indexes, by every other
+loaded dataset (deep ``memory_usage`` with a per-column breakdown), by the
+justification side stores, by every Streamlit cache and by the session state
+of every connected session. The per-service tabs read views of the fact
+table, so they are not counted again, and a categorical dictionary shared by
+several frames is counted once, with the first frame that holds it. ``memory_report``
+returns a JSON-serializable dict that the Diagnostics view renders and offers
+for download. The cache and session sections read private Streamlit
+attributes; when an upgrade removes or reshapes one, ``unavailable`` says
+so and the rest of the report is still built.
+"""
+import datetime
+import os
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# seen: ids of the categorical dictionaries already counted; a column whose
+# dictionary is in it only counts its codes
+def frame_memory(df, seen=None):
+    seen = set() if seen is None else seen
+    usage = df.memory_usage(deep=True)
+    for col, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            categories = df[col].cat.categories
+            shared = id(categories) in seen
+            seen.add(id(categories))
+            usage[col] = df[col].cat.codes.nbytes + (0 if shared else categories.memory_usage(deep=True))
+    columns = usage.drop('Index').sort_values(ascending=False)
+    return {
+        'rows': len(df),
+        'total_bytes': int(usage.sum()),
+        'index_bytes': int(usage['Index']),
+        'columns': {col: int(nbytes) for col, nbytes in columns.items()},
+        'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()},
+    }
+
+
+def dataset_report(datasets, seen=None):
+    seen = set() if seen is None else seen
+    return {name: frame_memory(df, seen) for name, df in datasets.items() if df is not None}
+
+
+# The fact table frame, the rows of each service and the arrays indexing it
+def fact_table_report(fact_table, seen=None):
+    frame = frame_memory(fact_table.frame, seen)
+    indexes = {
+        'bitmaps': int(fact_table.index.nbytes),
+        'time_index': int(fact_table.time_index.nbytes),
+        'resource_keys': int(fact_table.resource_keys.nbytes),
+        'service_codes': int(fact_table._service_codes.nbytes),
+    }
+    return {
+        'version': fact_table.version,
+        'rows': frame['rows'],
+        'services': {service: rows.stop - rows.start for service, rows in fact_table._slices.items()},
+        # Columns too wide for MAX_COLUMN_BYTES have no bitmaps
+        'bitmap_columns': list(fact_table.index.bitmaps),
+        'frame': frame,
+        'indexes': indexes,
+        'total_bytes': frame['total_bytes'] + sum(indexes.values()),
+    }
+
+
+def side_store_report(stores):
+    return {name: {'rows': len(store), 'bytes': int(store.nbytes)}
+            for name, store in stores.items() if store is not None}
+
+
+def process_report():
+    report = {'pid': os.getpid(), 'rss_bytes': None, 'peak_rss_bytes': None}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    report['rss_bytes'] = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux
+        report['peak_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return report
+
+
+def _cache_tiers():
+    from streamlit.runtime.caching import cache_data_api, cache_resource_api
+
+    return (('st.cache_data', cache_data_api.get_data_cache_stats_provider()),
+            ('st.cache_resource', cache_resource_api.get_resource_cache_stats_provider()))
+
+
+# Whether the script runs under a server; AppTest installs a mock Runtime
+def _server_runtime():
+    from streamlit.runtime import Runtime
+
+    return Runtime.exists() and type(Runtime.instance()) is Runtime
+
+
+def _session_manager():
+    from streamlit.runtime import Runtime
+
+    if not _server_runtime():
+        return None
+    return getattr(Runtime.instance(), '_session_mgr', None)
+
+
+# Entries and bytes of every cached function of a tier, from the private
+# per-function caches; raises AttributeError or TypeError when their shape changed
+def _function_cache_rows(tier, caches):
+    rows = []
+    for cache in list(caches._function_caches.values()):
+        stats = cache.get_stats()
+        rows.append({'tier': tier, 'cache': cache.display_name, 'entries': len(stats),
+                     'bytes': sum(stat.byte_length for stat in stats)})
+    return rows
+
+
+# One row per cached function and tier, and a note when the private
+# internals could not be read. Streamlit only exposes sizes grouped per
+# function, so entry counts come from the per-function caches.
+def _cache_section():
+    try:
+        tiers = _cache_tiers()
+    except (ImportError, AttributeError) as error:
+        return [], (f"Cache accounting is unavailable in this Streamlit version "
+                    f"({type(error).__name__}: {error}).")
+    rows, failure = [], None
+    for tier, caches in tiers:
+        try:
+            rows.extend(_function_cache_rows(tier, caches))
+            continue
+        except (AttributeError, TypeError) as error:
+            failure = failure or error
+        # Internals changed: fall back to the grouped byte counts
+        try:
+            rows.extend({'tier': tier, 'cache': stat.cache_name, 'entries': None, 'bytes': stat.byte_length}
+                        for stat in caches.get_stats())
+        except (AttributeError, TypeError):
+            pass
+    note = None
+    if failure is not None:
+        note = ("Per-function cache entries are unavailable in this Streamlit version "
+                f"(`_function_caches` on the cache stats providers: {type(failure).__name__}: {failure}); "
+                "sizes are grouped by cache name.")
+    return sorted(rows, key=lambda row: row['bytes'], reverse=True), note
+
+
+# One row per connected session, and a note when the private session
+# manager could not be read
+def _session_section(current_session_id=None):
+    try:
+        session_mgr = _session_manager()
+        if session_mgr is None:
+            if _server_runtime():
+                return [], "Session accounting is unavailable in this Streamlit version (no `Runtime._session_mgr`)."
+            return [], None
+        rows = []
+        for info in session_mgr.list_active_sessions():
+            session = info.session
+            state = session.session_state
+            rows.append({
+                'session_id': session.id,
+                'current': session.id == current_session_id,
+                'keys': len(state.filtered_state),
+                'bytes': sum(stat.byte_length for stat in state.get_stats()),
+            })
+    except (AttributeError, TypeError) as error:
+        return [], (f"Session accounting is unavailable in this Streamlit version "
+                    f"(`Runtime._session_mgr`: {type(error).__name__}: {error}).")
+    return sorted(rows, key=lambda row: row['bytes'], reverse=True), None
+
+
+def cache_report():
+    return _cache_section()[0]
+
+
+def session_report(current_session_id=None):
+    return _session_section(current_session_id)[0]
+
+
+# datasets: frames held besides the fact table; views of it would be counted twice
+def memory_report(datasets, justification_stores=None, current_session_id=None, fact_table=None):
+    seen = set()
+    facts = fact_table_report(fact_table, seen) if fact_table is not None else None
+    caches, cache_note = _cache_section()
+    sessions, session_note = _session_section(current_session_id)
+    # Sections whose private Streamlit attributes an upgrade removed or
+    # reshaped show a note instead of going silently empty
+    notes = {'caches': cache_note, 'sessions': session_note}
+    return {
+        'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'process': process_report(),
+        'fact_table': facts,
+        'datasets': dataset_report(datasets, seen),
+        'justification_stores': side_store_report(justification_stores or {}),
+        'caches': caches,
+        'sessions': sessions,
+        'unavailable': {section: note for section, note in notes.items() if note is not None},
+    }
+
+
+def dataset_summary_frame(report):
+    rows = []
+    stores = report['justification_stores']
+    for name in list(report['datasets']) + [name for name in stores if name not in report['datasets']]:
+        # Justifications live in a memory-mapped side store, not in the frame
+        usage = report['datasets'].get(name)
+        store = stores.get(name, {})
+        rows.append({
+            'Dataset': name,
+            'Rows': usage['rows'] if usage else store.get('rows', 0),
+            'Total MB': usage['total_bytes'] / 2**20 if usage else 0.0,
+            'Justification MB (in frame)': usage['columns'].get('justification', 0) / 2**20 if usage else 0.0,
+            'Justification Store MB (mapped)': store.get('bytes', 0) / 2**20,
+        })
+    return pd.DataFrame(rows, columns=['Dataset', 'Rows', 'Total MB', 'Justification MB (in frame)',
+                                       'Justification Store MB (mapped)'])
+
+
+# One row for the fact table frame and one per index array
+def fact_table_summary_frame(report):
+    facts = report['fact_table']
+    parts = {'frame': facts['frame']['total_bytes'], **facts['indexes']}
+    total = facts['total_bytes'] or 1
+    return pd.DataFrame({
+        'Part': list(parts),
+        'MB': [nbytes / 2**20 for nbytes in parts.values()],
+        'Share %': [nbytes / total * 100 for nbytes in parts.values()],
+    })
+
+
+def column_breakdown_frame(usage):
+    total = usage['total_bytes'] or 1
+    return pd.DataFrame({
+        'Column': list(usage['columns']),
+        'Dtype': [usage['dtypes'][col] for col in usage['columns']],
+        'KB': [nbytes / 1024 for nbytes in usage['columns'].values()],
+        'Share %': [nbytes / total * 100 for nbytes in usage['columns'].values()],
+    })
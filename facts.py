@@ -0,0 +1,392 @@
+"""One normalized fact table behind every dashboard tab.
+
+The DataFlow, CloudSQL and Kubernetes results files are stacked into a single
+long frame with a ``service`` column and their job_name / resource_name /
+cluster_name column renamed to ``resource``. Rows are stored grouped by
+service, so the rows of one service are a contiguous slice located in O(1).
+``source_row`` keeps each row's number in its own results file, which is the
+key of that file's justification side store. Filters on the dimension
+columns are answered from per-value bitmaps built when the table is loaded
+(see bitmaps.py), and any of them may select several values.
+
+A rightsizing run that is repeated reports the same resource again with a
+later ``created_at``. ``latest`` marks the last row of every (service,
+project_id, resource), found at ingest with one sort; selecting
+``{'latest': True}`` (see ``LATEST_SELECTION``) drops the superseded rows so
+their savings are not counted twice. Within a ``created_at`` range it keeps
+the last row of every resource in that range instead, so a range covering
+only earlier runs still shows them. Two runs, told apart by the day of
+``created_at``, are compared resource by resource with ``run_diff`` (see
+runs.py).
+
+Every row also carries the family, vCPUs and memory of its current and
+target machine types (``CAPACITY_COLUMNS``, see catalog.py), joined at ingest
+and handed to every tab with its detail rows.
+
+Services with no detail rows loaded (``Compute``, and any results file served
+as a streamed aggregate) keep their pre-aggregated ``overview.csv`` rows as
+facts with only service, project and costs set. The Overview tab is a rollup
+of the fact table, so its totals always agree with the service tabs.
+
+Every table carries a ``version``: a fingerprint of the source files it was
+built from. With pyarrow available the table is persisted as ``facts.arrow``
+in the data directory and memory-mapped by later loads while its version still
+matches the source files, like the per-dataset Arrow files (see data_store.py).
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import bitmaps
+import catalog
+import data_store
+import runs
+import timeline
+
+FACTS_FILE = 'facts.arrow'
+METADATA_KEY = b'dashboard_facts'
+# Layout of the persisted frame; bump it whenever its columns or their
+# encoding change, so tables written by an older build are rebuilt
+FORMAT_VERSION = 2
+
+# Service label of every results dataset in the fact table and the Overview
+SERVICE_NAMES = {
+    'dataflow': 'DataFlow',
+    'cloudsql': 'CloudSQL',
+    'kubernetes': 'Kubernetes',
+}
+
+# overview.csv spellings of the services above
+OVERVIEW_SERVICE_ALIASES = {'Kubernates': 'Kubernetes'}
+
+# overview.csv cost columns and the fact columns they roll up from
+OVERVIEW_COLUMNS = {
+    'Estimated': 'target_cost',
+    'Actual': 'current_cost',
+    'Savings': 'savings',
+}
+
+FACT_COLUMNS = [
+    'service', 'project_id', 'resource', 'region', 'current_machine_type', 'target_machine_type',
+    'current_cost', 'target_cost', 'savings', 'current_machine_hourly_rate', 'target_machine_hourly_rate',
+    'created_at', 'latest', 'source_row',
+]
+
+CATEGORICAL_COLUMNS = FACT_COLUMNS[:6]
+
+# Filter dimensions with a bitmap per value (see bitmaps.py)
+INDEXED_COLUMNS = ['service', 'project_id', 'region', 'current_machine_type', 'target_machine_type', 'latest']
+
+LATEST_COLUMN = 'latest'
+
+# Selection keeping only the latest row per resource
+LATEST_SELECTION = (True,)
+
+# Machine specs of the current and target machine types
+CAPACITY_COLUMNS = [f'{side}_{col}' for side in ('current', 'target') for col in catalog.SPEC_COLUMNS]
+
+
+def facts_path():
+    return os.path.join(data_store.DATA_DIR, FACTS_FILE)
+
+
+# Facts of the services that only appear in overview.csv
+def _overview_facts(overview, covered):
+    services = overview['service'].astype(str).replace(OVERVIEW_SERVICE_ALIASES)
+    keep = ~services.isin(covered)
+    rows = overview[keep]
+    facts = pd.DataFrame({'service': services[keep], 'project_id': rows['project_id']})
+    for overview_column, fact_column in OVERVIEW_COLUMNS.items():
+        facts[fact_column] = rows[overview_column]
+    facts['source_row'] = rows.index
+    return facts
+
+
+# Whether each row is the latest of its (service, project_id, resource) by
+# created_at: one stable sort on the keys, then the last row of every run of
+# equal keys. Rows without a resource stand alone; on equal created_at the
+# row further down its file wins.
+def latest_per_resource(frame):
+    keys = [frame[col].cat.codes.to_numpy() for col in ('service', 'project_id', 'resource')]
+    # NaT sorts first, so a dated row always supersedes an undated one
+    created = pd.to_datetime(frame[timeline.TIME_COLUMN], utc=True).array.asi8
+    order = np.lexsort([created] + keys[::-1])
+    superseded = np.ones(len(order), dtype=bool)
+    superseded[-1:] = False
+    for key in keys:
+        ordered = key[order]
+        superseded[:-1] &= ordered[1:] == ordered[:-1]
+    latest = np.zeros(len(order), dtype=bool)
+    latest[order[~superseded]] = True
+    latest[keys[2] < 0] = True
+    return pd.Categorical(latest, categories=[False, True])
+
+
+# CAPACITY_COLUMNS of every row, parsed once per distinct machine type
+def machine_specs(frame):
+    return pd.concat([catalog.specs(frame[f'{side}_machine_type'], f'{side}_') for side in ('current', 'target')],
+                     axis=1)
+
+
+class FactTable:
+    def __init__(self, frame, native_columns, version):
+        self.frame = frame
+        self.version = version
+        # Column order of each results file, to hand tabs their familiar shape
+        self.native_columns = native_columns
+        codes = frame['service'].cat.codes.to_numpy()
+        self._service_codes = codes
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else []
+        stops = list(starts[1:]) + [len(codes)]
+        categories = frame['service'].cat.categories
+        self._slices = {categories[codes[start]]: slice(int(start), int(stop))
+                        for start, stop in zip(starts, stops)}
+        latest = frame[LATEST_COLUMN].cat.codes.to_numpy()
+        self._superseded = {service: int((latest[rows] == 0).sum()) for service, rows in self._slices.items()}
+        # (project_id, resource) of every row as one integer, -1 without a
+        # resource; project codes are shifted by one so a row without a
+        # project_id (code -1) still gets a non-negative key
+        project = frame['project_id'].cat.codes.to_numpy().astype(np.int64) + 1
+        resource = frame['resource'].cat.codes.to_numpy().astype(np.int64)
+        self.resource_keys = np.where(resource >= 0, project << 32 | resource, -1)
+        self.index = bitmaps.BitmapIndex(frame, INDEXED_COLUMNS)
+        self.time_index = timeline.TimeIndex(frame, self._slices)
+
+    @classmethod
+    def build(cls, frames, overview=None):
+        # frames: results dataset name -> frame whose dimension columns share dictionaries
+        parts = []
+        native_columns = {}
+        for name, df in frames.items():
+            if df is None:
+                continue
+            native_columns[name] = list(df.columns)
+            part = df.rename(columns={data_store.RESOURCE_COLUMNS[name]: 'resource'})
+            part.insert(0, 'service', SERVICE_NAMES[name])
+            part['source_row'] = df.index.to_numpy()
+            parts.append(part)
+        if overview is not None:
+            covered = [SERVICE_NAMES[name] for name in native_columns]
+            parts.append(_overview_facts(overview, covered))
+
+        frame = pd.concat(parts, ignore_index=True)
+        extras = [col for col in frame.columns if col not in FACT_COLUMNS]
+        frame = frame.reindex(columns=FACT_COLUMNS + extras)
+        # Overview-only rows leave created_at all missing, of object dtype
+        frame[timeline.TIME_COLUMN] = pd.to_datetime(frame[timeline.TIME_COLUMN], utc=True)
+        # Dimensions keep their shared dictionary where every part has it; the
+        # resource columns and service labels get a dictionary of their own
+        for col in CATEGORICAL_COLUMNS:
+            dtypes = {part[col].dtype for part in parts if col in part.columns}
+            dtype = dtypes.pop() if len(dtypes) == 1 else None
+            frame[col] = frame[col].astype(dtype if isinstance(dtype, pd.CategoricalDtype) else 'category')
+        # Overview-only services may interleave; keep each service contiguous
+        frame = frame.sort_values('service', kind='stable', ignore_index=True)
+        frame[LATEST_COLUMN] = latest_per_resource(frame)
+        frame = frame.join(machine_specs(frame))
+        return cls(frame, native_columns, source_version(native_columns))
+
+    @classmethod
+    def open(cls, path):
+        table = data_store.read_ipc(path)
+        metadata = json.loads(table.schema.metadata[METADATA_KEY])
+        if metadata.get('format') != FORMAT_VERSION:
+            raise ValueError(f"{path} holds fact table format {metadata.get('format')}, not {FORMAT_VERSION}")
+        frame = table.to_pandas(split_blocks=True)
+        frame[timeline.TIME_COLUMN] = pd.to_datetime(frame[timeline.TIME_COLUMN], utc=True)
+        return cls(frame, metadata['native_columns'], metadata['version'])
+
+    def save(self, path):
+        table = data_store.pa.Table.from_pandas(self.frame, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[METADATA_KEY] = json.dumps({'format': FORMAT_VERSION, 'native_columns': self.native_columns,
+                                           'version': self.version})
+        data_store.write_ipc(table.replace_schema_metadata(metadata), path)
+        return path
+
+    @property
+    def datasets(self):
+        return list(self.native_columns)
+
+    def services(self):
+        return list(self._slices)
+
+    # Rows of one service (or all) superseded by a later row of the same resource
+    def superseded(self, service=None):
+        if service is None:
+            return sum(self._superseded.values())
+        return self._superseded.get(service, 0)
+
+    # Value selections and the created_at (first day, last day) range of a query
+    @staticmethod
+    def _split_selections(selections):
+        chosen, period = {}, None
+        for col, selection in (selections or {}).items():
+            if col == timeline.TIME_COLUMN:
+                period = timeline.selected_period(selection)
+                continue
+            values = bitmaps.selected_values(selection)
+            if values is not None:
+                chosen[col] = values
+        return chosen, period
+
+    # Mask over rows_slice of the rows matching every {column: values}, or
+    # None when nothing is chosen
+    def _matches(self, rows_slice, chosen):
+        indexed = {col: values for col, values in chosen.items() if col in self.index}
+        mask = self.index.select(indexed, rows_slice.start, rows_slice.stop) if indexed else None
+        for col, values in chosen.items():
+            if col not in indexed:
+                matches = self.frame[col].iloc[rows_slice].isin(values).to_numpy()
+                mask = matches if mask is None else mask & matches
+        return mask
+
+    # The 'latest' flag within a created_at range: whether each row at
+    # positions (in created_at order) is the last of its resource among them
+    def _latest_among(self, positions):
+        keys = self.resource_keys[positions]
+        resources = pd.MultiIndex.from_arrays([self._service_codes[positions], keys])
+        return (keys < 0) | ~resources.duplicated(keep='last')
+
+    # Fact rows of one service (or all) matching {column: value or values};
+    # 'All' or an empty selection keeps every value. A created_at selection is
+    # a (first day, last day) range; with one, 'latest' applies within it.
+    def query(self, service=None, selections=None):
+        if service is None:
+            rows_slice = slice(0, len(self.frame))
+        elif service in self._slices:
+            rows_slice = self._slices[service]
+        else:
+            return self.frame.iloc[:0]
+        rows = self.frame.iloc[rows_slice]
+        chosen, period = self._split_selections(selections)
+        latest = chosen.pop(LATEST_COLUMN, None) if period is not None else None
+        mask = self._matches(rows_slice, chosen)
+        if period is None:
+            return rows if mask is None else rows[mask]
+        # The rows in range come from the time index, back in table order
+        positions = self.time_index.between(service, *period)
+        if latest is not None:
+            positions = positions[np.isin(self._latest_among(positions + rows_slice.start), latest)]
+        positions = np.sort(positions)
+        if mask is not None:
+            positions = positions[mask[positions]]
+        return rows.iloc[positions]
+
+    # Rows per value of each of columns among the rows of one service (or all)
+    # that match the selections of the other columns; only values with rows
+    def facet_counts(self, service=None, selections=None, columns=()):
+        if service is None:
+            rows_slice = slice(0, len(self.frame))
+        elif service in self._slices:
+            rows_slice = self._slices[service]
+        else:
+            rows_slice = slice(0, 0)
+        chosen, period = self._split_selections(selections)
+        latest = chosen.pop(LATEST_COLUMN, None) if period is not None else None
+        in_period = in_range_latest = None
+        if period is not None:
+            in_period = self.time_index.between(service, *period) + rows_slice.start
+            in_range_latest = self._latest_among(in_period)
+        facets = {}
+        for col in columns:
+            rows = in_period
+            if latest is not None and col != LATEST_COLUMN:
+                rows = in_period[np.isin(in_range_latest, latest)]
+            if period is not None and col == LATEST_COLUMN:
+                # The flag within the range, not the stored one
+                mask = self._matches(rows_slice, chosen)
+                flags = in_range_latest if mask is None else in_range_latest[mask[in_period - rows_slice.start]]
+                counts = pd.Series(np.bincount(flags.astype(np.int64), minlength=2), index=[False, True])
+            elif col in self.index and all(other in self.index for other in chosen if other != col):
+                counts = self.index.counts(col, chosen, rows_slice.start, rows_slice.stop, rows)
+            else:
+                others = {other: values for other, values in chosen.items() if other != col}
+                if period is not None:
+                    others[timeline.TIME_COLUMN] = period
+                    if latest is not None:
+                        others[LATEST_COLUMN] = latest
+                counts = self.query(service, others)[col].value_counts(sort=False)
+            facets[col] = counts[counts > 0]
+        return facets
+
+    # Positions of the rows of service created on day: the latest row of every
+    # resource in that day's run
+    def snapshot(self, service, day):
+        start = self._slices[service].start if service in self._slices else 0
+        positions = self.time_index.between(service, day, day) + start
+        keys = self.resource_keys[positions]
+        # between() lists the day's rows in created_at order
+        return positions[(keys >= 0) & ~pd.Index(keys).duplicated(keep='last')]
+
+    # Resource by resource comparison of the runs of service on days before and after
+    def run_diff(self, service, before, after):
+        return runs.diff(self.frame, self.resource_keys, self.snapshot(service, before), self.snapshot(service, after))
+
+    # Matching rows of a results dataset with its own column names, then the
+    # machine specs, indexed by source row
+    def detail(self, name, selections=None):
+        if name not in self.native_columns:
+            return None
+        rows = self.query(SERVICE_NAMES[name], selections)
+        resource_column = data_store.RESOURCE_COLUMNS[name]
+        columns = {col: rows['resource' if col == resource_column else col].array
+                   for col in self.native_columns[name]}
+        columns.update({col: rows[col].array for col in CAPACITY_COLUMNS if col not in columns})
+        # The table keeps created_at in UTC; tabs and exports get the naive
+        # times of the results file
+        if timeline.TIME_COLUMN in columns:
+            columns[timeline.TIME_COLUMN] = timeline.naive_utc(rows[timeline.TIME_COLUMN]).array
+        return pd.DataFrame(columns, index=pd.Index(rows['source_row'].to_numpy()), copy=False)
+
+    # Per service and project totals in the shape of overview.csv
+    def overview(self, selections=None):
+        rows = self.query(selections=selections)
+        rollup = rows.groupby(['service', 'project_id'], observed=True)[list(OVERVIEW_COLUMNS.values())].sum()
+        rollup.columns = list(OVERVIEW_COLUMNS)
+        return rollup.reset_index()
+
+
+def source_version(datasets):
+    return data_store.source_version(list(datasets) + ['overview'])
+
+
+# The persisted table is trusted while it has the current format and was
+# built from the current source files of the same results datasets
+def read_fact_table(datasets):
+    path = facts_path()
+    if not data_store.USE_ARROW or not os.path.exists(path):
+        return None
+    try:
+        table = FactTable.open(path)
+    except ValueError:
+        # Written by a build with another layout: rebuilt from the source files
+        return None
+    return table if table.version == source_version(datasets) else None
+
+
+def write_fact_table(table):
+    if not data_store.USE_ARROW:
+        return None
+    try:
+        return table.save(facts_path())
+    except OSError:
+        # Read-only data directory: keep serving the in-memory table
+        return None
+
+
+# Read the persisted table, or build it from the source files and persist it
+def load_fact_table(datasets):
+    table = read_fact_table(datasets)
+    if table is not None:
+        return table
+    frames, errors = data_store.load_datasets(list(datasets) + ['overview'])
+    if errors:
+        raise next(iter(errors.values()))
+    frames = data_store.share_dictionaries(frames)
+    overview = frames.pop('overview')
+    table = FactTable.build(frames, overview)
+    write_fact_table(table)
+    return table
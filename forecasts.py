@@ -0,0 +1,142 @@
+"""Savings realization forecast from the ``created_at`` history.
+
+The savings of every recommendation are a monthly amount. Bucketed by the
+period of their creation date and summed up, they give each series (a service,
+or a service and project) its cumulative monthly savings at the end of every
+period. The history is bucketed at the coarsest resolution of
+``timeline.FREQUENCIES`` that has at least ``MIN_PERIODS`` periods.
+
+All series share one period grid: the buckets are one ``numpy.bincount`` into
+a (series x periods) matrix. Every series gets a least-squares line through
+its cumulative savings from its first recommendation on, and the fits are a
+handful of sums over that matrix with a mask of each series' periods: one pass
+of numpy for every series at once. The lines are then read at the end of each
+of the next ``FORECAST_MONTHS`` months, with an approximate 95% prediction
+interval from the residuals of the fit.
+"""
+import numpy as np
+import pandas as pd
+
+import timeline
+
+FORECAST_MONTHS = 6
+MIN_PERIODS = 3
+
+# Prediction interval: normal quantile of ~95% coverage
+INTERVAL_Z = 1.96
+
+DAYS_PER_MONTH = 365.25 / 12
+
+
+# Period of each resample rule of timeline.FREQUENCIES: weeks run Monday
+# through Sunday
+PERIODS = {'D': 'D', 'W-MON': 'W-SUN', 'MS': 'M'}
+
+
+# First day of the period (resample rule) of every timestamp, as naive UTC
+def period_start(stamps, rule):
+    if stamps.dt.tz is not None:
+        stamps = stamps.dt.tz_convert('UTC').dt.tz_localize(None)
+    return stamps.dt.to_period(PERIODS[rule]).dt.start_time
+
+
+# Label of the coarsest resolution with MIN_PERIODS periods between the first
+# and last timestamps, and the number of periods it has
+def resolution(stamps):
+    stamps = stamps.dropna()
+    if stamps.empty:
+        return None, 0
+    ends = pd.Series([stamps.min(), stamps.max()])
+    periods = 0
+    for label in reversed(list(timeline.FREQUENCIES)):
+        rule = timeline.FREQUENCIES[label]
+        first, last = period_start(ends, rule)
+        periods = len(pd.date_range(first, last, freq=rule))
+        if periods >= MIN_PERIODS:
+            return label, periods
+    return None, periods
+
+
+def _days(stamps):
+    return ((stamps - pd.Timestamp(0)) / pd.Timedelta(days=1)).to_numpy(dtype=float)
+
+
+# Per row of y (series x points at x, where mask): slope, intercept, residual
+# standard deviation and the sums the prediction interval needs
+def _fit(x, y, mask):
+    weights = mask.astype(float)
+    n = weights.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_mean = (weights * x).sum(axis=1) / n
+        y_mean = (weights * y).sum(axis=1) / n
+        dx = np.where(mask, x - x_mean[:, None], 0.0)
+        sxx = (dx * dx).sum(axis=1)
+        slope = np.where(sxx > 0, (dx * (y - y_mean[:, None])).sum(axis=1) / sxx, 0.0)
+        intercept = y_mean - slope * x_mean
+        residuals = np.where(mask, y - (intercept[:, None] + slope[:, None] * x), 0.0)
+        sigma = np.sqrt((residuals * residuals).sum(axis=1) / (n - 2))
+    return {'slope': slope, 'intercept': intercept, 'sigma': np.where(n > 2, sigma, np.nan),
+            'n': n, 'x_mean': x_mean, 'sxx': sxx}
+
+
+# Cumulative monthly savings of rows per series of by (a column or list of
+# columns) and their forecast. Returns {'resolution', 'periods'} and, when the
+# history is long enough, 'history' (one row per series and period),
+# 'forecast' (per series and coming month) and 'fit' (per series). as_of is
+# the end of a row's period or month, which its cumulative savings run through.
+def savings_forecast(rows, by, months=FORECAST_MONTHS):
+    keys = [by] if isinstance(by, str) else list(by)
+    label, periods = resolution(rows[timeline.TIME_COLUMN])
+    if label is None:
+        return {'resolution': None, 'periods': periods}
+
+    rule = timeline.FREQUENCIES[label]
+    frame = rows[keys + [timeline.TIME_COLUMN, 'savings']].dropna(subset=keys + [timeline.TIME_COLUMN])
+    periods_of_rows = period_start(frame[timeline.TIME_COLUMN], rule)
+    grid = pd.date_range(periods_of_rows.min(), periods_of_rows.max(), freq=rule)
+    grouped = frame.groupby(keys, observed=True, sort=True)
+    index = grouped.size().index
+    series, steps = len(index), len(grid)
+    cells = grouped.ngroup().to_numpy() * steps + grid.get_indexer(periods_of_rows)
+    savings = np.bincount(cells, weights=np.nan_to_num(frame['savings'].to_numpy(dtype=float)),
+                          minlength=series * steps).reshape(series, steps)
+    counts = np.bincount(cells, minlength=series * steps).reshape(series, steps)
+
+    # Each series from its first recommendation on, cumulative through the end of every period
+    mask = np.cumsum(counts > 0, axis=1) > 0
+    cumulative = np.cumsum(savings, axis=1)
+    ends = grid + pd.tseries.frequencies.to_offset(rule)
+    x = np.broadcast_to(_days(ends), cumulative.shape)
+    fit = _fit(x, cumulative, mask)
+
+    # Month starts after the history: the cumulative savings by the end of the month before
+    month_starts = pd.date_range(ends[-1] + pd.Timedelta(days=1), periods=months, freq='MS')
+    ahead = _days(month_starts)
+    projected = fit['intercept'][:, None] + fit['slope'][:, None] * ahead
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spread = fit['sigma'][:, None] * np.sqrt(
+            1 + 1 / fit['n'][:, None] + (ahead - fit['x_mean'][:, None]) ** 2 / fit['sxx'][:, None])
+    margin = INTERVAL_Z * spread
+
+    index = index.to_frame(index=False)
+    history = index.loc[np.repeat(np.arange(series), steps)].reset_index(drop=True)
+    history['period'] = np.tile(grid, series)
+    history['as_of'] = np.tile(ends, series)
+    history['savings'] = savings.ravel()
+    history['cumulative'] = cumulative.ravel()
+    history = history[mask.ravel()].reset_index(drop=True)
+
+    forecast = index.loc[np.repeat(np.arange(series), months)].reset_index(drop=True)
+    forecast['month'] = np.tile(month_starts - pd.offsets.MonthBegin(1), series)
+    forecast['as_of'] = np.tile(month_starts, series)
+    forecast['cumulative'] = projected.ravel()
+    forecast['lower'] = (projected - margin).ravel()
+    forecast['upper'] = (projected + margin).ravel()
+
+    summary = index.copy()
+    summary['periods'] = mask.sum(axis=1)
+    summary['cumulative'] = cumulative[:, -1]
+    summary['trend_per_month'] = fit['slope'] * DAYS_PER_MONTH
+    summary['projected'] = projected[:, -1]
+    summary = summary.sort_values('projected', ascending=False, ignore_index=True)
+    return {'resolution': label, 'periods': periods, 'history': history, 'forecast': forecast, 'fit': summary}
@@ -0,0 +1,94 @@
+"""Offset-indexed, compressed side store for the ``justification`` text.
+
+The justification is a multi-sentence explanation per row that the dashboard
+only shows when someone drills into a single recommendation, so it is kept out
+of the main frames. Each record is zlib-compressed against a dictionary of
+sample text (the records share most of their vocabulary) and appended to a
+blob; an offsets array maps a row number to its byte range. On disk the blob
+(``.bin``) and the offsets (``.idx.npy``) are memory-mapped, so fetching one
+row touches only that row's bytes.
+"""
+import mmap
+import os
+import zlib
+
+import numpy as np
+
+ZDICT_BYTES = 32 * 1024
+COMPRESSION_LEVEL = 9
+
+
+def _build_zdict(records):
+    # zlib favours the end of the dictionary, so sample records spread over the whole
+    # column; small columns get a proportionally small dictionary
+    present = [record for record in records if record]
+    if not present:
+        return b''
+    size = min(ZDICT_BYTES, sum(len(record) for record in present) // 8)
+    step = max(1, len(present) // 64)
+    sample = b' '.join(present[::step])
+    return sample[-size:] if size else b''
+
+
+# Missing (NaN/None) and empty texts are both stored as zero-length records, so
+# get() returns None for either; an empty string does not round-trip as ''
+class JustificationStore:
+    def __init__(self, blob, offsets):
+        # offsets[0] is the length of the zlib dictionary stored at the start of the blob
+        self._blob = blob
+        self._offsets = offsets
+        self._zdict = bytes(blob[:int(offsets[0])])
+
+    @classmethod
+    def from_texts(cls, texts):
+        records = [text.encode('utf-8') if isinstance(text, str) else b'' for text in texts]
+        zdict = _build_zdict(records)
+        parts = [zdict]
+        offsets = np.empty(len(records) + 1, dtype=np.int64)
+        offsets[0] = position = len(zdict)
+        for row, record in enumerate(records):
+            if record:
+                compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=zdict) if zdict else zlib.compressobj(COMPRESSION_LEVEL)
+                compressed = compressor.compress(record) + compressor.flush()
+                parts.append(compressed)
+                position += len(compressed)
+            offsets[row + 1] = position
+        return cls(b''.join(parts), offsets)
+
+    @classmethod
+    def open(cls, path):
+        with open(f"{path}.bin", 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        offsets = np.load(f"{path}.idx.npy", mmap_mode='r')
+        return cls(blob, offsets)
+
+    def save(self, path):
+        # Write both files under temporary names, then swap them in
+        tmp_bin, tmp_idx = f"{path}.bin.{os.getpid()}.tmp", f"{path}.idx.{os.getpid()}.tmp.npy"
+        try:
+            with open(tmp_bin, 'wb') as f:
+                f.write(self._blob)
+            np.save(tmp_idx, np.asarray(self._offsets))
+            os.replace(tmp_bin, f"{path}.bin")
+            os.replace(tmp_idx, f"{path}.idx.npy")
+        finally:
+            for tmp in (tmp_bin, tmp_idx):
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    @property
+    def nbytes(self):
+        return len(self._blob) + self._offsets.nbytes
+
+    # Decompress the justification of one source row; None when the row has none
+    def get(self, row):
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        if start == end:
+            return None
+        decompressor = zlib.decompressobj(zdict=self._zdict) if self._zdict else zlib.decompressobj()
+        data = decompressor.decompress(self._blob[start:end]) + decompressor.flush()
+        return data.decode('utf-8')
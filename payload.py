@@ -0,0 +1,514 @@
+"""Payload accounting and budgets for the charts and tables sent to the browser.
+
+Every chart and table of the dashboard views is drawn through ``plotly_chart``
+and ``dataframe`` here rather than through Streamlit directly. Each call
+records the bytes the element adds to the websocket stream for the current
+rerun; the Diagnostics view lists the last rerun of every view in the session.
+Sizes start as a cheap estimate from the number of point values or table
+cells; only an element whose estimate comes within ``MEASURE_SHARE`` of its
+budget is measured exactly (the figure's JSON spec, the table's Arrow payload
+including the Styler's formatted cells).
+
+Every element has a budget: ``DASHBOARD_CHART_BUDGET_KB`` (default 512) for
+charts, ``DASHBOARD_TABLE_BUDGET_KB`` (default 1024) for tables, or
+``budget=`` (bytes) on a single call. An element over budget is reduced before
+it is sent, and the reduction is logged:
+
+* box plots are aggregated to their quartiles and fences instead of shipping
+  every point;
+* scatter traces switch to WebGL (``scattergl``) and, if the figure is still
+  too large, are downsampled to every n-th point;
+* bar and pie traces keep their largest bars or slices and fold the rest into
+  one "Other" bar or slice (see ranking.py);
+* heatmaps keep the rows and columns with the largest totals and fold the rest
+  into an "Other" row and column;
+* tables drop categories no row uses, then the Styler's server-side
+  formatting for the equivalent ``column_config`` format, then are cut to the
+  rows that fit, with a caption saying so.
+"""
+import logging
+import math
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from pandas.io.formats.style import Styler
+
+import data_store
+import ranking
+
+CHART_BUDGET = int(float(os.environ.get('DASHBOARD_CHART_BUDGET_KB', 512)) * 1024)
+TABLE_BUDGET = int(float(os.environ.get('DASHBOARD_TABLE_BUDGET_KB', 1024)) * 1024)
+
+# Tables larger than this are measured on their first rows and extrapolated
+SAMPLE_ROWS = 2000
+
+# Elements estimated under this share of their budget are not measured exactly
+MEASURE_SHARE = 0.25
+
+# Size estimates: a fixed overhead plus bytes per point value of a chart or
+# per cell of a table; the Styler's formatting adds a display string per cell
+ELEMENT_OVERHEAD = 8 * 1024
+BYTES_PER_VALUE = 32
+BYTES_PER_CELL = 24
+STYLED_CELL_FACTOR = 3
+
+# Per-point arrays of a scatter trace, thinned together when downsampling
+POINT_PROPERTIES = ('x', 'y', 'text', 'hovertext', 'customdata', 'ids',
+                    'marker.size', 'marker.color', 'marker.symbol', 'marker.opacity')
+
+# Per-point arrays of bar and pie traces, kept with their bar or slice when folding
+FOLD_PROPERTIES = ('x', 'y', 'labels', 'values', 'text', 'hovertext', 'customdata', 'ids',
+                   'marker.color', 'marker.colors')
+
+# Per-point arrays counted by the size estimate of a figure
+ESTIMATE_PROPERTIES = POINT_PROPERTIES + ('z', 'values', 'labels', 'parents', 'lat', 'lon')
+
+LEDGER_KEY = '_payload_ledger'
+VIEW_KEY = '_payload_view'
+
+logger = logging.getLogger(__name__)
+
+
+# Start the payload record of a rerun of view; the previous rerun of the
+# other views is kept for the Diagnostics view
+def start_run(view):
+    ledger = dict(st.session_state.get(LEDGER_KEY, {}))
+    ledger[view] = []
+    st.session_state[LEDGER_KEY] = ledger
+    st.session_state[VIEW_KEY] = view
+
+
+# {view: [element record, ...]} of the last rerun of every view in this session
+def last_runs():
+    return st.session_state.get(LEDGER_KEY, {})
+
+
+def _record(kind, name, measured, sent, budget, actions, exact=True):
+    ledger = st.session_state.get(LEDGER_KEY)
+    if ledger is not None:
+        ledger.setdefault(st.session_state.get(VIEW_KEY), []).append({
+            'element': name, 'kind': kind, 'measured_bytes': measured, 'sent_bytes': sent,
+            'budget_bytes': budget, 'action': '; '.join(actions), 'exact': exact,
+        })
+    if actions:
+        logger.warning("%s %r was %.1f KB, over its %.0f KB budget: %s; sent %.1f KB",
+                       kind, name, measured / 1024, budget / 1024, '; '.join(actions), sent / 1024)
+    else:
+        logger.debug("%s %r: %.1f KB", kind, name, measured / 1024)
+
+
+# ---------------------------------------------------------------- charts
+
+def figure_bytes(fig):
+    import plotly.io as pio
+
+    # The spec st.plotly_chart sends
+    return len(pio.to_json(fig, validate=False).encode('utf-8'))
+
+
+# Size of a figure from its number of point values, without serializing it
+def figure_estimate(fig):
+    values = 0
+    for trace in fig.data:
+        for path in ESTIMATE_PROPERTIES:
+            if path not in trace:
+                continue
+            array = trace[path]
+            if array is not None and not isinstance(array, str) and np.ndim(array) > 0:
+                values += np.size(array)
+    return ELEMENT_OVERHEAD + values * BYTES_PER_VALUE
+
+
+def _figure_name(fig):
+    layout = fig.layout
+    if layout.title.text:
+        return layout.title.text
+    axes = [axis.title.text for axis in (layout.xaxis, layout.yaxis) if axis.title.text]
+    if axes:
+        return ' by '.join(reversed(axes))
+    return fig.data[0].type if fig.data else 'empty chart'
+
+
+def _copy_trace(trace, trace_type, **changes):
+    import plotly.graph_objects as go
+
+    spec = trace.to_plotly_json()
+    spec.pop('type', None)
+    for key in changes:
+        spec.pop(key, None)
+    return getattr(go, trace_type)(spec, skip_invalid=True, **changes)
+
+
+# Quartiles and Tukey fences of each box instead of every point
+def _aggregate_box(trace):
+    horizontal = trace.orientation == 'h'
+    values = np.asarray(trace.x if horizontal else trace.y, dtype=float)
+    positions = trace.y if horizontal else trace.x
+    positions = np.asarray(positions) if positions is not None else np.full(len(values), trace.name or '')
+    stats = {key: [] for key in ('q1', 'median', 'q3', 'lowerfence', 'upperfence')}
+    groups = list(dict.fromkeys(positions.tolist()))
+    for group in groups:
+        points = values[(positions == group) & ~np.isnan(values)]
+        if not len(points):
+            points = np.array([np.nan])
+        q1, median, q3 = np.percentile(points, [25, 50, 75])
+        reach = 1.5 * (q3 - q1)
+        stats['q1'].append(q1)
+        stats['median'].append(median)
+        stats['q3'].append(q3)
+        stats['lowerfence'].append(points[points >= q1 - reach].min(initial=q1))
+        stats['upperfence'].append(points[points <= q3 + reach].max(initial=q3))
+    axis = 'y' if horizontal else 'x'
+    return _copy_trace(trace, 'Box', **{axis: groups, 'x' if horizontal else 'y': None,
+                                         'boxpoints': False, **stats})
+
+
+def _point_count(trace):
+    return max((len(trace[path]) for path in POINT_PROPERTIES
+                if trace[path] is not None and not isinstance(trace[path], str) and np.ndim(trace[path]) > 0),
+               default=0)
+
+
+# Every step-th point of a scatter trace
+def _downsample(trace, step):
+    for path in POINT_PROPERTIES:
+        values = trace[path]
+        if values is not None and not isinstance(values, str) and np.ndim(values) > 0 and len(values) > 1:
+            trace[path] = np.asarray(values)[::step]
+    return trace
+
+
+def _is_points(values, count=None):
+    return (values is not None and not isinstance(values, str) and np.ndim(values) > 0
+            and (count is None or len(values) == count))
+
+
+# Category and value properties of a bar or pie trace, or None when it has no per-point values
+def _fold_axes(trace):
+    if trace.type == 'pie':
+        axes = ('labels', 'values')
+    else:
+        axes = ('y', 'x') if trace.orientation == 'h' else ('x', 'y')
+    return axes if all(_is_points(trace[path]) for path in axes) else None
+
+
+def _fold_count(trace):
+    axes = _fold_axes(trace)
+    return len(trace[axes[1]]) if axes else 0
+
+
+# The keep largest bars or slices of a trace and one "Other" bar or slice
+# holding the sum of the rest; the other per-point arrays follow their bar
+def _fold_points(trace, keep):
+    label_path, value_path = _fold_axes(trace)
+    count = len(trace[value_path])
+    if count <= keep:
+        return trace
+    paths = [path for path in FOLD_PROPERTIES if path in trace]
+    columns = {}
+    for path in paths:
+        values = trace[path]
+        if not _is_points(values, count):
+            continue
+        values = np.asarray(values)
+        if values.ndim == 2:
+            # customdata: one column per hover field
+            columns.update({f"{path}#{j}": values[:, j] for j in range(values.shape[1])})
+        else:
+            columns[path] = values
+    folded = ranking.top_with_other(pd.DataFrame(columns), value_path, keep, label_path, [value_path])
+    trace = _copy_trace(trace, trace.type.capitalize())
+    for path in paths:
+        if path in columns:
+            column = folded[path]
+            trace[path] = (column.fillna('') if column.dtype == object else column).to_numpy()
+        elif f"{path}#0" in columns:
+            trace[path] = folded[[col for col in folded.columns if col.startswith(f"{path}#")]].to_numpy()
+    return trace
+
+
+# The ky x kx rows and columns of a heatmap with the largest totals, then an
+# "Other" row and column holding the sums of the rest
+def _fold_heatmap(trace, ky, kx):
+    z = np.asarray(trace.z, dtype=float)
+    rows, cols = z.shape
+    x = np.asarray(trace.x) if _is_points(trace.x, cols) else np.arange(cols)
+    y = np.asarray(trace.y) if _is_points(trace.y, rows) else np.arange(rows)
+    totals = np.abs(np.nan_to_num(z))
+    changes = {}
+    if cols > kx:
+        keep = np.sort(ranking.top_k_positions(totals.sum(axis=0), kx))
+        rest = np.setdiff1d(np.arange(cols), keep)
+        z = np.column_stack([z[:, keep], np.nansum(z[:, rest], axis=1)])
+        totals = np.column_stack([totals[:, keep], totals[:, rest].sum(axis=1)])
+        changes['x'] = [str(value) for value in x[keep]] + [f"{ranking.OTHER_LABEL} ({len(rest)} more)"]
+    if rows > ky:
+        keep = np.sort(ranking.top_k_positions(totals.sum(axis=1), ky))
+        rest = np.setdiff1d(np.arange(rows), keep)
+        z = np.vstack([z[keep], np.nansum(z[rest], axis=0)])
+        changes['y'] = [str(value) for value in y[keep]] + [f"{ranking.OTHER_LABEL} ({len(rest)} more)"]
+    if not changes:
+        return trace
+    # Per-cell text no longer lines up with the folded cells
+    return _copy_trace(trace, 'Heatmap', z=z, text=None, texttemplate=None, customdata=None, **changes)
+
+
+def _heatmap_shape(trace):
+    return np.shape(trace.z) if trace.z is not None and np.ndim(trace.z) == 2 else None
+
+
+def _reduce_figure(fig, measured, budget):
+    import plotly.graph_objects as go
+
+    actions = []
+    traces = list(fig.data)
+    boxes = [i for i, trace in enumerate(traces) if trace.type == 'box' and (trace.x is not None or trace.y is not None)]
+    for i in boxes:
+        traces[i] = _aggregate_box(traces[i])
+    if boxes:
+        actions.append(f"aggregated {len(boxes)} box trace(s) to quartiles")
+    scatters = [i for i, trace in enumerate(traces) if trace.type == 'scatter']
+    for i in scatters:
+        traces[i] = _copy_trace(traces[i], 'Scattergl')
+    if scatters:
+        actions.append(f"switched {len(scatters)} scatter trace(s) to WebGL")
+    fig = go.Figure(data=traces, layout=fig.layout)
+    size = figure_bytes(fig) if actions else measured
+
+    points = [i for i, trace in enumerate(fig.data) if trace.type == 'scattergl']
+    if size > budget and points:
+        most = max(_point_count(fig.data[i]) for i in points)
+        full, step = fig, 1
+        # The layout and the other trace attributes do not shrink with the
+        # points, so one step sized by the whole figure can fall short
+        while size > budget and step < most:
+            step = max(step + 1, math.ceil(step * size / budget))
+            fig = go.Figure(full)
+            for i in points:
+                _downsample(fig.data[i], step)
+            size = figure_bytes(fig)
+        actions.append(f"downsampled {len(points)} scatter trace(s) to 1 in {step} points")
+
+    folds = [i for i, trace in enumerate(fig.data) if trace.type in ('bar', 'pie') and _fold_count(trace) > 1]
+    heatmaps = [i for i, trace in enumerate(fig.data) if trace.type == 'heatmap' and _heatmap_shape(trace)]
+    if size > budget and (folds or heatmaps):
+        full, share = fig, 1.0
+        most = max([_fold_count(full.data[i]) for i in folds] + [max(_heatmap_shape(full.data[i])) for i in heatmaps])
+        # Shrink the share of bars, slices and heatmap rows and columns kept
+        # until the figure fits or one of each is left
+        while size > budget and share * most > 1:
+            share = min(share * 0.9, share * budget / size)
+            traces = list(full.data)
+            for i in folds:
+                traces[i] = _fold_points(traces[i], max(1, int(_fold_count(traces[i]) * share)))
+            for i in heatmaps:
+                rows, cols = _heatmap_shape(traces[i])
+                traces[i] = _fold_heatmap(traces[i], max(1, int(rows * share ** 0.5)), max(1, int(cols * share ** 0.5)))
+            fig = go.Figure(data=traces, layout=full.layout)
+            size = figure_bytes(fig)
+        for i in folds:
+            before, after = _fold_count(full.data[i]), _fold_count(fig.data[i])
+            if after < before:
+                label = repr(full.data[i].name) if full.data[i].name else f"#{i}"
+                actions.append(f"folded {full.data[i].type} trace {label} to its top {after - 1} of {before} "
+                               "values plus Other")
+        for i in heatmaps:
+            before, after = _heatmap_shape(full.data[i]), _heatmap_shape(fig.data[i])
+            if after != before:
+                actions.append(f"folded heatmap from {before[0]} x {before[1]} to {after[0]} x {after[1]} "
+                               f"cells including Other")
+    if size > budget:
+        actions.append("still over budget: no further reduction for these trace types")
+    return fig, size, actions
+
+
+# st.plotly_chart with payload accounting; figures over budget are reduced first
+def plotly_chart(fig, name=None, budget=None, **kwargs):
+    budget = budget or CHART_BUDGET
+    measured = sent = figure_estimate(fig)
+    exact = measured >= budget * MEASURE_SHARE
+    if exact:
+        measured = sent = figure_bytes(fig)
+    actions = []
+    if measured > budget:
+        fig, sent, actions = _reduce_figure(fig, measured, budget)
+    _record('chart', name or _figure_name(fig), measured, sent, budget, actions, exact)
+    return st.plotly_chart(fig, **kwargs)
+
+
+# ---------------------------------------------------------------- tables
+
+def _styled(frame, formats):
+    if formats is None:
+        return frame
+    if isinstance(formats, dict):
+        formats = {col: fmt for col, fmt in formats.items() if col in frame.columns}
+    return frame.style.format(formats)
+
+
+# Bytes of Streamlit's own Arrow element for data; reads private Streamlit
+# modules, so raises ImportError, AttributeError or TypeError once they move
+def _marshalled_bytes(data):
+    from streamlit.elements.arrow import marshall
+    from streamlit.proto.Arrow_pb2 import Arrow as ArrowProto
+
+    proto = ArrowProto()
+    # The Styler element id is only used for its CSS; any id sizes the same
+    marshall(proto, data, default_uuid='payload')
+    return proto.ByteSize()
+
+
+def table_bytes(data):
+    try:
+        return _marshalled_bytes(data)
+    except (ImportError, AttributeError, TypeError):
+        # Streamlit's internal marshalling moved or changed its signature
+        logger.debug("Sizing the table by its serialized Arrow stream instead of Streamlit's marshalling")
+        return _serialized_bytes(data)
+
+
+# Bytes of the Arrow IPC stream of a frame (or a Styler's frame), without the
+# formatted cells; the estimate when pyarrow is missing
+def _arrow_bytes(data):
+    frame = data.data if isinstance(data, Styler) else data
+    if data_store.pa is None:
+        return frame_estimate(frame)
+    table = data_store.pa.Table.from_pandas(frame)
+    sink = data_store.pa.BufferOutputStream()
+    with data_store.pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+
+# Serialized size of data without Streamlit's marshalling: the Arrow stream
+# of the values plus, for a Styler, its formatted cells as rendered text, as
+# Streamlit sends both
+def _serialized_bytes(data):
+    nbytes = _arrow_bytes(data)
+    if isinstance(data, Styler):
+        nbytes += len(data.to_string(delimiter='\t').encode('utf-8'))
+    return nbytes
+
+
+# Size of a table from its number of cells and category values, without
+# converting it
+def frame_estimate(frame, formats=None):
+    cells = len(frame) * (len(frame.columns) + 1)
+    if formats is not None:
+        cells *= STYLED_CELL_FACTOR
+    categories = sum(len(dtype.categories) for dtype in frame.dtypes if isinstance(dtype, pd.CategoricalDtype))
+    return ELEMENT_OVERHEAD + (cells + categories) * BYTES_PER_CELL
+
+
+# Bytes of the table st.dataframe would send: exact for small tables,
+# extrapolated from the first SAMPLE_ROWS rows otherwise
+def frame_bytes(frame, formats=None):
+    if len(frame) <= SAMPLE_ROWS:
+        return table_bytes(_styled(frame, formats))
+    sample = table_bytes(_styled(frame.iloc[:SAMPLE_ROWS], formats))
+    return int(sample * len(frame) / SAMPLE_ROWS)
+
+
+# The column_config equivalent of a Styler format string: '${:,.2f}' -> 'dollar'
+def _column_format(fmt):
+    if fmt == '${:,.2f}':
+        return 'dollar'
+    printf = fmt.replace('%', '%%')
+    # sprintf has no thousands separator
+    return re.sub(r'\{:,?([^}]*)\}', r'%\1', printf)
+
+
+def _column_config(frame, formats, column_config):
+    if isinstance(formats, str):
+        formats = {col: formats for col in frame.columns}
+    config = {col: st.column_config.NumberColumn(format=_column_format(fmt))
+              for col, fmt in formats.items()
+              if col in frame.columns and frame[col].dtype.kind in 'iuf'}
+    return {**config, **(column_config or {})}
+
+
+# Categorical columns carry their whole category list, shared with every other
+# query of the dataset; keep only the values present
+def _compact_categories(frame):
+    categorical = [col for col, dtype in frame.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    if not categorical:
+        return frame
+    return frame.assign(**{col: frame[col].cat.remove_unused_categories() for col in categorical})
+
+
+def _table_name(frame):
+    columns = ', '.join(map(str, frame.columns[:3]))
+    return f"table ({columns}{', ...' if len(frame.columns) > 3 else ''})"
+
+
+# st.dataframe of frame, formatted with the Styler format(s) in formats, with
+# payload accounting; tables over budget are reduced first
+def dataframe(frame, formats=None, name=None, budget=None, **kwargs):
+    budget = budget or TABLE_BUDGET
+    measured = sent = frame_estimate(frame, formats)
+    exact = measured >= budget * MEASURE_SHARE
+    if exact:
+        measured = sent = frame_bytes(frame, formats)
+    actions = []
+    rows = total = len(frame)
+    if sent > budget:
+        compact = _compact_categories(frame)
+        if compact is not frame:
+            frame = compact
+            sent = frame_bytes(frame, formats)
+            actions.append("dropped unused categories")
+    if sent > budget and formats is not None:
+        kwargs['column_config'] = _column_config(frame, formats, kwargs.get('column_config'))
+        formats = None
+        sent = frame_bytes(frame)
+        actions.append("moved cell formatting to the browser (column_config)")
+    if sent > budget and total > 1:
+        # The first row carries the schema and category lists; fit the other
+        # rows in what is left. Leading rows keep their positions, so row
+        # selections still index the caller's frame.
+        first = frame_bytes(_compact_categories(frame.iloc[:1]), formats)
+        per_row = max(sent - first, 1) / (total - 1)
+        rows = max(1, min(total - 1, 1 + int((budget - first) / per_row)))
+        frame = _compact_categories(frame.iloc[:rows])
+        sent = frame_bytes(frame, formats)
+        actions.append(f"truncated to the first {rows:,} of {total:,} rows")
+    if sent > budget:
+        actions.append("still over budget")
+    _record('table', name or _table_name(frame), measured, sent, budget, actions, exact)
+    event = st.dataframe(_styled(frame, formats), **kwargs)
+    if rows < total:
+        st.caption(f"Showing the first {rows:,} of {total:,} rows to keep this table within its "
+                   f"{budget / 1024:,.0f} KB payload budget.")
+    return event
+
+
+# ---------------------------------------------------------------- reports
+
+# One row per view: elements, bytes measured and sent, elements over budget
+def run_summary_frame(runs):
+    rows = []
+    for view, records in runs.items():
+        rows.append({
+            'View': view,
+            'Charts': sum(record['kind'] == 'chart' for record in records),
+            'Tables': sum(record['kind'] == 'table' for record in records),
+            'Measured KB': sum(record['measured_bytes'] for record in records) / 1024,
+            'Sent KB': sum(record['sent_bytes'] for record in records) / 1024,
+            'Over Budget': sum(bool(record['action']) for record in records),
+        })
+    return pd.DataFrame(rows)
+
+
+def element_frame(records):
+    return pd.DataFrame({
+        'Element': [record['element'] for record in records],
+        'Kind': [record['kind'] for record in records],
+        'Measured KB': [record['measured_bytes'] / 1024 for record in records],
+        'Sent KB': [record['sent_bytes'] / 1024 for record in records],
+        'Budget KB': [record['budget_bytes'] / 1024 for record in records],
+        'Action': [record['action'] for record in records],
+        'Exact': [record.get('exact', True) for record in records],
+    })
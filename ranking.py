@@ -0,0 +1,58 @@
+"""Top-K selection for charts and tables.
+
+``top_k`` picks the K rows with the largest values of a column by partial
+selection (``numpy.argpartition``): O(n) to find the candidates plus O(K log K)
+to order them, instead of sorting every group to keep ``.head(K)``. Ties and
+missing values are ordered like a stable ``sort_values(ascending=False,
+kind='stable')`` followed by ``head``: equal values keep their row order, and
+NaN rows come last. (The default, unstable sort may keep any of the rows tied
+at the cut-off; ``top_k`` always keeps the first ones.)
+
+``top_with_other`` also folds the remaining rows into a single "Other" row, so
+a chart sends at most K + 1 bars however many projects or clusters exist.
+"""
+import numpy as np
+import pandas as pd
+
+OTHER_LABEL = 'Other'
+
+
+# Positions of the k largest values, largest first
+def top_k_positions(values, k):
+    values = np.asarray(values, dtype=float)
+    if k < len(values):
+        # The k-th largest value; NaN sorts after every number
+        kth = values[np.argpartition(-values, k - 1)[k - 1]]
+        if np.isnan(kth):
+            above, tied = ~np.isnan(values), np.isnan(values)
+        else:
+            above, tied = values > kth, values == kth
+        # Rows tied with the k-th value are taken in row order, as a stable sort would
+        above = np.flatnonzero(above)
+        candidates = np.sort(np.concatenate([above, np.flatnonzero(tied)[:k - len(above)]]))
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(-values[candidates], kind='stable')]
+
+
+# A new frame of K rows, safe to add columns to without touching frame
+def top_k(frame, column, k):
+    return frame.iloc[top_k_positions(frame[column].to_numpy(dtype=float, na_value=np.nan), k)].copy()
+
+
+# The top k rows by column, then one row labelled "Other (N more)" holding the
+# sums of sum_columns over the other N rows; other columns are left empty
+def top_with_other(frame, column, k, label_column, sum_columns, other_label=OTHER_LABEL):
+    positions = top_k_positions(frame[column].to_numpy(dtype=float, na_value=np.nan), k)
+    top = frame.iloc[positions]
+    if len(frame) <= k:
+        return top.copy()
+    rest = np.ones(len(frame), dtype=bool)
+    rest[positions] = False
+    tail = frame.iloc[rest]
+    other = {label_column: f"{other_label} ({len(tail)} more)"}
+    other.update({col: tail[col].sum() for col in sum_columns})
+    if isinstance(top[label_column].dtype, pd.CategoricalDtype):
+        # Keep the label column plain text so the Other label is a valid value
+        top = top.astype({label_column: str})
+    return pd.concat([top, pd.DataFrame([other])], ignore_index=True)
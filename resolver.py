@@ -0,0 +1,135 @@
+"""Re-solve rightsizing recommendations against a machine price table.
+
+Given each row's predicted CPU and memory peak, headroom on both, and a price
+table of candidate machine types (``machine_type``, ``hourly_rate``), pick the
+cheapest machine type whose vCPUs and memory (from the catalog, see
+catalog.py) cover the peak plus headroom.
+
+``Resolver`` prepares the table (with its specs, see ``with_specs``) once. Its machines are ranked by price and
+placed on a grid of their distinct vCPU and memory levels, both sorted; a
+suffix minimum over the grid leaves in every cell the cheapest machine with at
+least that many vCPUs and at least that much memory. Every row is then two
+binary searches (``numpy.searchsorted``), one per level axis, and a lookup in
+the grid, for all rows at once.
+
+The default price table holds the machine types the results file already
+uses with their hourly rates as reported there.
+"""
+import numpy as np
+import pandas as pd
+
+import catalog
+
+HOURS_PER_MONTH = 730
+
+PREDICTED_CPU = 'predicted_cpu'
+PREDICTED_MEMORY = 'predicted_mem_gb'
+
+
+# Machine types and hourly rates a results frame reports, one row per type
+# (median rate), with their specs
+def observed_prices(frame):
+    rates = pd.concat([
+        pd.DataFrame({'machine_type': frame[f'{side}_machine_type'].astype(object),
+                      'hourly_rate': frame[f'{side}_machine_hourly_rate']})
+        for side in ('current', 'target')
+    ]).dropna()
+    prices = rates.groupby('machine_type')['hourly_rate'].median().reset_index()
+    return with_specs(prices)
+
+
+# A price table with the family, vCPUs and memory of its machine types
+def with_specs(prices):
+    specs = pd.DataFrame([catalog.parse(machine_type) for machine_type in prices['machine_type']],
+                         columns=catalog.SPEC_COLUMNS, index=prices.index)
+    return pd.concat([prices[['machine_type', 'hourly_rate']], specs], axis=1)
+
+
+class Resolver:
+    def __init__(self, prices):
+        known = prices[['hourly_rate', 'vcpus', 'memory_gb']].notna().all(axis=1)
+        # Machine types missing from the catalog or without a rate cannot be placed
+        self.skipped = prices.loc[~known, 'machine_type'].tolist()
+        # Cheapest first; equal prices go to the smaller machine
+        self.machines = prices[known].sort_values(['hourly_rate', 'vcpus', 'memory_gb'], ignore_index=True)
+
+        self.vcpu_levels = np.unique(self.machines['vcpus'].to_numpy())
+        self.memory_levels = np.unique(self.machines['memory_gb'].to_numpy())
+        count = len(self.machines)
+        # Cheapest machine rank per (vCPU level, memory level); count means none.
+        # The extra last row and column stand for peaks above every level.
+        grid = np.full((len(self.vcpu_levels) + 1, len(self.memory_levels) + 1), count, dtype=np.int64)
+        rows = np.searchsorted(self.vcpu_levels, self.machines['vcpus'].to_numpy())
+        columns = np.searchsorted(self.memory_levels, self.machines['memory_gb'].to_numpy())
+        np.minimum.at(grid, (rows, columns), np.arange(count))
+        # Suffix minimum: at least this many vCPUs and at least this much memory
+        grid = np.minimum.accumulate(grid[::-1], axis=0)[::-1]
+        self.grid = np.minimum.accumulate(grid[:, ::-1], axis=1)[:, ::-1]
+
+    # Position in machines of the cheapest machine with at least vcpus and
+    # memory_gb (arrays), or -1 when none is large enough
+    def cheapest(self, vcpus, memory_gb):
+        rows = np.searchsorted(self.vcpu_levels, vcpus, side='left')
+        columns = np.searchsorted(self.memory_levels, memory_gb, side='left')
+        ranks = self.grid[rows, columns]
+        return np.where(ranks < len(self.machines), ranks, -1)
+
+
+# Every row of frame re-solved: its predicted peak plus headroom (fractions)
+# and the cheapest fitting machine type of resolver, at the row's billed
+# hours. Rows without a prediction or a fitting machine keep their target;
+# without any candidate machine no row is re-solved (missing machine and cost).
+def resolve(frame, resolver, cpu_headroom=0.0, memory_headroom=0.0, resource_column=None):
+    cpu = frame[PREDICTED_CPU].to_numpy(dtype=float) * (1 + cpu_headroom)
+    memory = frame[PREDICTED_MEMORY].to_numpy(dtype=float) * (1 + memory_headroom)
+    chosen = resolver.cheapest(cpu, memory)
+    fits = (chosen >= 0) & ~np.isnan(cpu) & ~np.isnan(memory)
+
+    current_rate = frame['current_machine_hourly_rate'].to_numpy(dtype=float)
+    current_cost = frame['current_cost'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hours = np.where(current_rate > 0, current_cost / current_rate, HOURS_PER_MONTH)
+
+    machines = resolver.machines
+    target_types = frame['target_machine_type'].astype(object).to_numpy()
+    target_cost = frame['target_cost'].to_numpy(dtype=float)
+    if len(machines):
+        picked = np.maximum(chosen, 0)
+        resolved_types = np.where(fits, machines['machine_type'].to_numpy(dtype=object)[picked], target_types)
+        resolved_cost = np.where(fits, machines['hourly_rate'].to_numpy()[picked] * hours, target_cost)
+    else:
+        resolved_types = np.full(len(frame), None, dtype=object)
+        resolved_cost = np.full(len(frame), np.nan)
+    identity = [resource_column] if resource_column else []
+    result = pd.DataFrame({
+        **{col: frame[col].array for col in identity + ['project_id']},
+        'current_machine_type': frame['current_machine_type'].astype(object).to_numpy(),
+        'target_machine_type': target_types,
+        'resolved_machine_type': resolved_types,
+        'required_vcpus': cpu,
+        'required_memory_gb': memory,
+        'current_cost': current_cost,
+        'target_cost': target_cost,
+        'resolved_cost': resolved_cost,
+    }, index=frame.index)
+    result['resolved_savings'] = result['current_cost'] - result['resolved_cost']
+    result['fits'] = fits
+    return result
+
+
+# Totals of a re-solved frame against the current cost and the results file's targets
+def summary(resolved):
+    changed = resolved['resolved_machine_type'] != resolved['target_machine_type']
+    current, target = resolved['current_cost'].sum(), resolved['target_cost'].sum()
+    # Missing when nothing was re-solved
+    cost = resolved['resolved_cost'].sum(min_count=1)
+    return {
+        'rows': len(resolved),
+        'changed': int(changed.sum()),
+        'unfit': int((~resolved['fits']).sum()),
+        'current_cost': current,
+        'target_cost': target,
+        'resolved_cost': cost,
+        'resolved_savings': current - cost,
+        'savings_vs_target': target - cost,
+    }
@@ -0,0 +1,95 @@
+"""Run-over-run comparison of a service's recommendations.
+
+A rightsizing run is identified by the day of its rows' ``created_at``; the
+snapshot of a run holds the latest row of every (project_id, resource) that
+day. Comparing two snapshots joins them on that pair: every fact row carries
+it precomputed as one integer (see ``FactTable.resource_keys``), the earlier
+snapshot's keys are loaded into a hash table (``pandas.Index``) and the later
+snapshot's keys are looked up in it, one probe per resource. Each resource
+then falls in one of ``CHANGES``.
+"""
+import numpy as np
+import pandas as pd
+
+import bitmaps
+
+NEW = 'New'
+RESOLVED = 'Resolved'
+TARGET_CHANGED = 'Target changed'
+SAVINGS_CHANGED = 'Savings changed'
+UNCHANGED = 'Unchanged'
+
+CHANGES = [NEW, RESOLVED, TARGET_CHANGED, SAVINGS_CHANGED, UNCHANGED]
+
+# Savings moving by less than this (USD) are unchanged
+SAVINGS_TOLERANCE = 0.01
+
+# Dimension columns of a comparison, from the later run when the resource is in it
+DIMENSIONS = ['project_id', 'resource', 'region', 'current_machine_type', 'target_machine_type']
+
+
+# Values of a column at positions, missing where the position is -1
+def _take(column, positions):
+    present = positions >= 0
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes = np.where(present, column.cat.codes.to_numpy()[np.maximum(positions, 0)], -1)
+        return pd.Categorical.from_codes(codes, dtype=column.dtype)
+    values = column.to_numpy(dtype=float)
+    return np.where(present, values[np.maximum(positions, 0)], np.nan)
+
+
+# One row per resource of either snapshot (frame positions, one row per key)
+# with its target machine type and savings in both and its change
+def diff(frame, keys, before, after):
+    matched = pd.Index(keys[before]).get_indexer(keys[after])
+    found = matched >= 0
+    resolved = np.ones(len(before), dtype=bool)
+    resolved[matched[found]] = False
+    resolved = before[resolved]
+
+    before_rows = np.concatenate([np.where(found, before[np.maximum(matched, 0)], -1), resolved])
+    after_rows = np.concatenate([after, np.full(len(resolved), -1)])
+    latest_rows = np.concatenate([after, resolved])
+
+    result = pd.DataFrame({col: _take(frame[col], latest_rows) for col in DIMENSIONS})
+    result['target_before'] = _take(frame['target_machine_type'], before_rows)
+    result['target_after'] = _take(frame['target_machine_type'], after_rows)
+    result['savings_before'] = _take(frame['savings'], before_rows)
+    result['savings_after'] = _take(frame['savings'], after_rows)
+    result['savings_delta'] = np.nan_to_num(result['savings_after']) - np.nan_to_num(result['savings_before'])
+
+    # Both sides share the column's categories
+    target_moved = result['target_before'].cat.codes.to_numpy() != result['target_after'].cat.codes.to_numpy()
+    change = np.select(
+        [before_rows < 0, after_rows < 0, target_moved, np.abs(result['savings_delta']) >= SAVINGS_TOLERANCE],
+        [NEW, RESOLVED, TARGET_CHANGED, SAVINGS_CHANGED],
+        UNCHANGED,
+    )
+    result['change'] = pd.Categorical(change, categories=CHANGES)
+    # Grouped by change, largest savings moves first
+    order = np.lexsort((-np.abs(result['savings_delta'].to_numpy()), result['change'].cat.codes.to_numpy()))
+    return result.iloc[order].reset_index(drop=True)
+
+
+# Resources of a comparison matching {column: value or values} on DIMENSIONS;
+# selections of other columns do not apply to a comparison
+def select(comparison, selections):
+    mask = None
+    for col, selection in (selections or {}).items():
+        values = bitmaps.selected_values(selection)
+        if col not in DIMENSIONS or values is None:
+            continue
+        matches = comparison[col].isin(values).to_numpy()
+        mask = matches if mask is None else mask & matches
+    return comparison if mask is None else comparison[mask]
+
+
+# Resources and savings moved per change, in CHANGES order
+def summary(comparison):
+    grouped = comparison.groupby('change', observed=False)
+    return pd.DataFrame({
+        'resources': grouped.size(),
+        'savings_before': grouped['savings_before'].sum(),
+        'savings_after': grouped['savings_after'].sum(),
+        'savings_delta': grouped['savings_delta'].sum(),
+    })
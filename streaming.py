@@ -0,0 +1,135 @@
+"""Out-of-core aggregation for results files larger than memory.
+
+A results CSV is read in chunks (never the ``justification`` column) and every
+chunk is folded into a ``PartialAggregate``: a cube keyed by the dashboard's
+filter dimensions holding sums, row counts and max savings, plus the top-k rows
+by savings of every value of each single dimension. Partials are mergeable, so
+chunks (or whole files) can be folded in any order. Because the cube is keyed
+by the filter dimensions, filtering and grouping by any of them is exact.
+
+The kept top rows grow with the number of distinct values per dimension, not
+with the number of cube cells (their product), so they stay small however the
+dimensions combine. The top-k of the whole file, and of any selection within
+one dimension, is exact; a selection across several dimensions draws from the
+kept rows and may show fewer than k (see ``exact_top``).
+"""
+import numpy as np
+import pandas as pd
+
+import bitmaps
+
+DIMENSIONS = ['project_id', 'region', 'current_machine_type', 'target_machine_type']
+SUM_COLUMNS = ['current_cost', 'target_cost', 'savings', 'node_count']
+MEAN_COLUMNS = ['current_machine_hourly_rate', 'target_machine_hourly_rate']
+DEFAULT_CHUNKSIZE = 100_000
+DEFAULT_TOP_K = 20
+
+
+class PartialAggregate:
+    def __init__(self, resource_column, sum_columns, mean_columns, top_k=DEFAULT_TOP_K):
+        self.resource_column = resource_column
+        self.sum_columns = list(sum_columns)
+        self.mean_columns = list(mean_columns)
+        self.top_k = top_k
+        self.rows = 0
+        self.cube = None
+        self.top = None
+
+    @property
+    def additive_columns(self):
+        # Means are carried as a sum and a non-null count so they stay mergeable
+        return (self.sum_columns + self.mean_columns
+                + [f"{col}_n" for col in self.mean_columns] + ['rows'])
+
+    def fold(self, chunk):
+        grouped = chunk.groupby(DIMENSIONS, dropna=False, observed=True, sort=False)
+        part = grouped[self.sum_columns + self.mean_columns].sum()
+        for col in self.mean_columns:
+            part[f"{col}_n"] = grouped[col].count()
+        part['rows'] = grouped.size()
+        part['max_savings'] = grouped['savings'].max()
+        self._combine(part, self._top_rows(chunk), len(chunk))
+        return self
+
+    def merge(self, other):
+        self._combine(other.cube, other.top, other.rows)
+        return self
+
+    def _combine(self, cube, top, rows):
+        self.rows += rows
+        if cube is None:
+            return
+        if self.cube is None:
+            self.cube, self.top = cube, top
+            return
+        both = pd.concat([self.cube, cube])
+        grouped = both.groupby(level=DIMENSIONS, dropna=False, sort=False)
+        merged = grouped[self.additive_columns].sum()
+        merged['max_savings'] = grouped['max_savings'].max()
+        self.cube = merged
+        self.top = self._top_rows(pd.concat([self.top, top], ignore_index=True))
+
+    # The top_k rows by savings of every value of each dimension
+    def _top_rows(self, frame):
+        ranked = frame.sort_values('savings', ascending=False, kind='stable')
+        keep = np.zeros(len(ranked), dtype=bool)
+        for dimension in DIMENSIONS:
+            keep |= ranked.groupby(dimension, dropna=False, sort=False).cumcount().to_numpy() < self.top_k
+        return ranked[keep]
+
+    # Rows per value of dimension within the cells matching the other dimensions' selections
+    def option_counts(self, dimension, selections):
+        cube, _ = self.select({other: value for other, value in selections.items() if other != dimension})
+        counts = cube.groupby(level=dimension)['rows'].sum()
+        return counts[counts > 0]
+
+    # Restrict cube and top rows to the cells matching {dimension: value or values};
+    # 'All' or an empty selection keeps every value
+    def select(self, selections):
+        cube_mask = pd.Series(True, index=self.cube.index)
+        top_mask = pd.Series(True, index=self.top.index)
+        for dimension, selection in selections.items():
+            values = bitmaps.selected_values(selection)
+            if values is not None:
+                cube_mask &= self.cube.index.get_level_values(dimension).isin(values)
+                top_mask &= self.top[dimension].isin(values)
+        return self.cube[cube_mask.to_numpy()], self.top[top_mask.to_numpy()]
+
+    def kpis(self, cube):
+        totals = cube[self.additive_columns].sum()
+        result = {col: totals[col] for col in self.sum_columns}
+        for col in self.mean_columns:
+            result[f"avg_{col}"] = totals[col] / totals[f"{col}_n"] if totals[f"{col}_n"] else 0
+        result['rows'] = int(totals['rows'])
+        result['projects'] = cube.index.get_level_values('project_id').nunique()
+        result['max_savings'] = cube['max_savings'].max() if len(cube) else 0
+        return result
+
+    def summarize(self, cube, dimension):
+        summary = cube.groupby(level=dimension, dropna=False)[self.additive_columns].sum()
+        for col in self.mean_columns:
+            summary[col] = summary[col] / summary[f"{col}_n"]
+        summary = summary.drop(columns=[f"{col}_n" for col in self.mean_columns])
+        summary['projects'] = cube.reset_index().groupby(dimension, dropna=False)['project_id'].nunique()
+        return summary.reset_index()
+
+    def top_resources(self, top, n=DEFAULT_TOP_K):
+        return top.nlargest(n, 'savings')
+
+    # Whether the top rows of selections are exact: values of at most one dimension selected
+    @staticmethod
+    def exact_top(selections):
+        return sum(bitmaps.selected_values(selection) is not None for selection in selections.values()) <= 1
+
+
+def aggregate_csv(path, resource_column, chunksize=DEFAULT_CHUNKSIZE, top_k=DEFAULT_TOP_K):
+    header = pd.read_csv(path, nrows=0).columns
+    sum_columns = [col for col in SUM_COLUMNS if col in header]
+    mean_columns = [col for col in MEAN_COLUMNS if col in header]
+    usecols = DIMENSIONS + [resource_column] + sum_columns + mean_columns
+    dtypes = {col: str for col in DIMENSIONS + [resource_column]}
+
+    partial = PartialAggregate(resource_column, sum_columns, mean_columns, top_k)
+    for chunk in pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=chunksize):
+        partial.fold(chunk)
+    return partial
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+import anomalies
+
+
+# Projects of one service whose actual cost is within ~10% of their estimate
+def peers(rows=60, seed=0):
+    rng = np.random.default_rng(seed)
+    actual = np.exp(rng.normal(6, 0.3, rows))
+    return pd.DataFrame({
+        'service': 'CloudSQL',
+        'actual': actual,
+        'estimated': actual * rng.uniform(0.9, 1.1, rows),
+    }, index=pd.Index([f'p-{i}' for i in range(rows)], name='project_id'))
+
+
+def test_robust_z_flags_a_planted_outlier():
+    rows = peers()
+    rows.loc['p-7', 'actual'] *= 10
+    scored = anomalies.CostAnomalies().update(rows, 'v1')
+    flagged = anomalies.flagged(scored)
+
+    assert flagged.index[0] == 'p-7'
+    assert flagged.loc['p-7', 'reason'] == 'Actual vs Estimated and service peers'
+    assert flagged.loc['p-7', 'z_ratio'] > anomalies.Z_THRESHOLD
+    # Peers that agree with their estimates are not flagged on the z-scores
+    others = scored.drop(index='p-7')
+    assert (others[['z_ratio', 'z_peer']].abs() <= anomalies.Z_THRESHOLD).all().all()
+
+
+# 20% over its estimate and twice the typical cost: neither z-score exceeds
+# the threshold, but the forest isolates the combination
+def test_isolation_forest_flags_a_planted_outlier():
+    rows = peers()
+    rows.loc['p-7', ['actual', 'estimated']] = [np.exp(6) * 2.2, np.exp(6) * 2.2 / 1.2]
+    scored = anomalies.CostAnomalies().update(rows, 'v1')
+
+    assert (scored.loc['p-7', ['z_ratio', 'z_peer']].abs() < anomalies.Z_THRESHOLD).all()
+    assert scored.loc['p-7', 'reason'] == 'Isolated by the forest'
+    assert scored['anomaly_score'].idxmax() == 'p-7'
+
+
+def test_few_rows_are_scored_on_robust_z_only():
+    rows = peers(rows=anomalies.MIN_FOREST_ROWS - 1)
+    rows.loc['p-7', 'actual'] *= 10
+    model = anomalies.CostAnomalies()
+    scored = model.update(rows, 'v1')
+
+    assert model.forest is None
+    assert list(anomalies.flagged(scored).index) == ['p-7']
+
+
+def test_update_rescores_changed_rows_only():
+    rows = peers()
+    model = anomalies.CostAnomalies()
+    first = model.update(rows, 'v1')
+    changed = rows.copy()
+    changed.loc['p-3', 'actual'] *= 10
+    second = model.update(changed, 'v2')
+
+    assert model.fitted_rows == 60
+    assert second.loc['p-3', 'flagged']
+    pd.testing.assert_frame_equal(second.drop(index='p-3'), first.drop(index='p-3'))
+    assert model.update(changed, 'v2') is second
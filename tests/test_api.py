@@ -0,0 +1,102 @@
+import json
+
+import pandas as pd
+
+import api
+import facts
+
+
+# Two runs of the same two instances; the later one halves db-a's savings
+def cloudsql_frame():
+    return pd.DataFrame({
+        'project_id': ['p-1', 'p-2'] * 2,
+        'region': ['europe-west3', 'us-east1'] * 2,
+        'resource_name': ['db-a', 'db-b'] * 2,
+        'current_machine_type': ['db-custom-2-7680'] * 4,
+        'target_machine_type': ['db-custom-1-3840'] * 4,
+        'current_cost': [100.0, 80.0, 100.0, 80.0],
+        'target_cost': [60.0, 50.0, 80.0, 50.0],
+        'savings': [40.0, 30.0, 20.0, 30.0],
+        'created_at': ['2026-01-01 09:00:00'] * 2 + ['2026-01-05 09:00:00'] * 2,
+    })
+
+
+def fact_table():
+    return facts.FactTable.build({'cloudsql': cloudsql_frame()})
+
+
+def get(dashboard_api, path, query=(), if_none_match=None):
+    status, etag, body = dashboard_api.respond(path, tuple(sorted(query)), if_none_match)
+    return status, etag, json.loads(body) if body is not None else None
+
+
+def test_index_and_dataset_payloads():
+    table = fact_table()
+    dashboard_api = api.DashboardAPI(lambda: table)
+
+    status, etag, index = get(dashboard_api, '/api')
+    assert status == 200 and etag
+    assert index['datasets'] == {'cloudsql': '/api/cloudsql'}
+    assert index['superseded_rows'] == 2
+
+    status, _, payload = get(dashboard_api, '/api/cloudsql', [('region', 'europe-west3')])
+    assert status == 200
+    assert payload['filters'] == {'region': 'europe-west3'}
+    assert payload['kpis']['rows'] == 1
+    assert payload['kpis']['savings'] == 20.0
+
+
+# Superseded rows are left out by default; ?latest=0 counts them too
+def test_latest_by_default_and_latest_off():
+    table = fact_table()
+    dashboard_api = api.DashboardAPI(lambda: table)
+
+    _, _, latest = get(dashboard_api, '/api/cloudsql')
+    _, _, every_run = get(dashboard_api, '/api/cloudsql', [('latest', '0')])
+    assert latest['kpis']['savings'] == 50.0
+    assert every_run['kpis']['savings'] == 120.0
+
+    _, _, overview = get(dashboard_api, '/api/overview', [('project_id', 'p-1'), ('project_id', 'p-2')])
+    assert overview['kpis']['savings'] == 50.0
+
+
+def test_if_none_match():
+    table = fact_table()
+    dashboard_api = api.DashboardAPI(lambda: table)
+    _, etag, _ = get(dashboard_api, '/api/overview')
+
+    assert get(dashboard_api, '/api/overview', if_none_match=etag) == (304, etag, None)
+    assert get(dashboard_api, '/api/overview', if_none_match=f'"stale", {etag}')[0] == 304
+    assert get(dashboard_api, '/api/overview', if_none_match='*')[0] == 304
+    assert get(dashboard_api, '/api/overview', if_none_match='"stale"')[0] == 200
+    # The same tag does not match another request
+    assert get(dashboard_api, '/api/cloudsql', if_none_match=etag)[0] == 200
+
+
+def test_unknown_filter_and_path():
+    table = fact_table()
+    dashboard_api = api.DashboardAPI(lambda: table)
+
+    status, etag, error = get(dashboard_api, '/api/cloudsql', [('zone', 'a')])
+    assert (status, etag) == (400, None)
+    assert 'zone' in error['error']
+    status, etag, error = get(dashboard_api, '/api/overview', [('region', 'us-east1')])
+    assert (status, etag) == (400, None)
+    status, etag, error = get(dashboard_api, '/api/dataflow')
+    assert (status, etag) == (404, None)
+    assert get(dashboard_api, '/metrics')[0] == 404
+
+
+# A new table version changes the ETag, so a poller's old tag stops matching
+def test_etag_changes_with_the_version():
+    tables = [fact_table()]
+    dashboard_api = api.DashboardAPI(lambda: tables[-1])
+    _, etag, before = get(dashboard_api, '/api/cloudsql')
+
+    tables.append(fact_table())
+    tables[-1].version = 'next-version'
+    status, new_etag, after = get(dashboard_api, '/api/cloudsql', if_none_match=etag)
+    assert status == 200
+    assert new_etag != etag
+    assert (before['version'], after['version']) == (tables[0].version, 'next-version')
+    assert get(dashboard_api, '/api/cloudsql', if_none_match=new_etag)[0] == 304
@@ -0,0 +1,62 @@
+import datetime
+import os
+
+import pandas as pd
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import data_store
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+TABS = {
+    'cloudsql': '🗄️ CloudSQL Cost Optimization',
+    'dataflow': '📊 DataFlow Cost Optimization',
+    'kubernetes': '☸️ Kubernetes Cost Optimization',
+}
+
+EARLIER_RUN = '2026-01-01 09:00:00'
+LATER_RUN = '2026-01-05 09:00:00'
+
+
+# The repository's results files, each reported by two runs four days apart
+@pytest.fixture
+def two_runs(tmp_path, monkeypatch):
+    for name, file_name in data_store.DATASETS.items():
+        frame = pd.read_csv(os.path.join(data_store.DATA_DIR, file_name))
+        if name in data_store.RESOURCE_COLUMNS:
+            frame = pd.concat([frame.assign(created_at=EARLIER_RUN), frame.assign(created_at=LATER_RUN)])
+        frame.to_csv(tmp_path / file_name, index=False)
+    monkeypatch.setattr(data_store, 'DATA_DIR', str(tmp_path))
+    st.cache_resource.clear()
+    yield tmp_path
+    st.cache_resource.clear()
+
+
+def open_tab(at, dataset, first, last):
+    at.radio(key='service_selector').set_value(TABS[dataset]).run()
+    at.date_input(key=f'{dataset}_created').set_value((first, last)).run()
+    return at
+
+
+def test_service_tabs_with_no_rows_in_range(two_runs):
+    at = AppTest.from_file(APP, default_timeout=120).run()
+    for dataset in TABS:
+        open_tab(at, dataset, datetime.date(2026, 1, 2), datetime.date(2026, 1, 3))
+
+        assert not at.exception
+        assert "No recommendations match the selected filters" in [info.value for info in at.info]
+
+
+# A range covering only the earlier run shows that run, every resource once
+def test_latest_rows_of_an_earlier_run(two_runs):
+    at = AppTest.from_file(APP, default_timeout=120).run()
+    for dataset in TABS:
+        savings = pd.read_csv(two_runs / data_store.DATASETS[dataset])['savings'].sum() / 2
+        open_tab(at, dataset, datetime.date(2026, 1, 1), datetime.date(2026, 1, 2))
+
+        assert not at.exception
+        assert [metric.value for metric in at.metric if metric.label == 'Total Savings (Monthly)'] == [f"${savings:,.2f}"]
+        assert "0 row(s) superseded by a later run in the selected range hidden." in [
+            caption.value for caption in at.sidebar.caption]
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+import bitmaps
+
+SELECTIONS = {'region': ('europe-west1', 'us-central1'), 'project_id': ('p-2', 'p-4', 'p-9')}
+
+
+def dimension_frame(rows=300):
+    rng = np.random.default_rng(0)
+    region = rng.choice(['europe-west1', 'europe-west3', 'us-central1'], rows).astype(object)
+    region[::17] = None
+    return pd.DataFrame({
+        'region': pd.Categorical(region),
+        'project_id': pd.Categorical(rng.choice(['p-1', 'p-2', 'p-3', 'p-4'], rows)),
+    })
+
+
+def pandas_mask(frame, selections):
+    mask = np.ones(len(frame), dtype=bool)
+    for column, values in selections.items():
+        mask &= frame[column].isin(values).to_numpy()
+    return mask
+
+
+# OR within a column, AND across columns; a slice may start and stop inside a word
+def test_select_matches_pandas_mask():
+    frame = dimension_frame()
+    index = bitmaps.BitmapIndex(frame, ['region', 'project_id'])
+    expected = pandas_mask(frame, SELECTIONS)
+
+    assert (index.select(SELECTIONS) == expected).all()
+    assert (index.select(SELECTIONS, 70, 250) == expected[70:250]).all()
+    assert (index.select({'region': ('europe-west3',)}) == pandas_mask(frame, {'region': ('europe-west3',)})).all()
+    assert index.select({}, 70, 250).all()
+
+
+def test_selected_values():
+    assert bitmaps.selected_values(None) is None
+    assert bitmaps.selected_values(bitmaps.ALL) is None
+    assert bitmaps.selected_values(()) is None
+    assert bitmaps.selected_values('p-1') == ('p-1',)
+    assert bitmaps.selected_values(['p-1', 'p-2']) == ('p-1', 'p-2')
+
+
+def pandas_counts(frame, column, selections, rows):
+    others = {other: values for other, values in selections.items() if other != column}
+    subset = frame.iloc[rows]
+    matched = subset[pandas_mask(subset, others)]
+    return matched[column].value_counts(sort=False).reindex(frame[column].cat.categories, fill_value=0)
+
+
+# Counts of each value under the other columns' selections, in a slice or a
+# subset of its rows; a column's own selection does not narrow its counts
+def test_counts_match_pandas_value_counts():
+    frame = dimension_frame()
+    index = bitmaps.BitmapIndex(frame, ['region', 'project_id'])
+    subset = np.flatnonzero(np.arange(300) % 3 == 1)
+    subset = subset[(subset >= 70) & (subset < 250)]
+
+    for column in ('region', 'project_id'):
+        for selections in (SELECTIONS, {'region': ('europe-west3',)}, {}):
+            expected = pandas_counts(frame, column, selections, np.arange(300))
+            assert index.counts(column, selections).tolist() == expected.tolist()
+            expected = pandas_counts(frame, column, selections, np.arange(70, 250))
+            assert index.counts(column, selections, 70, 250).tolist() == expected.tolist()
+            expected = pandas_counts(frame, column, selections, subset)
+            assert index.counts(column, selections, 70, 250, subset).tolist() == expected.tolist()
+
+
+def test_counts_of_empty_selections():
+    frame = dimension_frame()
+    index = bitmaps.BitmapIndex(frame, ['region', 'project_id'])
+    categories = list(frame['project_id'].cat.categories)
+
+    # Values missing from the column match no rows
+    assert index.counts('project_id', {'region': ('asia-south1',)}).tolist() == [0] * len(categories)
+    # No rows in the slice or the subset
+    assert index.counts('project_id', SELECTIONS, 120, 120).tolist() == [0] * len(categories)
+    assert index.counts('project_id', SELECTIONS, 70, 250, []).tolist() == [0] * len(categories)
+    assert list(index.counts('project_id', {}).index) == categories
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import catalog
+
+
+@pytest.mark.parametrize('machine_type, spec', [
+    ('n2-custom-4-16384', ('n2', 4.0, 16.0)),
+    ('n2-custom-4-16384-ext', ('n2', 4.0, 16.0)),
+    # Compute Engine custom types without a series are N1
+    ('custom-2-7680', ('n1', 2.0, 7.5)),
+    ('db-custom-2-3840', ('db-custom', 2.0, 3.75)),
+    ('db-custom-n4-16-65536', ('n4', 16.0, 64.0)),
+    ('db-perf-optimized-n-8', ('db-perf-optimized', 8.0, 64.0)),
+    ('n1-standard-4', ('n1', 4.0, 15.0)),
+    ('e2-medium', ('e2', 1.0, 4.0)),
+    ('db-f1-micro', ('f1', 0.2, 0.6)),
+])
+def test_parse_machine_type(machine_type, spec):
+    assert catalog.parse(machine_type) == spec
+
+
+def test_parse_unknown_machine_type():
+    family, vcpus, memory_gb = catalog.parse('mystery-type')
+
+    assert family is None
+    assert np.isnan(vcpus) and np.isnan(memory_gb)
+    # A known series with an unknown kind keeps its vCPUs
+    assert catalog.parse('n1-ultramem-40')[:2] == ('n1', 40.0)
+    assert np.isnan(catalog.parse('n1-ultramem-40')[2])
+
+
+def test_specs_of_a_machine_type_column():
+    column = pd.Series(['db-custom-2-3840', None, 'mystery-type', 'db-custom-n4-16-65536'], index=[5, 6, 7, 8])
+    specs = catalog.specs(column, 'current_')
+
+    assert list(specs.columns) == ['current_family', 'current_vcpus', 'current_memory_gb']
+    assert list(specs.index) == [5, 6, 7, 8]
+    assert specs['current_family'].tolist()[::3] == ['db-custom', 'n4']
+    assert specs['current_family'].iloc[1:3].isna().all()
+    assert specs['current_vcpus'].tolist()[::3] == [2.0, 16.0]
+    assert specs['current_memory_gb'].iloc[1:3].isna().all()
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+import clusters
+
+
+def workloads(rows, seed):
+    rng = np.random.default_rng(seed)
+    cost = np.exp(rng.normal(5, 1.5, rows))
+    return pd.DataFrame({
+        'current_cost': cost,
+        'savings': cost * rng.uniform(0, 0.5, rows),
+        'current_machine_hourly_rate': cost / 730,
+        'node_count': rng.integers(1, 10, rows),
+    })
+
+
+def test_update_trains_on_appended_rows_only():
+    model = clusters.WorkloadClusters()
+    first = workloads(200, 0)
+    labels, centers = model.update(first, 'v1')
+    trained, steps = model.model, model.model.n_steps_
+
+    assert len(labels) == 200 and len(centers) == clusters.DEFAULT_CLUSTERS
+    grown = pd.concat([first, workloads(100, 1)], ignore_index=True)
+    labels, _ = model.update(grown, 'v2')
+    assert model.model is trained
+    assert model.rows_seen == 300
+    # One batch of the 100 appended rows
+    assert trained.n_steps_ == steps + 1
+    assert len(labels) == 300 and labels.notna().all()
+    model.update(grown, 'v2')
+    assert trained.n_steps_ == steps + 1
+
+
+def test_update_refits_rewritten_rows():
+    model = clusters.WorkloadClusters()
+    model.update(workloads(200, 0), 'v1')
+    trained = model.model
+
+    # Rewritten with the same number of rows
+    model.update(workloads(200, 2), 'v2')
+    assert model.model is not trained
+    assert model.rows_seen == 200
+    refit = model.model
+    # Rewritten with fewer rows
+    labels, _ = model.update(workloads(150, 3), 'v3')
+    assert model.model is not refit
+    assert model.rows_seen == 150 and len(labels) == 150
+    # A new version of the same rows trains nothing
+    steps = model.model.n_steps_
+    model.update(workloads(150, 3), 'v4')
+    assert model.model.n_steps_ == steps
@@ -0,0 +1,132 @@
+import os
+
+import pandas as pd
+import pytest
+
+import data_store
+
+CLOUDSQL = pd.DataFrame({
+    'project_id': ['p-1', 'p-2', 'p-1', 'p-3'],
+    'region': ['europe-west3', 'us-east1', 'us-east1', 'europe-west3'],
+    'resource_name': ['db-a', 'db-b', 'db-c', 'db-d'],
+    'current_machine_type': ['db-custom-2-7680', 'db-custom-4-15360', 'db-custom-2-7680', 'db-custom-4-15360'],
+    'target_machine_type': ['db-custom-1-3840', 'db-custom-2-7680', 'db-custom-1-3840', 'db-custom-2-7680'],
+    'current_cost': [100.0, 80.0, 60.0, 40.0],
+    'target_cost': [60.0, 50.0, 30.0, 35.0],
+    'savings': [40.0, 30.0, 30.0, 5.0],
+    'justification': ['a', 'b', 'c', 'd'],
+    'created_at': ['2026-01-01 09:00:00'] * 4,
+})
+
+# Other projects and regions, one shared with CloudSQL
+KUBERNETES = pd.DataFrame({
+    'project_id': ['p-9', 'p-2', 'p-9'],
+    'region': ['asia-south1', 'us-east1', 'asia-south1'],
+    'cluster_name': ['k-a', 'k-b', 'k-c'],
+    'current_machine_type': ['n1-standard-4', 'n2-standard-2', 'n1-standard-4'],
+    'target_machine_type': ['n2-standard-2', 'e2-standard-2', 'e2-standard-2'],
+    'current_cost': [300.0, 200.0, 100.0],
+    'target_cost': [200.0, 150.0, 90.0],
+    'savings': [100.0, 50.0, 10.0],
+    'node_count': [3, 2, 1],
+    'justification': ['x', 'y', 'z'],
+})
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    CLOUDSQL.to_csv(tmp_path / data_store.DATASETS['cloudsql'], index=False)
+    KUBERNETES.to_csv(tmp_path / data_store.DATASETS['kubernetes'], index=False)
+    monkeypatch.setattr(data_store, 'DATA_DIR', str(tmp_path))
+    return tmp_path
+
+
+# The CSV as plain object-dtype columns, as read before dictionary encoding
+def plain_csv(name):
+    return pd.read_csv(data_store.csv_path(name)).drop(columns=data_store.JUSTIFICATION_COLUMN)
+
+
+def test_shared_dictionaries_give_the_same_results_as_object_columns(data_dir):
+    encoded = {name: data_store.read_csv_dataset(name) for name in ('cloudsql', 'kubernetes')}
+    shared = data_store.share_dictionaries(encoded)
+
+    for name, df in shared.items():
+        plain = plain_csv(name)
+        assert isinstance(df['project_id'].dtype, pd.CategoricalDtype)
+        for by in ('project_id', 'region', ['region', 'current_machine_type']):
+            pd.testing.assert_frame_equal(
+                df.groupby(by, observed=True)[['current_cost', 'savings']].sum().reset_index().astype(str),
+                plain.groupby(by)[['current_cost', 'savings']].sum().reset_index().astype(str))
+        assert df.loc[df['region'] == 'us-east1', 'savings'].sum() == plain.loc[plain['region'] == 'us-east1', 'savings'].sum()
+        assert df.loc[df['project_id'].isin(['p-2', 'p-9']), 'savings'].sum() == \
+            plain.loc[plain['project_id'].isin(['p-2', 'p-9']), 'savings'].sum()
+        assert df['project_id'].nunique() == plain['project_id'].nunique()
+
+
+def test_shared_dictionaries_are_one_per_dimension(data_dir):
+    encoded = {name: data_store.read_csv_dataset(name) for name in ('cloudsql', 'kubernetes')}
+    shared = data_store.share_dictionaries({**encoded, 'dataflow': None})
+
+    assert shared['dataflow'] is None
+    assert shared['cloudsql']['region'].dtype == shared['kubernetes']['region'].dtype
+    assert list(shared['cloudsql']['region'].cat.categories) == ['asia-south1', 'europe-west3', 'us-east1']
+    # p-2 has one code in both datasets
+    codes = [df.loc[df['project_id'] == 'p-2', 'project_id'].cat.codes.unique().tolist() for df in shared.values()
+             if df is not None]
+    assert codes[0] == codes[1]
+    # The frames passed in keep their own dictionaries
+    assert list(encoded['cloudsql']['region'].cat.categories) == ['europe-west3', 'us-east1']
+    assert shared['cloudsql'] is not encoded['cloudsql']
+
+
+@pytest.fixture
+def arrow_enabled(monkeypatch):
+    monkeypatch.setattr(data_store, 'USE_ARROW', True)
+
+
+def test_memory_mapped_load_matches_csv_parse(data_dir, arrow_enabled):
+    parsed = data_store.load_dataset('cloudsql')
+    assert data_store.arrow_is_fresh('cloudsql')
+
+    mapped = data_store.load_dataset('cloudsql')
+
+    pd.testing.assert_frame_equal(mapped, parsed)
+    pd.testing.assert_frame_equal(mapped, data_store.read_csv_dataset('cloudsql'))
+    assert data_store.JUSTIFICATION_COLUMN not in mapped.columns
+    assert isinstance(mapped['region'].dtype, pd.CategoricalDtype)
+    assert isinstance(mapped['resource_name'].dtype, pd.CategoricalDtype)
+    assert mapped['created_at'].dtype == parsed['created_at'].dtype
+    assert mapped['created_at'].iloc[0] == pd.Timestamp('2026-01-01 09:00:00')
+    # Numeric columns are views of the mapping
+    assert not mapped['savings'].to_numpy().flags.writeable
+
+
+# An Arrow file older than its CSV, or gone, is rebuilt from the CSV
+@pytest.mark.parametrize('change', ['stale', 'missing'])
+def test_stale_or_missing_arrow_falls_back_to_csv(data_dir, arrow_enabled, change):
+    data_store.load_dataset('cloudsql')
+    arrow = data_store.arrow_path('cloudsql')
+    updated = CLOUDSQL.assign(savings=CLOUDSQL['savings'] + 1)
+    updated.to_csv(data_store.csv_path('cloudsql'), index=False)
+    if change == 'stale':
+        # Older than the CSV even on coarse file system timestamps
+        csv_mtime = os.path.getmtime(data_store.csv_path('cloudsql'))
+        os.utime(arrow, (csv_mtime - 10, csv_mtime - 10))
+    else:
+        os.remove(arrow)
+    assert not data_store.arrow_is_fresh('cloudsql')
+
+    loaded = data_store.load_dataset('cloudsql')
+
+    assert loaded['savings'].tolist() == updated['savings'].tolist()
+    assert data_store.arrow_is_fresh('cloudsql')
+    assert data_store.read_arrow('cloudsql')['savings'].tolist() == updated['savings'].tolist()
+
+
+def test_arrow_disabled_reads_csv_only(data_dir, monkeypatch):
+    monkeypatch.setattr(data_store, 'USE_ARROW', False)
+
+    loaded = data_store.load_dataset('cloudsql')
+
+    assert loaded['savings'].tolist() == CLOUDSQL['savings'].tolist()
+    assert not (data_dir / 'rightsizing_results_cloudsql.arrow').exists()
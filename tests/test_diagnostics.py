@@ -0,0 +1,121 @@
+import inspect
+
+import pandas as pd
+import pytest
+from streamlit.runtime import Runtime, RuntimeConfig
+from streamlit.runtime.stats import CacheStat
+
+import data_store
+import diagnostics
+import facts
+
+
+# RuntimeConfig for app.py with in-memory storage; skips when this Streamlit
+# version's RuntimeConfig needs arguments the test does not know how to build
+def runtime_config():
+    try:
+        from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+        from streamlit.runtime.memory_uploaded_file_manager import MemoryUploadedFileManager
+    except ImportError as error:
+        pytest.skip(f"in-memory Runtime storage moved: {error}")
+    known = {
+        'script_path': 'app.py',
+        'command_line': None,
+        'media_file_storage': MemoryMediaFileStorage('/media'),
+        'uploaded_file_manager': MemoryUploadedFileManager('/upload'),
+    }
+    parameters = inspect.signature(RuntimeConfig).parameters
+    required = {name for name, parameter in parameters.items() if parameter.default is parameter.empty}
+    if not required <= set(known):
+        pytest.skip(f"RuntimeConfig needs {sorted(required - set(known))}")
+    return RuntimeConfig(**{name: value for name, value in known.items() if name in parameters})
+
+
+# A Runtime as `streamlit run` creates it, without starting the server
+@pytest.fixture
+def runtime():
+    instance = Runtime(runtime_config())
+    yield instance
+    Runtime._instance = None
+
+
+# A cache stats provider with only the public get_stats()
+class GroupedCacheStats:
+    def get_stats(self):
+        return [CacheStat('st_cache_data', 'load_frame', 100), CacheStat('st_cache_data', 'load_frame', 50)]
+
+
+def report():
+    return diagnostics.memory_report({'overview': pd.DataFrame({'Actual': [1.0, 2.0]})})
+
+
+# Fails when the pinned Streamlit stops exposing the private attributes the
+# cache and session sections read
+def test_streamlit_exposes_the_accounted_internals(runtime):
+    memory_report = report()
+
+    assert memory_report['unavailable'] == {}
+    assert diagnostics.session_report() == []
+
+
+def test_missing_internals_are_reported(runtime, monkeypatch):
+    monkeypatch.setattr(diagnostics, '_cache_tiers', lambda: (('st.cache_data', GroupedCacheStats()),))
+    monkeypatch.delattr(runtime, '_session_mgr')
+    memory_report = report()
+
+    assert set(memory_report['unavailable']) == {'caches', 'sessions'}
+    assert 'unavailable in this Streamlit version' in memory_report['unavailable']['caches']
+    assert 'unavailable in this Streamlit version' in memory_report['unavailable']['sessions']
+    assert memory_report['sessions'] == []
+    assert [row['bytes'] for row in memory_report['caches']] == [100, 50]
+
+
+# _function_caches nested one level deeper, as per-session mappings
+class NestedCacheStats(GroupedCacheStats):
+    _function_caches = {'session-1': {'load_frame': object()}}
+
+
+class ReshapedSessionManager:
+    list_active_sessions = None
+
+
+def test_reshaped_internals_are_reported(runtime, monkeypatch):
+    monkeypatch.setattr(diagnostics, '_cache_tiers', lambda: (('st.cache_data', NestedCacheStats()),))
+    monkeypatch.setattr(runtime, '_session_mgr', ReshapedSessionManager())
+    memory_report = report()
+
+    assert set(memory_report['unavailable']) == {'caches', 'sessions'}
+    assert 'AttributeError' in memory_report['unavailable']['caches']
+    assert 'TypeError' in memory_report['unavailable']['sessions']
+    assert memory_report['sessions'] == []
+    assert [row['bytes'] for row in memory_report['caches']] == [100, 50]
+    assert memory_report['datasets']['overview']['rows'] == 2
+
+
+# The fact table and its indexes are a section of their own; a view of it
+# only adds the codes of its categorical columns, not their dictionaries
+def test_fact_table_section_counts_shared_dictionaries_once():
+    frame = pd.DataFrame({
+        'project_id': ['p-1', 'p-2', 'p-1'],
+        'region': ['us-east1', 'europe-west3', 'us-east1'],
+        'job_name': ['job-a', 'job-b', 'job-c'],
+        'current_machine_type': ['n1-standard-4'] * 3,
+        'target_machine_type': ['n2-standard-2'] * 3,
+        'created_at': ['2024-01-01', '2024-01-02', '2024-01-03'],
+        'savings': [30.0, 10.0, 10.0],
+    })
+    table = facts.FactTable.build(data_store.share_dictionaries({'dataflow': frame}))
+    region = table.frame['region'].cat
+
+    memory_report = diagnostics.memory_report({'dataflow': table.detail('dataflow')}, fact_table=table)
+    fact_report = memory_report['fact_table']
+
+    assert fact_report['services'] == {'DataFlow': 3}
+    assert fact_report['indexes']['bitmaps'] == table.index.nbytes > 0
+    assert fact_report['indexes']['time_index'] == table.time_index.nbytes > 0
+    assert fact_report['indexes']['resource_keys'] == table.resource_keys.nbytes
+    assert fact_report['total_bytes'] == fact_report['frame']['total_bytes'] + sum(fact_report['indexes'].values())
+    assert fact_report['frame']['columns']['region'] == region.codes.nbytes + region.categories.memory_usage(deep=True)
+    assert memory_report['datasets']['dataflow']['columns']['region'] == region.codes.nbytes
+    assert list(diagnostics.fact_table_summary_frame(memory_report)['Part']) == [
+        'frame', 'bitmaps', 'time_index', 'resource_keys', 'service_codes']
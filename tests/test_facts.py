@@ -0,0 +1,194 @@
+import datetime
+
+import pandas as pd
+
+import data_store
+import facts
+
+
+def overview_frame():
+    return pd.DataFrame({
+        'service': ['Compute', 'DataFlow', 'Kubernates'],
+        'project_id': ['p-1', 'p-2', 'p-1'],
+        'Estimated': [10.0, 20.0, 30.0],
+        'Actual': [15.0, 25.0, 45.0],
+        'Savings': [5.0, 5.0, 15.0],
+    })
+
+
+# Every results file streamed: only overview.csv rows reach the table
+def test_build_from_overview_rows_only():
+    table = facts.FactTable.build({}, overview_frame())
+
+    assert isinstance(table.frame['created_at'].dtype, pd.DatetimeTZDtype)
+    assert table.frame['latest'].astype(bool).all()
+    assert table.time_index.bounds() is None
+    assert sorted(table.services()) == ['Compute', 'DataFlow', 'Kubernetes']
+    overview = table.overview()
+    assert overview['Savings'].sum() == 25.0
+    assert table.query('DataFlow', {'created_at': (pd.Timestamp('2026-01-01').date(),) * 2}).empty
+
+
+def test_open_persisted_overview_only_table(tmp_path):
+    path = facts.FactTable.build({}, overview_frame()).save(str(tmp_path / facts.FACTS_FILE))
+    table = facts.FactTable.open(path)
+
+    assert isinstance(table.frame['created_at'].dtype, pd.DatetimeTZDtype)
+    assert table.overview()['Actual'].sum() == 85.0
+
+
+# A table persisted in another format (or before formats were recorded) is
+# not read back, so the app rebuilds it from the source files
+def test_persisted_table_of_another_format_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_store, 'DATA_DIR', str(tmp_path))
+    table = facts.FactTable.build({}, overview_frame())
+    table.save(facts.facts_path())
+    assert facts.read_fact_table([]).version == table.version
+
+    monkeypatch.setattr(facts, 'FORMAT_VERSION', facts.FORMAT_VERSION + 1)
+    assert facts.read_fact_table([]) is None
+
+
+def test_latest_per_resource_without_datetime_created_at():
+    frame = pd.DataFrame({
+        'service': pd.Categorical(['DataFlow'] * 4),
+        'project_id': pd.Categorical(['p-1', 'p-1', 'p-1', 'p-2']),
+        'resource': pd.Categorical(['job-a', 'job-a', None, 'job-a']),
+        # Strings as read back from a CSV, and an all-missing object column
+        'created_at': ['2026-01-05 10:00:00', '2026-01-04 10:00:00', None, '2026-01-04 09:00:00'],
+    })
+
+    assert list(facts.latest_per_resource(frame)) == [True, False, True, True]
+    frame['created_at'] = pd.Series([None] * 4, dtype=object)
+    assert list(facts.latest_per_resource(frame)) == [False, True, True, True]
+
+
+# Two runs of the same two instances; the later one halves db-a's savings
+def two_runs_frame():
+    return pd.DataFrame({
+        'project_id': ['p-1'] * 4,
+        'resource_name': ['db-a', 'db-b', 'db-a', 'db-b'],
+        'current_machine_type': ['db-custom-2-7680'] * 4,
+        'target_machine_type': ['db-custom-1-3840'] * 4,
+        'current_cost': [100.0, 80.0, 100.0, 80.0],
+        'target_cost': [60.0, 50.0, 80.0, 50.0],
+        'savings': [40.0, 30.0, 20.0, 30.0],
+        'created_at': ['2026-01-01 09:00:00'] * 2 + ['2026-01-05 09:00:00'] * 2,
+    })
+
+
+def test_latest_within_created_at_range():
+    table = facts.FactTable.build({'cloudsql': two_runs_frame()})
+    latest = {facts.LATEST_COLUMN: facts.LATEST_SELECTION}
+    earlier = {**latest, 'created_at': (datetime.date(2026, 1, 1), datetime.date(2026, 1, 2))}
+    both = {**latest, 'created_at': (datetime.date(2026, 1, 1), datetime.date(2026, 1, 5))}
+
+    assert table.query('CloudSQL', latest)['savings'].sum() == 50.0
+    assert table.query('CloudSQL', earlier)['savings'].sum() == 70.0
+    assert table.query('CloudSQL', both)['savings'].sum() == 50.0
+    counts = table.facet_counts('CloudSQL', earlier, ['project_id', facts.LATEST_COLUMN])
+    assert counts['project_id']['p-1'] == 2
+    assert counts[facts.LATEST_COLUMN].get(False, 0) == 0
+    counts = table.facet_counts('CloudSQL', both, ['project_id', facts.LATEST_COLUMN])
+    assert counts['project_id']['p-1'] == 2
+    assert counts[facts.LATEST_COLUMN][False] == 2
+
+
+def dataflow_frame():
+    return pd.DataFrame({
+        'project_id': ['p-1', 'p-2', 'p-1'],
+        'region': ['us-east1', 'europe-west3', 'us-east1'],
+        'job_name': ['job-a', 'job-b', 'job-c'],
+        'current_machine_type': ['n1-standard-4'] * 3,
+        'target_machine_type': ['n2-standard-2'] * 3,
+        'current_cost': [100.0, 50.0, 30.0],
+        'target_cost': [70.0, 40.0, 20.0],
+        'savings': [30.0, 10.0, 10.0],
+        'current_machine_hourly_rate': [0.19, 0.19, 0.19],
+        'target_machine_hourly_rate': [0.09, 0.09, 0.09],
+    }, index=[4, 7, 9])
+
+
+def kubernetes_frame():
+    return pd.DataFrame({
+        'project_id': ['p-2', 'p-3'],
+        'region': ['europe-west3', 'asia-south1'],
+        'cluster_name': ['k-a', 'k-b'],
+        'current_machine_type': ['e2-standard-4', 'e2-standard-8'],
+        'target_machine_type': ['e2-standard-2', 'e2-standard-4'],
+        'current_cost': [300.0, 200.0],
+        'target_cost': [200.0, 150.0],
+        'savings': [100.0, 50.0],
+        'node_count': [3, 2],
+    })
+
+
+def services_table():
+    return facts.FactTable.build({'dataflow': dataflow_frame(), 'kubernetes': kubernetes_frame()}, overview_frame())
+
+
+# Rows keep their number in their own results file, also after filtering
+def test_source_row_is_preserved():
+    table = services_table()
+
+    assert table.query('DataFlow')['source_row'].tolist() == [4, 7, 9]
+    assert table.query('Kubernetes')['source_row'].tolist() == [0, 1]
+    assert table.detail('dataflow', {'project_id': 'p-1'}).index.tolist() == [4, 9]
+
+
+# The table keeps created_at in UTC, the detail rows (and their CSV exports)
+# the naive times the results file has
+def test_detail_created_at_is_naive_like_the_results_file():
+    frame = dataflow_frame()
+    frame['created_at'] = pd.to_datetime(['2026-01-05 09:00:00', '2026-01-04 23:30:00', None])
+    table = facts.FactTable.build({'dataflow': frame})
+
+    detail = table.detail('dataflow')
+
+    assert isinstance(table.frame['created_at'].dtype, pd.DatetimeTZDtype)
+    pd.testing.assert_series_equal(detail['created_at'], frame['created_at'])
+    assert detail.to_csv(index=False) == frame.assign(**detail[facts.CAPACITY_COLUMNS]).to_csv(index=False)
+
+
+# Each dataset's rows come back with its own columns, in its own order, then the machine specs
+def test_detail_has_native_columns():
+    table = services_table()
+
+    for name, frame in (('dataflow', dataflow_frame()), ('kubernetes', kubernetes_frame())):
+        detail = table.detail(name)
+        assert list(detail.columns) == list(frame.columns) + facts.CAPACITY_COLUMNS
+        pd.testing.assert_frame_equal(detail[frame.columns].astype(object), frame.astype(object),
+                                      check_index_type=False)
+    assert table.detail('cloudsql') is None
+    assert table.detail('dataflow', {'region': 'asia-south1'}).empty
+
+
+# Services with detail rows roll up from them; the others keep their overview.csv rows
+def test_overview_totals_match_the_datasets():
+    table = services_table()
+    overview = table.overview().set_index(['service', 'project_id'])
+
+    for name, frame in (('dataflow', dataflow_frame()), ('kubernetes', kubernetes_frame())):
+        sums = frame.groupby('project_id')[['current_cost', 'target_cost', 'savings']].sum()
+        rows = overview.loc[facts.SERVICE_NAMES[name]]
+        assert rows['Actual'].to_dict() == sums['current_cost'].to_dict()
+        assert rows['Estimated'].to_dict() == sums['target_cost'].to_dict()
+        assert rows['Savings'].to_dict() == sums['savings'].to_dict()
+    # overview.csv's DataFlow and Kubernates rows are superseded by the results files
+    assert overview.loc['Compute', 'Savings'].tolist() == [5.0]
+    assert sorted(overview.index.get_level_values('service').unique()) == ['Compute', 'DataFlow', 'Kubernetes']
+    assert table.overview({'project_id': 'p-2'})['Savings'].sum() == 110.0
+
+
+# A missing project_id still gives a resource its own key
+def test_resource_keys_without_project_id():
+    frame = two_runs_frame()
+    frame['project_id'] = None
+    table = facts.FactTable.build({'cloudsql': frame})
+
+    assert (table.resource_keys >= 0).all()
+    assert len(set(table.resource_keys)) == 2
+    assert table.query('CloudSQL', {facts.LATEST_COLUMN: facts.LATEST_SELECTION})['savings'].sum() == 50.0
+    assert len(table.snapshot('CloudSQL', datetime.date(2026, 1, 1))) == 2
+    diff = table.run_diff('CloudSQL', datetime.date(2026, 1, 1), datetime.date(2026, 1, 5))
+    assert len(diff) == 2
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+import forecasts
+
+
+# CloudSQL saves 10 more every day from January 1 to 10, DataFlow 5 more every
+# day from January 3: cumulative savings on straight lines
+def linear_rows():
+    cloudsql = pd.DataFrame({'service': 'CloudSQL', 'savings': 10.0,
+                             'created_at': pd.date_range('2026-01-01 09:00', periods=10, freq='D', tz='UTC')})
+    dataflow = pd.DataFrame({'service': 'DataFlow', 'savings': 5.0,
+                             'created_at': pd.date_range('2026-01-03 09:00', periods=8, freq='D', tz='UTC')})
+    return pd.concat([cloudsql, dataflow], ignore_index=True)
+
+
+def test_forecast_of_linear_series():
+    result = forecasts.savings_forecast(linear_rows(), 'service')
+
+    # Two weeks only: daily resolution
+    assert result['resolution'] == 'Daily'
+    assert result['periods'] == 10
+    fit = result['fit'].set_index('service')
+    np.testing.assert_allclose(fit['trend_per_month'], [10 * forecasts.DAYS_PER_MONTH, 5 * forecasts.DAYS_PER_MONTH])
+    assert fit['periods'].tolist() == [10, 8]
+    assert fit['cumulative'].tolist() == [100.0, 40.0]
+
+    history = result['history']
+    assert history.loc[history['service'] == 'DataFlow', 'period'].min() == pd.Timestamp('2026-01-03')
+
+    # From 100 by the end of January 10, 21 more days at 10 a day
+    forecast = result['forecast'][result['forecast']['service'] == 'CloudSQL']
+    assert len(forecast) == forecasts.FORECAST_MONTHS
+    assert forecast['as_of'].iloc[0] == pd.Timestamp('2026-02-01')
+    np.testing.assert_allclose(forecast['cumulative'].iloc[0], 310.0)
+    # An exact fit has no residuals to widen the interval
+    np.testing.assert_allclose(forecast['lower'], forecast['upper'])
+
+
+def test_too_short_history():
+    rows = linear_rows().iloc[:2]
+
+    assert forecasts.savings_forecast(rows, 'service') == {'resolution': None, 'periods': 2}
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from justifications import JustificationStore
+
+TEXTS = [
+    'Average CPU utilisation stayed below 20% over the last 30 days.',
+    np.nan,
+    '',
+    'Peak memory usage never exceeded 40% of the provisioned capacity.',
+    'Ünïcode survives: CPU ≤ 15%.',
+]
+
+
+def test_round_trip_through_saved_files(tmp_path):
+    path = str(tmp_path / 'justification')
+    JustificationStore.from_texts(TEXTS).save(path)
+    store = JustificationStore.open(path)
+
+    assert len(store) == len(TEXTS)
+    assert store.get(0) == TEXTS[0]
+    assert store.get(3) == TEXTS[3]
+    assert store.get(4) == TEXTS[4]
+
+
+# NaN and '' are both stored as empty records and come back as None
+def test_missing_and_empty_texts_read_as_none(tmp_path):
+    path = str(tmp_path / 'justification')
+    JustificationStore.from_texts(TEXTS).save(path)
+    for store in (JustificationStore.from_texts(TEXTS), JustificationStore.open(path)):
+        assert store.get(1) is None
+        assert store.get(2) is None
+
+
+def test_empty_store(tmp_path):
+    path = str(tmp_path / 'justification')
+    JustificationStore.from_texts([]).save(path)
+    for store in (JustificationStore.from_texts([]), JustificationStore.open(path)):
+        assert len(store) == 0
+        with pytest.raises(IndexError):
+            store.get(0)
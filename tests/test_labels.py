@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import labels
+
+
+def formatted(values, decimals, thousands=True):
+    spec = f"{',' if thousands else ''}.{decimals}f"
+    return [format(float(value), spec) for value in values]
+
+
+EDGE_VALUES = [
+    0.0, -0.0, 0.004, -0.004, 0.005, -0.005, 0.125, 0.375, 2.5, -2.5, 1.005, 2.675, 999.995, 999.5,
+    1234.5, -1234.5, 1e6, 123456789.125, float('nan'), -float('nan'), float('inf'), -float('inf'),
+    2.0 ** 52 / 100, 2.0 ** 53 / 100 + 0.5, 4.5e13, 9.2e16, 1e17, -1e17, 9.3e18, 1e19, -1e19, 1.7e308,
+]
+
+
+@pytest.mark.parametrize('decimals', [0, 1, 2, 3])
+@pytest.mark.parametrize('thousands', [True, False])
+def test_number_matches_format_on_edge_values(decimals, thousands):
+    assert labels.number(EDGE_VALUES, decimals, thousands).tolist() == formatted(EDGE_VALUES, decimals, thousands)
+
+
+# Values of every magnitude, including near-ties once multiplied out
+@pytest.mark.parametrize('decimals', [0, 1, 2])
+def test_number_matches_format_on_random_values(decimals):
+    rng = np.random.default_rng(0)
+    values = rng.uniform(-1, 1, 20_000) * 10.0 ** rng.integers(-4, 22, 20_000)
+    halves = (rng.integers(-10**9, 10**9, 5_000) + 0.5) / 10 ** decimals
+    values = np.concatenate([values, halves, np.round(values, decimals)])
+
+    assert labels.number(values, decimals).tolist() == formatted(values, decimals)
+
+
+def test_grouped_handles_negative_integers():
+    integers = np.array([0, 7, -7, 1000, -1234567, np.iinfo(np.int64).min, np.iinfo(np.int64).max])
+
+    assert labels._grouped(integers, ',').tolist() == [f"{i:,}" for i in integers.tolist()]
+
+
+def test_currency_and_percent_labels():
+    assert labels.currency([1234.4, -5.5, 1e20]).tolist() == ['$1,234', '$-6', '$100,000,000,000,000,000,000']
+    assert labels.percent([12.345, 1234.5]).tolist() == ['12.3%', '1234.5%']
+    assert labels.currency_with_percent([1500.0], [12.5]).tolist() == ['$1,500<br>(12.5%)']
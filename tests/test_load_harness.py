@@ -0,0 +1,75 @@
+import asyncio
+import os
+import random
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import data_store
+from tools import load_harness
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Keyed widget that only the tab at each position of the service selector shows
+TAB_WIDGETS = ['overview_service', 'cloudsql_project', 'dataflow_project', 'kubernetes_project', None]
+
+
+def widget_keys(session):
+    return {widget_id.rsplit('-', 1)[-1] for widget_id in session.widgets}
+
+
+# A local server on a copy of the results files, so the test does not write
+# the Arrow files next to the repository's
+@pytest.fixture
+def server_url(tmp_path):
+    for file_name in data_store.DATASETS.values():
+        shutil.copy(os.path.join(ROOT, data_store.DATA_DIR, file_name), tmp_path / file_name)
+    port = load_harness.free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', 'app.py',
+         '--server.headless', 'true', '--server.port', str(port),
+         '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false'],
+        cwd=ROOT, env=dict(os.environ, DASHBOARD_DATA_DIR=str(tmp_path), DASHBOARD_API_PORT=''),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        load_harness.wait_until_healthy(base_url, timeout=60)
+        yield base_url
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+async def visit_tabs(ws_url):
+    session = load_harness.Session(ws_url, random.Random(0))
+    await session.connect()
+    try:
+        await session.rerun()
+        selector = next(widget_id for widget_id in session.widgets if widget_id.endswith('-service_selector'))
+        visited = []
+        for position, _ in enumerate(session.widgets[selector][1].options):
+            # The radio payload the harness sends when it switches tabs
+            session.set_state(selector, 'int_value', position)
+            await session.rerun()
+            visited.append(widget_keys(session))
+            # Then the filter and search payloads of a few random actions
+            for _ in range(3):
+                if session.random_action() != 'tab':
+                    await session.rerun()
+        return visited, session.errors
+    finally:
+        session.close()
+
+
+# One simulated browser session reaches every tab, and the widget states the
+# harness sends are accepted by this Streamlit version without a script error
+def test_simulated_session_reaches_every_tab(server_url):
+    visited, errors = asyncio.run(visit_tabs(server_url.replace('http', 'ws', 1) + '/_stcore/stream'))
+
+    assert errors == 0
+    assert len(visited) == len(TAB_WIDGETS)
+    for position, keys in enumerate(visited):
+        shown = {key for key in TAB_WIDGETS if key in keys}
+        assert shown == ({TAB_WIDGETS[position]} if TAB_WIDGETS[position] else set()), (position, keys)
@@ -0,0 +1,186 @@
+import base64
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import payload
+
+
+# Draws one element through payload.py in a real script run; the element is
+# built by name so the script needs no arguments from the test's scope
+def draw(element, budget):
+    import numpy as np
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    import payload
+
+    rng = np.random.default_rng(0)
+    payload.start_run('test')
+    if element == 'small chart':
+        payload.plotly_chart(go.Figure(go.Bar(x=['a', 'b'], y=[1, 2])), budget=budget)
+    elif element == 'box':
+        payload.plotly_chart(go.Figure(go.Box(x=np.repeat(['a', 'b'], 1500), y=rng.normal(size=3000))),
+                             budget=budget)
+    elif element == 'scatter':
+        payload.plotly_chart(go.Figure(go.Scatter(x=rng.normal(size=3000), y=rng.normal(size=3000),
+                                                  mode='markers')), budget=budget)
+    elif element in ('bars', 'pie'):
+        projects = pd.DataFrame({'project': [f"project-{i}" for i in range(3000)], 'savings': rng.uniform(0, 100, 3000)})
+        if element == 'bars':
+            fig = px.bar(projects, x='savings', y='project', orientation='h', color='savings',
+                         text=projects['savings'].round().astype(str), hover_data=['project'])
+        else:
+            fig = px.pie(projects, names='project', values='savings')
+        payload.plotly_chart(fig, budget=budget)
+    elif element == 'heatmap':
+        matrix = pd.DataFrame(rng.uniform(0, 10, (40, 800)), index=[f"service-{i}" for i in range(40)],
+                              columns=[f"project-{i}" for i in range(800)])
+        payload.plotly_chart(px.imshow(matrix), budget=budget)
+    elif element == 'small table':
+        payload.dataframe(pd.DataFrame({'v': [1.0, 2.0]}), formats='${:,.2f}', budget=budget)
+    elif element == 'categories':
+        categories = pd.Categorical(['x-1', 'x-2'] * 5, categories=[f"x-{i}" for i in range(20000)])
+        payload.dataframe(pd.DataFrame({'c': categories, 'v': range(10)}), budget=budget)
+    elif element == 'styled':
+        payload.dataframe(pd.DataFrame({'v': rng.uniform(0, 1e4, 500)}), formats='${:,.2f}', budget=budget)
+    elif element == 'rows':
+        payload.dataframe(pd.DataFrame({'a': rng.normal(size=5000), 'b': rng.normal(size=5000)}), budget=budget)
+
+
+def run(element, budget):
+    at = AppTest.from_function(draw, args=(element, budget), default_timeout=30).run()
+    assert not at.exception
+    [record] = at.session_state[payload.LEDGER_KEY]['test']
+    return at, record
+
+
+def chart_spec(at):
+    return json.loads(at.get('plotly_chart')[0].proto.spec)
+
+
+# A numeric array of a chart spec; plotly sends large ones base64-encoded
+def typed_array(value):
+    if not isinstance(value, dict):
+        return np.asarray(value, dtype=float)
+    array = np.frombuffer(base64.b64decode(value['bdata']), dtype=value['dtype']).astype(float)
+    return array.reshape([int(n) for n in value['shape'].split(',')]) if 'shape' in value else array
+
+
+@pytest.mark.parametrize('element, budget', [
+    ('small chart', None),      # estimated well under the default budget
+    ('scatter', 100_000),       # measured exactly, and under budget
+    ('small table', None),
+    ('styled', 100_000),
+])
+def test_within_budget_passes_through(element, budget):
+    at, record = run(element, budget)
+
+    assert record['action'] == ''
+    assert record['sent_bytes'] == record['measured_bytes']
+    assert record['exact'] == (budget is not None)
+    if record['kind'] == 'chart':
+        assert chart_spec(at)['data'][0]['type'] in ('bar', 'scatter')
+    else:
+        assert not at.caption
+
+
+def test_box_aggregated_to_quartiles():
+    at, record = run('box', 20_000)
+
+    assert record['action'] == 'aggregated 1 box trace(s) to quartiles'
+    assert record['measured_bytes'] > 20_000 >= record['sent_bytes']
+    [trace] = chart_spec(at)['data']
+    assert trace['x'] == ['a', 'b'] and 'y' not in trace
+    assert len(trace['q1']) == len(trace['upperfence']) == 2
+
+
+def test_scatter_to_webgl_and_downsampled():
+    at, record = run('scatter', 30_000)
+
+    assert record['action'].startswith('switched 1 scatter trace(s) to WebGL; downsampled 1 scatter trace(s) to 1 in ')
+    assert record['measured_bytes'] > 30_000 >= record['sent_bytes']
+    [trace] = chart_spec(at)['data']
+    assert trace['type'] == 'scattergl'
+    assert len(trace['x']) < 3000
+
+
+# Bars, slices and heatmap cells beyond the budget fold into "Other"; totals are kept
+@pytest.mark.parametrize('element, values', [('bars', 'x'), ('pie', 'values'), ('heatmap', 'z')])
+def test_folded_into_other_within_budget(element, values):
+    at, record = run(element, 30_000)
+
+    assert 'plus Other' in record['action'] or 'including Other' in record['action']
+    assert 'still over budget' not in record['action']
+    assert record['measured_bytes'] > 30_000 >= record['sent_bytes']
+    [trace] = chart_spec(at)['data']
+    labels = trace['y'] if element != 'pie' else trace['labels']
+    assert labels[-1].startswith('Other (')
+    total = np.nansum(typed_array(trace[values]))
+    expected = np.random.default_rng(0).uniform(0, 10 if element == 'heatmap' else 100,
+                                                (40, 800) if element == 'heatmap' else 3000).sum()
+    assert total == pytest.approx(expected)
+
+
+def test_table_drops_unused_categories():
+    at, record = run('categories', 20_000)
+
+    assert record['action'] == 'dropped unused categories'
+    assert record['measured_bytes'] > 20_000 >= record['sent_bytes']
+    assert not at.caption
+
+
+def test_table_formatting_moves_to_column_config():
+    at, record = run('styled', 8_000)
+
+    assert record['action'] == 'moved cell formatting to the browser (column_config)'
+    assert record['measured_bytes'] > 8_000 >= record['sent_bytes']
+    assert 'dollar' in at.dataframe[0].proto.columns
+    assert not at.caption
+
+
+def test_table_truncated_with_caption():
+    at, record = run('rows', 20_000)
+
+    assert record['action'].startswith('truncated to the first ')
+    assert record['action'].endswith(' of 5,000 rows')
+    assert record['measured_bytes'] > 20_000 >= record['sent_bytes']
+    rows = int(record['action'].split()[4].replace(',', ''))
+    assert len(at.dataframe[0].value) == rows
+    assert at.caption[0].value.startswith(f"Showing the first {rows:,} of 5,000 rows")
+
+
+# Tables are sized through Streamlit's internal Arrow marshalling while the
+# pinned Streamlit still has it
+def test_table_bytes_uses_streamlit_marshalling():
+    marshall = pytest.importorskip('streamlit.elements.arrow').marshall
+    ArrowProto = pytest.importorskip('streamlit.proto.Arrow_pb2').Arrow
+
+    frame = pd.DataFrame({'v': np.arange(100, dtype=float)})
+    for data in (frame, frame.style.format('${:,.2f}')):
+        proto = ArrowProto()
+        marshall(proto, data, default_uuid='payload')
+        assert payload.table_bytes(data) == proto.ByteSize()
+
+
+def marshalling_moved(data):
+    raise ModuleNotFoundError("No module named 'streamlit.proto.Arrow_pb2'")
+
+
+# Without Streamlit's marshalling, tables are sized by their serialized Arrow
+# stream and formatted cells, so formatting still counts against the budget
+def test_table_bytes_fallback_counts_formatted_cells(monkeypatch):
+    monkeypatch.setattr(payload, '_marshalled_bytes', marshalling_moved)
+    frame = pd.DataFrame({'v': np.random.default_rng(0).uniform(0, 1e4, 500)})
+    styled = frame.style.format('${:,.2f}')
+
+    assert payload.table_bytes(frame) == payload._arrow_bytes(frame)
+    assert payload.table_bytes(styled) > payload.table_bytes(frame) + 500 * len('$1,234.56')
+
+    at, record = run('styled', 8_000)
+    assert record['action'] == 'moved cell formatting to the browser (column_config)'
+    assert record['measured_bytes'] > 8_000 >= record['sent_bytes']
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+import ranking
+
+
+def savings_frame(rows=200):
+    rng = np.random.default_rng(0)
+    # Few distinct values: many ties, and some at every cut-off
+    savings = rng.integers(0, 12, rows).astype(float)
+    savings[::13] = np.nan
+    return pd.DataFrame({'resource': [f"r-{i}" for i in range(rows)], 'savings': savings})
+
+
+def test_top_k_matches_a_stable_sort():
+    frame = savings_frame()
+    for k in (1, 3, 10, 50, 199, 200, 250):
+        expected = frame.sort_values('savings', ascending=False, kind='stable').head(k)
+        pd.testing.assert_frame_equal(ranking.top_k(frame, 'savings', k), expected)
+
+
+def test_top_with_other_folds_the_rest():
+    frame = savings_frame()
+    top = ranking.top_with_other(frame, 'savings', 10, 'resource', ['savings'])
+
+    assert len(top) == 11
+    assert top['resource'].iloc[-1] == f"{ranking.OTHER_LABEL} (190 more)"
+    np.testing.assert_allclose(top['savings'].sum(), frame['savings'].sum())
@@ -0,0 +1,103 @@
+import datetime
+import multiprocessing
+import os
+import re
+
+import pandas as pd
+
+import facts
+from tools import build_reports
+
+
+# Two runs of the same two instances; the later one halves db-a's savings
+def cloudsql_frame():
+    return pd.DataFrame({
+        'project_id': ['p-1', 'p-2'] * 2,
+        'region': ['europe-west3', 'us-east1'] * 2,
+        'resource_name': ['db-a', 'db-b'] * 2,
+        'current_machine_type': ['db-custom-2-7680'] * 4,
+        'target_machine_type': ['db-custom-1-3840'] * 4,
+        'current_cost': [100.0, 80.0, 100.0, 80.0],
+        'target_cost': [60.0, 50.0, 80.0, 50.0],
+        'savings': [40.0, 30.0, 20.0, 30.0],
+        'created_at': ['2026-01-01 09:00:00'] * 2 + ['2026-01-05 09:00:00'] * 2,
+    })
+
+
+def fact_table():
+    return facts.FactTable.build({'cloudsql': cloudsql_frame()})
+
+
+# Superseded runs are left out of the report like on the dashboard
+def test_sections_count_latest_run_only():
+    table = fact_table()
+
+    overview = build_reports.overview_section(table, 'p-1', False)
+    service = build_reports.service_section(table, 'cloudsql', 'p-1', False)
+
+    assert 'Savings<b>$20.00 (20.0%)</b>' in overview
+    assert 'Actual Cost<b>$100.00</b>' in overview
+    assert 'Savings (Monthly)<b>$20.00 (20.0%)</b>' in service
+    assert 'Clusters<b>1</b>' in service
+    assert '$40.00' not in service
+
+
+# The later run moved to February
+def two_month_table():
+    frame = cloudsql_frame()
+    frame['created_at'] = ['2026-01-01 09:00:00'] * 2 + ['2026-02-05 09:00:00'] * 2
+    return facts.FactTable.build({'cloudsql': frame})
+
+
+def test_month_restricts_rows_to_its_created_at_range():
+    table = two_month_table()
+    january, february = build_reports.month_period('2026-01'), build_reports.month_period('2026-02')
+
+    assert february == (datetime.date(2026, 2, 1), datetime.date(2026, 2, 28))
+    assert 'Savings<b>$40.00 (40.0%)</b>' in build_reports.overview_section(table, 'p-1', False, january)
+    assert 'Savings<b>$20.00 (20.0%)</b>' in build_reports.overview_section(table, 'p-1', False, february)
+    assert build_reports.overview_section(table, 'p-1', False, build_reports.month_period('2026-03')) == ''
+    assert build_reports.service_section(table, 'cloudsql', 'p-1', False, build_reports.month_period('2026-03')) == ''
+    assert build_reports.report_projects(table) == ['p-1', 'p-2']
+    assert build_reports.report_projects(table, build_reports.month_period('2026-03')) == []
+
+
+# Forked workers inherit the fact table and write one page per project
+def test_render_reports_on_a_process_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_reports, '_FACT_TABLE', two_month_table())
+
+    results = build_reports.render_reports(['p-1', 'p-2'], str(tmp_path), '2026-01', 'cdn', 2, [],
+                                           multiprocessing.get_context('fork'))
+    index = build_reports.write_index(str(tmp_path), '2026-01', results)
+
+    assert [(project_id, os.path.basename(path)) for project_id, path, _ in results] == [
+        ('p-1', 'p-1.html'), ('p-2', 'p-2.html')]
+    page = (tmp_path / 'p-1.html').read_text(encoding='utf-8')
+    assert results[0][2] == len(page.encode('utf-8'))
+    assert 'p-1 · Cost Optimization Report · 2026-01' in page
+    assert 'Savings (Monthly)<b>$40.00 (40.0%)</b>' in page
+    assert 'href="p-2.html"' in open(index, encoding='utf-8').read()
+
+
+# Project ids never write outside the output directory or over the index
+def test_report_file_names_stay_in_the_output_directory():
+    names = [build_reports.report_file_name(project_id)
+             for project_id in ['p-1', '../p-1', 'a/b', 'a\\b', '..', 'index', '']]
+
+    assert names[0] == 'p-1.html'
+    assert len(set(names)) == len(names)
+    for name in names[1:]:
+        assert os.path.basename(name) == name
+        assert re.fullmatch(r'[A-Za-z0-9_-]+-[0-9a-f]{8}\.html', name)
+
+
+# Without an Overview chart the first service chart carries plotly.js
+def test_first_chart_on_the_page_embeds_plotlyjs(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_reports, '_FACT_TABLE', fact_table())
+    monkeypatch.setattr(build_reports, 'overview_section', lambda *args: '')
+
+    _, path, _ = build_reports.render_project_report('p-1', str(tmp_path), None, 'cdn')
+
+    page = open(path, encoding='utf-8').read()
+    assert 'Top Clusters by Savings' in page
+    assert page.count('cdn.plot.ly') == 1
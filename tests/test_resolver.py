@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+import resolver
+
+
+def instances():
+    return pd.DataFrame({
+        'project_id': ['p-1', 'p-2'],
+        'current_machine_type': ['n1-standard-4', 'n1-standard-8'],
+        'target_machine_type': ['n1-standard-2', 'n1-standard-4'],
+        'current_machine_hourly_rate': [0.19, 0.38],
+        'current_cost': [138.7, 277.4],
+        'target_cost': [69.35, 138.7],
+        'predicted_cpu': [1.5, 3.0],
+        'predicted_mem_gb': [4.0, 10.0],
+    })
+
+
+def price_table(machine_types, rates):
+    return resolver.with_specs(pd.DataFrame({'machine_type': machine_types, 'hourly_rate': rates}))
+
+
+def test_resolve_picks_cheapest_fitting_machine():
+    engine = resolver.Resolver(price_table(['e2-standard-2', 'e2-standard-4', 'n1-standard-4'], [0.067, 0.134, 0.19]))
+    resolved = resolver.resolve(instances(), engine)
+
+    assert list(resolved['resolved_machine_type']) == ['e2-standard-2', 'e2-standard-4']
+    assert resolved['fits'].all()
+
+
+# Every family excluded, or no catalogued machine type in an edited price table
+def test_resolve_without_candidate_machines():
+    prices = price_table(['e2-standard-2', 'unknown-type'], [0.067, 0.1])
+    for table in (prices[prices['family'].isin(['c4a'])], prices[prices['family'].isna()]):
+        engine = resolver.Resolver(table)
+        resolved = resolver.resolve(instances(), engine)
+
+        assert len(engine.machines) == 0
+        assert not resolved['fits'].any()
+        assert resolved['resolved_cost'].isna().all()
+        assert resolved['resolved_machine_type'].isna().all()
+        assert np.isnan(resolver.summary(resolved)['resolved_cost'])
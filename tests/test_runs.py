@@ -0,0 +1,61 @@
+import datetime
+
+import pandas as pd
+
+import facts
+import runs
+
+BEFORE = datetime.date(2026, 1, 1)
+AFTER = datetime.date(2026, 1, 5)
+
+
+# db-a saves less in the later run, db-b is unchanged, db-c is gone, db-d is
+# new and db-e gets another target
+def two_runs():
+    before = pd.DataFrame({
+        'resource_name': ['db-a', 'db-b', 'db-c', 'db-e'],
+        'target_machine_type': ['db-custom-1-3840'] * 4,
+        'savings': [40.0, 30.0, 10.0, 25.0],
+        'created_at': '2026-01-01 09:00:00',
+    })
+    after = pd.DataFrame({
+        'resource_name': ['db-a', 'db-b', 'db-d', 'db-e'],
+        'target_machine_type': ['db-custom-1-3840', 'db-custom-1-3840', 'db-custom-1-3840', 'db-custom-2-7680'],
+        'savings': [20.0, 30.004, 15.0, 25.0],
+        'created_at': '2026-01-05 09:00:00',
+    })
+    frame = pd.concat([before, after], ignore_index=True)
+    frame['project_id'] = 'p-1'
+    frame['current_machine_type'] = 'db-custom-2-7680'
+    return frame
+
+
+def test_run_diff_classifies_every_resource():
+    table = facts.FactTable.build({'cloudsql': two_runs()})
+    comparison = table.run_diff('CloudSQL', BEFORE, AFTER)
+    changes = dict(zip(comparison['resource'].astype(str), comparison['change'].astype(str)))
+
+    assert changes == {
+        'db-a': runs.SAVINGS_CHANGED,
+        'db-b': runs.UNCHANGED,
+        'db-c': runs.RESOLVED,
+        'db-d': runs.NEW,
+        'db-e': runs.TARGET_CHANGED,
+    }
+    assert list(comparison['change'].astype(str)) == [runs.NEW, runs.RESOLVED, runs.TARGET_CHANGED,
+                                                      runs.SAVINGS_CHANGED, runs.UNCHANGED]
+    by_resource = comparison.set_index(comparison['resource'].astype(str))
+    assert by_resource.loc['db-a', 'savings_delta'] == -20.0
+    assert by_resource.loc['db-c', 'savings_delta'] == -10.0
+    assert by_resource.loc['db-d', 'savings_delta'] == 15.0
+
+    summary = runs.summary(comparison)
+    assert summary['resources'].tolist() == [1, 1, 1, 1, 1]
+    assert summary.loc[runs.SAVINGS_CHANGED, 'savings_after'] == 20.0
+
+
+def test_select_filters_on_dimensions_only():
+    comparison = facts.FactTable.build({'cloudsql': two_runs()}).run_diff('CloudSQL', BEFORE, AFTER)
+
+    assert len(runs.select(comparison, {'resource': ('db-a', 'db-d')})) == 2
+    assert len(runs.select(comparison, {'created_at': (BEFORE, AFTER), 'project_id': 'All'})) == 5
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tools import startup_profile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold starts launch real servers and depend on machine load; opt in with DASHBOARD_COLD_START_RUNS=<runs>
+COLD_START_RUNS = int(os.environ.get('DASHBOARD_COLD_START_RUNS', 0))
+
+
+# plotly.express is imported on the first chart, not with the modules app.py imports
+def test_startup_imports_leave_plotly_express_unloaded():
+    modules = startup_profile.startup_imports(os.path.join(ROOT, 'app.py'))
+    code = (f"import sys; import {', '.join(modules)}; "
+            "print(any(name.startswith('plotly.express.') for name in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == 'False'
+
+
+# The dashboard's own modules add little to the import time of streamlit and
+# pandas, measured in the same interpreter so machine load cancels out; an
+# eager import of a model library (scikit-learn) would break it
+def test_startup_imports_within_budget():
+    profile = startup_profile.import_profile(startup_profile.startup_imports(os.path.join(ROOT, 'app.py')), ROOT)
+    own, baseline = startup_profile.import_split(profile, ROOT)
+
+    assert baseline > 0
+    assert own <= startup_profile.IMPORT_BUDGET_RATIO * baseline, profile
+
+
+# The median cold start of the dashboard stays within the time-to-first-render budget
+@pytest.mark.skipif(not COLD_START_RUNS, reason='set DASHBOARD_COLD_START_RUNS to time cold starts')
+def test_cold_start_within_budget():
+    median = startup_profile.median_cold_start('app.py', ROOT, dict(os.environ), COLD_START_RUNS)
+
+    assert median['first_render'] <= startup_profile.DEFAULT_BUDGET
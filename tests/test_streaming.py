@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+import streaming
+
+SUM_COLUMNS = ['current_cost', 'target_cost', 'savings']
+MEAN_COLUMNS = ['current_machine_hourly_rate']
+
+
+def results_frame(rows=200):
+    rng = np.random.default_rng(0)
+    rate = rng.uniform(0.1, 2.0, rows)
+    rate[::11] = np.nan
+    region = rng.choice(['us-east1', 'europe-west1', 'asia-east1'], rows).astype(object)
+    region[::17] = np.nan
+    # Distinct savings, so the top rows do not depend on the fold order
+    savings = rng.permutation(rows).astype(float)
+    return pd.DataFrame({
+        'project_id': rng.choice(['p-1', 'p-2', 'p-3', 'p-4'], rows),
+        'region': region,
+        'current_machine_type': rng.choice(['n1-standard-4', 'n1-standard-8'], rows),
+        'target_machine_type': rng.choice(['e2-standard-2', 'e2-standard-4'], rows),
+        'resource': [f"r-{i}" for i in range(rows)],
+        'current_cost': rng.uniform(50, 150, rows),
+        'target_cost': rng.uniform(10, 50, rows),
+        'savings': savings,
+        'current_machine_hourly_rate': rate,
+    })
+
+
+def partial(chunk=None):
+    aggregate = streaming.PartialAggregate('resource', SUM_COLUMNS, MEAN_COLUMNS, top_k=5)
+    return aggregate if chunk is None else aggregate.fold(chunk)
+
+
+# Uneven chunks folded separately, then merged front to back and back to front
+def merged_partials(frame):
+    bounds = [0, 7, 50, 51, 130, len(frame)]
+    parts = [frame.iloc[start:stop] for start, stop in zip(bounds, bounds[1:])]
+    forward = partial()
+    for part in parts:
+        forward.merge(partial(part))
+    backward = partial()
+    for part in reversed(parts):
+        backward.merge(partial(part))
+    return forward, backward
+
+
+def test_merge_order_matches_the_whole_frame():
+    frame = results_frame()
+    subset = frame[frame['project_id'].isin(['p-1', 'p-3'])]
+    for aggregate in merged_partials(frame):
+        assert aggregate.rows == len(frame)
+
+        kpis = aggregate.kpis(aggregate.cube)
+        for col in SUM_COLUMNS:
+            np.testing.assert_allclose(kpis[col], frame[col].sum())
+        np.testing.assert_allclose(kpis['avg_current_machine_hourly_rate'], frame['current_machine_hourly_rate'].mean())
+        assert kpis['rows'] == len(frame)
+        assert kpis['projects'] == frame['project_id'].nunique()
+        assert kpis['max_savings'] == frame['savings'].max()
+
+        cube, top = aggregate.select({'project_id': ['p-1', 'p-3'], 'region': 'All'})
+        kpis = aggregate.kpis(cube)
+        np.testing.assert_allclose(kpis['savings'], subset['savings'].sum())
+        assert kpis['rows'] == len(subset)
+
+        summary = aggregate.summarize(cube, 'region').set_index('region').sort_index()
+        expected = subset.groupby('region', dropna=False).agg(
+            savings=('savings', 'sum'), rows=('savings', 'size'),
+            rate=('current_machine_hourly_rate', 'mean'), projects=('project_id', 'nunique')).sort_index()
+        np.testing.assert_allclose(summary['savings'], expected['savings'])
+        np.testing.assert_allclose(summary['current_machine_hourly_rate'], expected['rate'])
+        assert list(summary['rows']) == list(expected['rows'])
+        assert list(summary['projects']) == list(expected['projects'])
+
+        counts = aggregate.option_counts('project_id', {'project_id': ['p-1'], 'region': ['us-east1']})
+        expected = frame.loc[frame['region'] == 'us-east1', 'project_id'].value_counts()
+        assert counts.sort_index().to_dict() == expected.sort_index().to_dict()
+
+        top_resources = aggregate.top_resources(top, 5)
+        assert list(top_resources['resource']) == list(subset.nlargest(5, 'savings')['resource'])
+
+
+def test_folding_chunks_in_sequence_matches_merging():
+    frame = results_frame()
+    folded = partial()
+    for start in range(0, len(frame), 37):
+        folded.fold(frame.iloc[start:start + 37])
+    merged, _ = merged_partials(frame)
+
+    expected = merged.kpis(merged.cube)
+    for key, value in folded.kpis(folded.cube).items():
+        np.testing.assert_allclose(value, expected[key])
+    assert list(folded.top_resources(folded.top, 10)['resource']) == list(frame.nlargest(10, 'savings')['resource'])
+
+
+# Many cells from few values per dimension: the kept rows grow with the values, not the cells
+def test_top_rows_stay_bounded_as_cells_grow():
+    rng = np.random.default_rng(1)
+    rows, values = 20_000, 8
+    frame = pd.DataFrame({
+        col: rng.choice([f"{col}-{i}" for i in range(values)], rows) for col in streaming.DIMENSIONS})
+    frame['resource'] = [f"r-{i}" for i in range(rows)]
+    for col in SUM_COLUMNS + MEAN_COLUMNS:
+        frame[col] = rng.uniform(0, 100, rows)
+    frame['savings'] = rng.permutation(rows).astype(float)
+    folded = partial()
+    for start in range(0, rows, 1_000):
+        folded.fold(frame.iloc[start:start + 1_000])
+
+    assert len(folded.cube) > 4_000
+    assert len(folded.top) <= folded.top_k * values * len(streaming.DIMENSIONS)
+    # Exact within one dimension
+    selections = {'region': ['region-1', 'region-5']}
+    _, top = folded.select(selections)
+    expected = frame[frame['region'].isin(selections['region'])].nlargest(5, 'savings')['resource']
+    assert folded.exact_top(selections)
+    assert list(folded.top_resources(top, 5)['resource']) == list(expected)
+    assert not folded.exact_top({'region': ['region-1'], 'project_id': ['project_id-2']})
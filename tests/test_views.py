@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_store
+import views
+
+REGIONS = ['europe-west3', 'us-east1', 'asia-south1']
+MACHINES = ['n1-standard-4', 'n2-standard-2', 'e2-standard-2', 'n2-highmem-4']
+
+
+# A small results frame of a service tab with distinct savings, so no ranking
+# depends on how ties are broken
+def results_frame(spec, rows=60, resources=14):
+    rng = np.random.default_rng(7)
+    current = rng.uniform(50, 500, rows).round(2)
+    savings = (current * rng.uniform(0.05, 0.6, rows)).round(2) + np.arange(rows) / 1000
+    frame = pd.DataFrame({
+        'project_id': rng.choice([f'p-{i}' for i in range(6)], rows),
+        'region': rng.choice(REGIONS, rows),
+        spec['resource_column']: rng.choice([f'r-{i}' for i in range(resources)], rows),
+        'current_machine_type': rng.choice(MACHINES, rows),
+        'target_machine_type': rng.choice(MACHINES, rows),
+        'current_cost': current,
+        'target_cost': current - savings,
+        'savings': savings,
+        'current_machine_hourly_rate': rng.uniform(0.1, 1.0, rows).round(4),
+        'target_machine_hourly_rate': rng.uniform(0.05, 0.5, rows).round(4),
+    })
+    for measure in spec['measures']:
+        frame[measure['column']] = rng.integers(1, 20, rows)
+    return frame
+
+
+# The frame as ingest hands it to the tabs: dimension columns dictionary-encoded
+def encoded(frame):
+    return frame.astype({col: 'category' for col in data_store.CATEGORICAL_COLUMNS if col in frame.columns})
+
+
+# Categorical columns back to plain values, for comparing with object-dtype results
+def plain(frame):
+    return frame.astype({col: object for col in frame.columns if isinstance(frame[col].dtype, pd.CategoricalDtype)})
+
+
+def assert_same(built, baseline):
+    pd.testing.assert_frame_equal(plain(built).reset_index(drop=True), baseline.reset_index(drop=True),
+                                  check_dtype=False)
+
+
+@pytest.fixture(params=list(views.SERVICE_VIEWS))
+def service(request):
+    spec = views.SERVICE_VIEWS[request.param]
+    frame = results_frame(spec)
+    return spec, frame, views.build_view(spec, encoded(frame))
+
+
+def test_totals_match_pandas(service):
+    spec, df, view = service
+    total = view['totals']
+
+    assert total['current_cost'] == pytest.approx(df['current_cost'].sum())
+    assert total['target_cost'] == pytest.approx(df['target_cost'].sum())
+    assert total['savings'] == pytest.approx(df['savings'].sum())
+    assert total['savings_pct'] == pytest.approx(df['savings'].sum() / df['current_cost'].sum() * 100)
+    assert total['cost_reduction_pct'] == pytest.approx(
+        (df['current_cost'].sum() - df['target_cost'].sum()) / df['current_cost'].sum() * 100)
+    assert total['projects'] == df['project_id'].nunique()
+    resources = len(df) if spec['resource_count'] == 'rows' else df[spec['resource_column']].nunique()
+    assert total['resources'] == resources
+    for measure in spec['measures']:
+        assert total['measures'][measure['column']] == df[measure['column']].sum()
+
+
+def test_every_panel_is_built(service):
+    spec, _, view = service
+
+    for panel in spec['panels']:
+        build, _ = views.PANELS[panel]
+        assert (panel in view) == (build is not None)
+
+
+def test_summary_tables_match_pandas(service):
+    spec, df, view = service
+
+    for (_, group_titles, columns), built in zip(spec['summaries'], view['summary_tables']):
+        baseline = df.groupby(list(group_titles)).agg({column: how for column, how, _ in columns}).reset_index()
+        baseline.columns = list(group_titles.values()) + [title for _, _, title in columns]
+        baseline['Savings %'] = (baseline['Savings'] / baseline['Current Cost'] * 100).round(2)
+        assert_same(built, baseline.sort_values('Savings', ascending=False))
+
+
+def test_region_savings_match_pandas(service):
+    spec, df, view = service
+    built = view['cost_analysis']['region_savings'] if 'cost_analysis' in view else view['additional_analysis']
+
+    baseline = df.groupby('region').agg({'savings': 'sum', 'current_cost': 'sum', 'target_cost': 'sum'}).reset_index()
+    baseline.columns = ['Region', 'Savings', 'Current Cost', 'Target Cost']
+    baseline['Savings %'] = (baseline['Savings'] / baseline['Current Cost'] * 100).round(1)
+    baseline = baseline.sort_values('Savings', ascending=False)
+    assert_same(built.drop(columns='Display Text'), baseline)
+
+
+def test_key_metrics_match_pandas():
+    spec = views.SERVICE_VIEWS['dataflow']
+    df = results_frame(spec)
+    metrics = views.build_view(spec, encoded(df))['key_metrics']
+    max_row = df.loc[df['savings'].idxmax()]
+
+    assert metrics['avg_savings'] == pytest.approx(df['savings'].mean())
+    assert metrics['avg_savings_pct'] == pytest.approx(df['savings'].mean() / df['current_cost'].mean() * 100)
+    assert metrics['max_savings'] == max_row['savings']
+    assert metrics['max_savings_pct'] == pytest.approx(max_row['savings'] / max_row['current_cost'] * 100)
+    assert metrics['avg_current_rate'] == pytest.approx(df['current_machine_hourly_rate'].mean())
+    assert metrics['avg_target_rate'] == pytest.approx(df['target_machine_hourly_rate'].mean())
+
+
+@pytest.mark.parametrize('dataset', ['cloudsql', 'kubernetes'])
+def test_top_resources_and_projects_match_pandas(dataset):
+    spec = views.SERVICE_VIEWS[dataset]
+    df = results_frame(spec)
+    view = views.build_view(spec, encoded(df))
+    resource_column = spec['resource_column']
+    measures = {measure['column']: 'sum' for measure in spec['measures']}
+    measure_labels = [measure['label'] for measure in spec['measures']]
+
+    # Query equivalent: GROUP BY resource, ORDER BY savings DESC, LIMIT 10
+    top = df.groupby(resource_column).agg(
+        {'target_cost': 'sum', 'current_cost': 'sum', 'savings': 'sum', **measures}).reset_index()
+    top.columns = ['Cluster', 'Estimated', 'Actual', 'Savings'] + measure_labels
+    top = top.sort_values('Savings', ascending=False).head(10)
+    top['Savings %'] = (top['Savings'] / top['Actual'] * 100).round(2)
+    assert_same(view['top_resources'].drop(columns='Display Text'), top)
+
+    # Query equivalent: GROUP BY project_id, ORDER BY savings DESC, LIMIT 3
+    projects = df.groupby('project_id').agg(
+        {'target_cost': 'sum', 'current_cost': 'sum', 'savings': 'sum', resource_column: 'count', **measures})
+    projects = projects.reset_index()
+    projects.columns = ['Project ID', 'Estimated', 'Actual', 'Savings', 'Clusters'] + measure_labels
+    projects = projects.sort_values('Savings', ascending=False).head(3)
+    projects['Savings %'] = (projects['Savings'] / projects['Actual'] * 100).round(2)
+    assert_same(view['top_projects'].drop(columns='Display Text'), projects)
+
+
+def test_node_count_matches_pandas():
+    spec = views.SERVICE_VIEWS['kubernetes']
+    df = results_frame(spec)
+    view = views.build_view(spec, encoded(df))
+
+    projects = df.groupby('project_id').agg(
+        {'node_count': 'mean', 'cluster_name': 'count', 'savings': 'sum'}).reset_index()
+    projects.columns = ['Project ID', 'Avg Nodes', 'Clusters', 'Savings']
+    assert_same(view['node_count']['projects'], projects.sort_values('Avg Nodes', ascending=False))
+
+    clusters = df.groupby('cluster_name').agg({'node_count': 'first', 'savings': 'sum'}).reset_index()
+    # Fewer than 15 clusters: nothing left out
+    assert_same(view['node_count']['clusters'], clusters.sort_values('node_count', ascending=False, kind='stable'))
+    assert view['node_count']['others'] is None
+
+
+# Clusters past the top 15 are summarized apart, not charted as one bar
+def test_node_count_leaves_other_clusters_off_the_chart():
+    spec = views.SERVICE_VIEWS['kubernetes']
+    df = results_frame(spec, rows=200, resources=40)
+    view = views.build_view(spec, encoded(df))
+
+    clusters = df.groupby('cluster_name').agg({'node_count': 'first', 'savings': 'sum'}).reset_index()
+    clusters = clusters.sort_values('node_count', ascending=False, kind='stable')
+    assert_same(view['node_count']['clusters'], clusters.head(15))
+    others = view['node_count']['others']
+    assert others['count'] == len(clusters) - 15
+    assert others['node_count'] == clusters['node_count'].iloc[15:].sum()
+    assert others['savings'] == pytest.approx(clusters['savings'].iloc[15:].sum())
+
+
+def test_insights_name_the_top_groups():
+    spec = views.SERVICE_VIEWS['dataflow']
+    df = results_frame(spec)
+    lines = views.build_view(spec, encoded(df))['insights']
+    region_savings = df.groupby('region')['savings'].sum()
+    top_region = region_savings.idxmax()
+    top_region_pct = region_savings.max() / df[df['region'] == top_region]['current_cost'].sum() * 100
+
+    assert lines[0] == (f"- Highest savings region: **{top_region}** "
+                        f"(${region_savings.max():,.2f}, {top_region_pct:.1f}% savings)")
+    assert lines[1] == f"- Most expensive machine type: **{df.groupby('current_machine_type')['current_cost'].sum().idxmax()}**"
+
+
+def test_no_matching_rows_builds_totals_only(service):
+    spec, df, _ = service
+    view = views.build_view(spec, encoded(df).iloc[:0])
+
+    assert set(view) == {'frame', 'totals'}
+    assert view['totals']['savings'] == 0 and view['totals']['savings_pct'] == 0
@@ -0,0 +1,97 @@
+"""Date-range selection and savings trends over the facts' ``created_at``.
+
+``TimeIndex`` keeps, for every service slice of the fact table, the positions
+of the slice's rows ordered by ``created_at`` and their sorted timestamps. A
+date range is then two binary searches (``numpy.searchsorted``) that bound a
+run of that order: the rows in range are found without comparing every row's
+timestamp. Rows without a ``created_at`` never fall in a range.
+
+``savings_trend`` resamples the costs and savings of a set of rows daily,
+weekly or monthly, optionally one series per group (service).
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+TIME_COLUMN = 'created_at'
+
+# Trend resolution label -> resample rule; weeks start on Monday
+FREQUENCIES = {
+    'Daily': 'D',
+    'Weekly': 'W-MON',
+    'Monthly': 'MS',
+}
+
+TREND_COLUMNS = ['current_cost', 'target_cost', 'savings']
+
+
+# Timestamps as naive UTC times, as the results files write them
+def naive_utc(times):
+    return times.dt.tz_convert('UTC').dt.tz_localize(None) if times.dt.tz is not None else times
+
+
+class TimeIndex:
+    def __init__(self, frame, slices):
+        values = naive_utc(frame[TIME_COLUMN]).to_numpy(dtype='datetime64[ns]')
+        self._sorted = {}
+        for name, rows in {None: slice(0, len(frame)), **slices}.items():
+            stamps = values[rows]
+            known = np.flatnonzero(~np.isnat(stamps))
+            order = known[np.argsort(stamps[known], kind='stable')]
+            self._sorted[name] = (order, stamps[order])
+
+    @property
+    def nbytes(self):
+        return sum(order.nbytes + stamps.nbytes for order, stamps in self._sorted.values())
+
+    # First and last day with a timestamp among the rows of service (or all), or None
+    def bounds(self, service=None):
+        _, stamps = self._sorted.get(service, (None, np.array([], dtype='datetime64[ns]')))
+        if not len(stamps):
+            return None
+        return pd.Timestamp(stamps[0]).date(), pd.Timestamp(stamps[-1]).date()
+
+    # Days with rows of service (or all), in order
+    def days(self, service=None):
+        _, stamps = self._sorted.get(service, (None, np.array([], dtype='datetime64[ns]')))
+        return [pd.Timestamp(day).date() for day in np.unique(stamps.astype('datetime64[D]'))]
+
+    # Positions, within the rows of service (or all), of the rows created on
+    # days first through last, in created_at order
+    def between(self, service, first, last):
+        order, stamps = self._sorted.get(service, (np.array([], dtype=np.int64), None))
+        if stamps is None:
+            return order
+        start = np.datetime64(datetime.datetime.combine(first, datetime.time()), 'ns')
+        stop = np.datetime64(datetime.datetime.combine(last + datetime.timedelta(days=1), datetime.time()), 'ns')
+        lo, hi = np.searchsorted(stamps, [start, stop], side='left')
+        return order[lo:hi]
+
+
+# A date-range selection as (first day, last day), or None when it keeps every row
+def selected_period(selection):
+    if selection is None or len(selection) != 2:
+        return None
+    first, last = selection
+    return (first, last) if first <= last else (last, first)
+
+
+# Costs, savings and recommendations of rows per period (rule from FREQUENCIES),
+# with one series per value of by when given
+def savings_trend(rows, rule, by=None):
+    keys = [by] if by else []
+    frame = rows[keys + [TIME_COLUMN] + TREND_COLUMNS].dropna(subset=[TIME_COLUMN])
+    frame = frame.assign(recommendations=1)
+    grouped = frame.set_index(TIME_COLUMN)
+    if by:
+        grouped = grouped.groupby(by, observed=True)
+    trend = grouped.resample(rule, label='left', closed='left')[TREND_COLUMNS + ['recommendations']].sum()
+    trend = trend.reset_index().rename(columns={TIME_COLUMN: 'period'})
+    trend['period'] = naive_utc(trend['period'])
+    return trend
+
+
+# Every resolution of savings_trend, keyed by the labels of FREQUENCIES
+def savings_trends(rows, by=None):
+    return {label: savings_trend(rows, rule, by) for label, rule in FREQUENCIES.items()}
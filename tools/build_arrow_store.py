@@ -0,0 +1,55 @@
+"""Convert the dashboard CSV exports into memory-mappable Arrow IPC files.
+
+The justification text of every results file goes into its compressed side
+store instead (see justifications.py). Finally the cross-service fact table
+the dashboard reads is written to ``facts.arrow`` (see facts.py).
+
+Run this once after refreshing ``dashboard_data`` and before starting the
+Streamlit server processes, so none of them has to parse the CSV files:
+
+    python -m tools.build_arrow_store
+"""
+import argparse
+import time
+
+import data_store
+import facts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('datasets', nargs='*', default=list(data_store.DATASETS),
+                        help='datasets to convert (default: all)')
+    args = parser.parse_args()
+
+    if data_store.pa is None:
+        parser.error('pyarrow is not installed')
+
+    for name in args.datasets:
+        start = time.perf_counter()
+        df = data_store.read_csv_dataset(name)
+        path = data_store.write_arrow(name, df)
+        print(f"{name}: {len(df)} rows -> {path} ({time.perf_counter() - start:.2f}s)")
+        if data_store.has_justifications(name):
+            start = time.perf_counter()
+            store = data_store.build_justifications(name)
+            store.save(data_store.justification_path(name))
+            print(f"{name}: {len(store)} justifications -> {data_store.justification_path(name)}.bin "
+                  f"({store.nbytes / 1024:,.1f} KB, {time.perf_counter() - start:.2f}s)")
+
+    # Oversized results files are streamed by the dashboard, never part of the table
+    start = time.perf_counter()
+    frames, errors = data_store.load_datasets([name for name in data_store.DATASETS
+                                               if not data_store.use_streaming(name)])
+    if errors:
+        parser.error('; '.join(f"{name}: {e}" for name, e in errors.items()))
+    frames = data_store.share_dictionaries(frames)
+    overview = frames.pop('overview')
+    fact_table = facts.FactTable.build(frames, overview)
+    path = fact_table.save(facts.facts_path())
+    print(f"facts: {len(fact_table.frame)} rows over {', '.join(fact_table.services())} -> {path} "
+          f"({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
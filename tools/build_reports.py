@@ -0,0 +1,281 @@
+"""Render a static savings report per project as standalone HTML.
+
+Every project_id in the fact table gets one page covering its Overview totals
+and its CloudSQL, DataFlow and Kubernetes recommendations, with the charts
+embedded. Pages are rendered on a process pool: the fact table is loaded once
+up front (and persisted as ``facts.arrow``), and every worker maps that same
+file instead of parsing the CSV exports again.
+
+    python -m tools.build_reports --month 2026-10 --workers 8
+
+Like the dashboard, every page counts the latest recommendation per
+resource. ``--month`` restricts the pages to the recommendations created in
+that month, the latest per resource within it; services that only appear in
+overview.csv have no ``created_at`` and are left out of such a page. Without
+it, pages cover the whole history.
+
+Pages go to ``<out>/<month or latest>/<project_id>.html`` next to an
+``index.html``; a project_id that is not a plain file name is slugged (see
+``report_file_name``).
+"""
+import argparse
+import calendar
+import concurrent.futures
+import datetime
+import hashlib
+import html
+import os
+import re
+import time
+
+import plotly.express as px
+
+import api
+import data_store
+import facts
+import timeline
+
+COST_COLORS = {'Current Cost': '#ff4444', 'Target Cost': '#44ff44', 'Savings': '#4444ff'}
+RESOURCE_LABELS = {'dataflow': 'Job', 'cloudsql': 'Cluster', 'kubernetes': 'Cluster'}
+TOP_RESOURCES = 15
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2rem auto; max-width: 1100px; color: #262730; }}
+h1 {{ color: #1f77b4; }}
+.kpis {{ display: flex; gap: 1rem; flex-wrap: wrap; }}
+.kpi {{ background: #f0f2f6; border-left: 4px solid #1f77b4; border-radius: 0.5rem; padding: 0.75rem 1rem; }}
+.kpi b {{ display: block; font-size: 1.4rem; }}
+table {{ border-collapse: collapse; margin: 1rem 0; }}
+th, td {{ border-bottom: 1px solid #ddd; padding: 0.3rem 0.8rem; text-align: right; }}
+th:first-child, td:first-child {{ text-align: left; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+# Fact table of this process; workers inherit it when forked, otherwise map facts.arrow
+_FACT_TABLE = None
+
+
+def _money(value):
+    return f"${value:,.2f}"
+
+
+def _kpi_strip(items):
+    cells = ''.join(f'<div class="kpi">{html.escape(label)}<b>{html.escape(value)}</b></div>'
+                    for label, value in items)
+    return f'<div class="kpis">{cells}</div>'
+
+
+def _table(frame, money_columns=()):
+    formatters = {col: _money for col in money_columns}
+    return frame.to_html(index=False, border=0, formatters=formatters, float_format=lambda value: f"{value:,.2f}")
+
+
+def _chart(fig, include_plotlyjs):
+    fig.update_layout(height=400, margin={'t': 60})
+    return fig.to_html(full_html=False, include_plotlyjs=include_plotlyjs)
+
+
+# First and last day of a 'YYYY-MM' month, or None for the whole history
+def month_period(month):
+    if month is None:
+        return None
+    first = datetime.datetime.strptime(month, '%Y-%m').date()
+    return first, first.replace(day=calendar.monthrange(first.year, first.month)[1])
+
+
+# --month values: 'YYYY-MM' as given, once it parses
+def month_argument(text):
+    month_period(text)
+    return text
+
+
+# The rows of one project (created in period), leaving out recommendations
+# superseded by a later run like the dashboard and the JSON API do by default
+def project_selections(project_id, period=None):
+    selections = {'project_id': project_id, facts.LATEST_COLUMN: facts.LATEST_SELECTION}
+    if period is not None:
+        selections[timeline.TIME_COLUMN] = period
+    return selections
+
+
+# Projects with rows (created in period), in order
+def report_projects(fact_table, period=None):
+    selections = {timeline.TIME_COLUMN: period} if period is not None else None
+    counts = fact_table.facet_counts(selections=selections, columns=['project_id'])['project_id']
+    return sorted(counts.index.astype(str))
+
+
+def overview_section(fact_table, project_id, include_plotlyjs, period=None):
+    rollup = fact_table.overview(project_selections(project_id, period))
+    if rollup.empty:
+        return ''
+    actual, estimated, savings = rollup['Actual'].sum(), rollup['Estimated'].sum(), rollup['Savings'].sum()
+    fig = px.bar(
+        rollup.melt(id_vars='service', value_vars=['Actual', 'Estimated'], var_name='Cost Type', value_name='Cost'),
+        x='service', y='Cost', color='Cost Type', barmode='group',
+        color_discrete_map={'Actual': COST_COLORS['Current Cost'], 'Estimated': COST_COLORS['Target Cost']},
+        labels={'service': 'Service', 'Cost': 'Cost (USD)'},
+        title="Actual vs Estimated Cost by Service"
+    )
+    return (
+        "<h2>📈 Overview</h2>"
+        + _kpi_strip([
+            ("Actual Cost", _money(actual)),
+            ("Estimated Cost", _money(estimated)),
+            ("Savings", f"{_money(savings)} ({savings / actual * 100 if actual else 0:.1f}%)"),
+            ("Services", str(rollup['service'].nunique())),
+        ])
+        + _chart(fig, include_plotlyjs)
+        + _table(rollup.drop(columns='project_id').rename(columns={'service': 'Service'}),
+                 ['Actual', 'Estimated', 'Savings'])
+    )
+
+
+def service_section(fact_table, dataset, project_id, include_plotlyjs, period=None):
+    frame = fact_table.detail(dataset, project_selections(project_id, period))
+    if frame is None or frame.empty:
+        return ''
+    label, resource_label = facts.SERVICE_NAMES[dataset], RESOURCE_LABELS[dataset]
+    resource_column = data_store.RESOURCE_COLUMNS[dataset]
+    kpis = api.kpis(frame)
+
+    top = frame.nlargest(TOP_RESOURCES, 'savings')
+    fig = px.bar(
+        top.astype({resource_column: str}), x='savings', y=resource_column, orientation='h',
+        color='savings', color_continuous_scale='Greens',
+        labels={'savings': 'Savings (USD)', resource_column: resource_label},
+        title=f"Top {resource_label}s by Savings"
+    )
+    fig.update_layout(yaxis={'categoryorder': 'total ascending'})
+
+    by_machine = api.summary(frame, 'current_machine_type')[
+        ['current_machine_type', 'rows', 'current_cost', 'target_cost', 'savings', 'savings_pct']]
+    by_machine.columns = ['Current Machine', 'Recommendations', 'Current Cost', 'Target Cost', 'Savings', 'Savings %']
+    recommendations = top[[resource_column, 'region', 'current_machine_type', 'target_machine_type',
+                           'current_cost', 'target_cost', 'savings']]
+    recommendations.columns = [resource_label, 'Region', 'Current Machine', 'Target Machine',
+                               'Current Cost', 'Target Cost', 'Savings']
+    money = ['Current Cost', 'Target Cost', 'Savings']
+    return (
+        f"<h2>{html.escape(label)}</h2>"
+        + _kpi_strip([
+            ("Current Cost (Monthly)", _money(kpis['current_cost'])),
+            ("Target Cost (Monthly)", _money(kpis['target_cost'])),
+            ("Savings (Monthly)", f"{_money(kpis['savings'])} ({kpis['savings_pct']:.1f}%)"),
+            (f"{resource_label}s", f"{kpis['rows']:,}"),
+        ])
+        + _chart(fig, include_plotlyjs)
+        + "<h3>By Current Machine Type</h3>" + _table(by_machine, money)
+        + "<h3>Top Recommendations</h3>" + _table(recommendations, money)
+    )
+
+
+# File name of a project's page: the project_id itself when it is a plain
+# name, otherwise a slug of it plus a digest of the id, so an id with path
+# separators or dots stays inside the output directory and two ids never
+# share a page (nor take the index's)
+def report_file_name(project_id):
+    project_id = str(project_id)
+    slug = re.sub(r'[^A-Za-z0-9_-]+', '-', project_id).strip('-')
+    if not slug or slug != project_id or slug.lower() == 'index':
+        slug = f"{slug or 'project'}-{hashlib.sha1(project_id.encode('utf-8')).hexdigest()[:8]}"
+    return f"{slug}.html"
+
+
+# Render one project's page for month ('YYYY-MM', or None for the whole
+# history); returns (project_id, path, bytes written)
+def render_project_report(project_id, out_dir, month, plotlyjs):
+    fact_table = _FACT_TABLE
+    period = month_period(month)
+    builders = [lambda include_plotlyjs: overview_section(fact_table, project_id, include_plotlyjs, period)]
+    builders += [lambda include_plotlyjs, dataset=dataset: service_section(fact_table, dataset, project_id,
+                                                                            include_plotlyjs, period)
+                 for dataset in ('cloudsql', 'dataflow', 'kubernetes') if dataset in fact_table.datasets]
+    # A section is empty or has one chart: the first chart on the page
+    # carries plotly.js for the rest
+    sections = []
+    for build in builders:
+        sections.append(build(False if any(sections) else plotlyjs))
+    title = f"{project_id} · Cost Optimization Report · {month or 'Latest'}"
+    body = f"<h1>💰 {html.escape(title)}</h1>" + ''.join(sections)
+    page = PAGE.format(title=html.escape(title), body=body)
+
+    path = os.path.join(out_dir, report_file_name(project_id))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    return project_id, path, len(page.encode('utf-8'))
+
+
+def _init_worker(datasets):
+    global _FACT_TABLE
+    if _FACT_TABLE is None:
+        _FACT_TABLE = facts.read_fact_table(datasets) or facts.load_fact_table(datasets)
+
+
+def write_index(out_dir, month, results):
+    label = html.escape(month or 'Latest')
+    links = ''.join(f'<li><a href="{html.escape(os.path.basename(path))}">{html.escape(project_id)}</a></li>'
+                    for project_id, path, _ in sorted(results))
+    body = f"<h1>💰 Cost Optimization Reports · {label}</h1><ul>{links}</ul>"
+    path = os.path.join(out_dir, 'index.html')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(PAGE.format(title=f"Cost Optimization Reports {label}", body=body))
+    return path
+
+
+# Render the pages of projects on a pool of worker processes; workers that
+# do not inherit this process's fact table load it for datasets
+def render_reports(projects, out_dir, month, plotlyjs, workers, datasets, mp_context=None):
+    with concurrent.futures.ProcessPoolExecutor(workers, mp_context=mp_context,
+                                                initializer=_init_worker, initargs=(datasets,)) as pool:
+        chunksize = max(1, len(projects) // (4 * workers))
+        futures = pool.map(render_project_report, projects, [out_dir] * len(projects), [month] * len(projects),
+                           [plotlyjs] * len(projects), chunksize=chunksize)
+        return list(futures)
+
+
+def main():
+    global _FACT_TABLE
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('projects', nargs='*', help='project ids to report on (default: all with rows)')
+    parser.add_argument('--month', type=month_argument, metavar='YYYY-MM',
+                        help='only recommendations created in this month (default: the whole history)')
+    parser.add_argument('--out', default='reports', help='output directory (default: reports)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes (default: CPU count)')
+    parser.add_argument('--plotlyjs', choices=['inline', 'cdn'], default='inline',
+                        help='embed plotly.js in every page, or load it from the CDN (default: inline)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    datasets = [name for name in data_store.RESOURCE_COLUMNS if not data_store.use_streaming(name)]
+    _FACT_TABLE = facts.load_fact_table(datasets)
+    projects = args.projects or report_projects(_FACT_TABLE, month_period(args.month))
+    out_dir = os.path.join(args.out, args.month or 'latest')
+    os.makedirs(out_dir, exist_ok=True)
+    load_seconds = time.perf_counter() - start
+
+    plotlyjs = True if args.plotlyjs == 'inline' else 'cdn'
+    start = time.perf_counter()
+    results = render_reports(projects, out_dir, args.month, plotlyjs, args.workers, datasets)
+    render_seconds = time.perf_counter() - start
+    index_path = write_index(out_dir, args.month, results)
+
+    total_bytes = sum(nbytes for _, _, nbytes in results)
+    print(f"Loaded {len(_FACT_TABLE.frame):,} fact rows in {load_seconds:.2f}s")
+    print(f"Rendered {len(results)} reports with {args.workers} workers in {render_seconds:.2f}s "
+          f"({len(results) / render_seconds if render_seconds else 0:,.1f} reports/s, {total_bytes / 2**20:,.1f} MB)")
+    print(f"Index: {index_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+"""Concurrent-session load test for the dashboard.
+
+Starts ``streamlit run app.py`` locally (or targets ``--url``), then ramps up
+simulated browser sessions. Every session speaks the same websocket protocol as
+the browser: it switches tabs, changes sidebar filters and types search terms,
+and times each rerun from request to ``script_finished``. While a level runs
+the server process is sampled for CPU and RSS.
+
+    python -m tools.load_harness --levels 1,5,10,25 --duration 30
+
+The report lists rerun latency percentiles per concurrency level and the first
+level whose p95 exceeds ``--degrade-factor`` times the single-level baseline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.httpclient import HTTPRequest
+from tornado.websocket import websocket_connect
+
+WIDGET_TYPES = ('radio', 'selectbox', 'multiselect', 'text_input')
+SEARCH_TERMS = ['prj', 'gl', 'n1', 'e2', 'db-custom', 'isr', 'loyalty', 'cluster', 'xyz']
+CLK_TCK = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_healthy(base_url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError(f"Streamlit server at {base_url} did not become healthy")
+
+
+# CPU seconds and RSS bytes of a local process, read from /proc (Linux only)
+def process_usage(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / CLK_TCK
+        with open(f"/proc/{pid}/status") as f:
+            rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+        return cpu_seconds, rss_kb * 1024
+    except (OSError, StopIteration, IndexError, ValueError):
+        return None
+
+
+class ResourceSampler:
+    def __init__(self, pid, interval):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+
+    async def run(self, stop):
+        previous = process_usage(self.pid) if self.pid else None
+        previous_time = time.monotonic()
+        while previous is not None and not stop.is_set():
+            await asyncio.sleep(self.interval)
+            current = process_usage(self.pid)
+            now = time.monotonic()
+            if current is None:
+                return
+            cpu_pct = (current[0] - previous[0]) / (now - previous_time) * 100
+            self.samples.append({'t': time.time(), 'cpu_pct': round(cpu_pct, 1), 'rss_bytes': current[1]})
+            previous, previous_time = current, now
+
+
+class Session:
+    def __init__(self, ws_url, rng):
+        self.ws_url = ws_url
+        self.rng = rng
+        self.conn = None
+        self.widgets = {}
+        self.states = {}
+        self.latencies = []
+        self.errors = 0
+
+    async def connect(self):
+        request = HTTPRequest(self.ws_url, connect_timeout=10, request_timeout=60)
+        self.conn = await websocket_connect(request, subprotocols=['streamlit'],
+                                            max_message_size=256 * 1024 * 1024)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+
+    # Send one rerun with the current widget states and wait until it finishes
+    async def rerun(self):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        msg.rerun_script.page_script_hash = ''
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        start = time.perf_counter()
+        await self.conn.write_message(msg.SerializeToString(), binary=True)
+
+        seen = {}
+        while True:
+            payload = await self.conn.read_message()
+            if payload is None:
+                raise ConnectionError('server closed the websocket')
+            fwd = ForwardMsg()
+            fwd.ParseFromString(payload)
+            kind = fwd.WhichOneof('type')
+            if kind == 'delta' and fwd.delta.WhichOneof('type') == 'new_element':
+                element = fwd.delta.new_element
+                element_type = element.WhichOneof('type')
+                if element_type == 'exception':
+                    self.errors += 1
+                elif element_type in WIDGET_TYPES:
+                    widget = getattr(element, element_type)
+                    seen[widget.id] = (element_type, widget)
+            elif kind == 'script_finished':
+                break
+
+        self.latencies.append(time.perf_counter() - start)
+        self.widgets = seen
+        # Widgets that are no longer on the page drop out of the client state
+        self.states = {wid: state for wid, state in self.states.items() if wid in seen}
+
+    def set_state(self, widget_id, field, value):
+        state = self.states.get(widget_id)
+        if state is None:
+            state = self.states[widget_id] = WidgetState(id=widget_id)
+        if field == 'string_array_value':
+            state.string_array_value.data[:] = value
+        else:
+            setattr(state, field, value)
+
+    # Pick a random user action: switch tab, change a filter or search
+    def random_action(self):
+        tabs, filters, searches = [], [], []
+        for widget_id, (element_type, widget) in self.widgets.items():
+            if element_type == 'radio':
+                tabs.append((widget_id, widget))
+            elif element_type in ('selectbox', 'multiselect') and len(widget.options) > 1:
+                filters.append((widget_id, element_type, widget))
+            elif element_type == 'text_input':
+                searches.append(widget_id)
+
+        choices = []
+        if tabs:
+            choices.append('tab')
+        if filters:
+            choices += ['filter', 'filter']
+        if searches:
+            choices.append('search')
+        if not choices:
+            return 'noop'
+
+        action = self.rng.choice(choices)
+        if action == 'tab':
+            widget_id, widget = self.rng.choice(tabs)
+            self.set_state(widget_id, 'int_value', self.rng.randrange(len(widget.options)))
+        elif action == 'filter':
+            widget_id, element_type, widget = self.rng.choice(filters)
+            options = list(widget.options)
+            if element_type == 'selectbox':
+                self.set_state(widget_id, 'string_value', self.rng.choice(options))
+            else:
+                picked = self.rng.sample(options, self.rng.randint(0, min(3, len(options))))
+                self.set_state(widget_id, 'string_array_value', picked)
+        else:
+            widget_id = self.rng.choice(searches)
+            self.set_state(widget_id, 'string_value', self.rng.choice(SEARCH_TERMS + ['']))
+        return action
+
+    async def run(self, deadline, think_time):
+        await self.connect()
+        try:
+            await self.rerun()
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.rng.uniform(0, think_time))
+                self.random_action()
+                await self.rerun()
+        finally:
+            self.close()
+
+
+async def run_level(ws_url, sessions, duration, think_time, pid, sample_interval, seed):
+    stop = asyncio.Event()
+    sampler = ResourceSampler(pid, sample_interval)
+    sampler_task = asyncio.create_task(sampler.run(stop))
+
+    deadline = time.monotonic() + duration
+    clients = [Session(ws_url, random.Random(seed + i)) for i in range(sessions)]
+    started = time.monotonic()
+    results = await asyncio.gather(*(c.run(deadline, think_time) for c in clients),
+                                   return_exceptions=True)
+    elapsed = time.monotonic() - started
+    stop.set()
+    await sampler_task
+
+    # The first rerun of every session is the initial page load
+    initial = [c.latencies[0] for c in clients if c.latencies]
+    reruns = [lat for c in clients for lat in c.latencies[1:]]
+    failures = [repr(r) for r in results if isinstance(r, BaseException)]
+    ms = lambda seconds: round(seconds * 1000, 1)
+    return {
+        'sessions': sessions,
+        'reruns': len(reruns),
+        'reruns_per_sec': round(len(reruns) / elapsed, 2) if elapsed else 0,
+        'initial_load_p50_ms': ms(percentile(initial, 50)),
+        'p50_ms': ms(percentile(reruns, 50)),
+        'p90_ms': ms(percentile(reruns, 90)),
+        'p95_ms': ms(percentile(reruns, 95)),
+        'p99_ms': ms(percentile(reruns, 99)),
+        'max_ms': ms(max(reruns)) if reruns else float('nan'),
+        'script_exceptions': sum(c.errors for c in clients),
+        'session_failures': failures,
+        'cpu_pct_avg': round(sum(s['cpu_pct'] for s in sampler.samples) / len(sampler.samples), 1) if sampler.samples else None,
+        'cpu_pct_max': max((s['cpu_pct'] for s in sampler.samples), default=None),
+        'rss_mb_max': round(max((s['rss_bytes'] for s in sampler.samples), default=0) / 2**20, 1) if sampler.samples else None,
+        'samples': sampler.samples,
+    }
+
+
+def find_degradation(levels, factor):
+    baseline = next((level['p95_ms'] for level in levels if level['reruns']), None)
+    if baseline is None:
+        return None
+    for level in levels:
+        if level['reruns'] and level['p95_ms'] > baseline * factor:
+            return level['sessions']
+    return None
+
+
+def print_report(levels, degraded_at, factor):
+    header = f"{'sessions':>8} {'reruns':>7} {'rr/s':>7} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8} {'cpu%':>6} {'rssMB':>7} {'errors':>6}"
+    print(header)
+    print('-' * len(header))
+    for level in levels:
+        print(f"{level['sessions']:>8} {level['reruns']:>7} {level['reruns_per_sec']:>7} "
+              f"{level['p50_ms']:>8} {level['p90_ms']:>8} {level['p95_ms']:>8} {level['p99_ms']:>8} "
+              f"{level['max_ms']:>8} {level['cpu_pct_avg'] if level['cpu_pct_avg'] is not None else '-':>6} "
+              f"{level['rss_mb_max'] if level['rss_mb_max'] is not None else '-':>7} "
+              f"{level['script_exceptions'] + len(level['session_failures']):>6}")
+    print()
+    if degraded_at is None:
+        print(f"No level exceeded {factor}x the baseline p95 latency.")
+    else:
+        print(f"Latency degrades at {degraded_at} concurrent sessions (p95 > {factor}x baseline).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--levels', default='1,5,10,25',
+                        help='comma-separated concurrent session counts to ramp through')
+    parser.add_argument('--duration', type=float, default=30, help='seconds per level')
+    parser.add_argument('--think-time', type=float, default=1.0,
+                        help='maximum random pause between actions, in seconds')
+    parser.add_argument('--url', help='target an already running app instead of starting one')
+    parser.add_argument('--pid', type=int, help='server pid to sample when using --url')
+    parser.add_argument('--app', default='app.py', help='script to start when --url is not given')
+    parser.add_argument('--sample-interval', type=float, default=1.0)
+    parser.add_argument('--degrade-factor', type=float, default=2.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write the full results, including resource samples, here')
+    args = parser.parse_args()
+
+    server = None
+    pid = args.pid
+    base_url = args.url.rstrip('/') if args.url else None
+    if base_url is None:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'streamlit', 'run', args.app,
+             '--server.headless', 'true', '--server.port', str(port),
+             '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        pid = server.pid
+
+    try:
+        wait_until_healthy(base_url, timeout=60)
+        ws_url = base_url.replace('http', 'ws', 1) + '/_stcore/stream'
+        levels = []
+        for sessions in (int(n) for n in args.levels.split(',')):
+            print(f"Running {sessions} sessions for {args.duration:.0f}s ...", file=sys.stderr)
+            levels.append(asyncio.run(run_level(ws_url, sessions, args.duration, args.think_time,
+                                                pid, args.sample_interval, args.seed)))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    degraded_at = find_degradation(levels, args.degrade_factor)
+    print_report(levels, degraded_at, args.degrade_factor)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'levels': levels, 'degraded_at': degraded_at,
+                       'degrade_factor': args.degrade_factor}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
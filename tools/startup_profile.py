@@ -0,0 +1,169 @@
+"""Startup profile and time-to-first-render budget check for the dashboard.
+
+Two measurements, each in fresh processes:
+
+* an import-time breakdown (``python -X importtime``) of the modules app.py
+  imports at startup, grouped by top-level package, and the share the
+  dashboard's own modules add to streamlit and pandas;
+* a cold start: ``streamlit run app.py`` is launched, and as soon as the
+  server is healthy one session connects and times its first run, until the
+  first element arrives (first paint) and until the run finishes (first
+  render). Times are measured from launching the server.
+
+    python -m tools.startup_profile --runs 3
+
+Exits with status 1 when the median time-to-first-render exceeds
+``--budget`` seconds, so it can guard cold-start regressions.
+"""
+import argparse
+import ast
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.httpclient import HTTPRequest
+from tornado.websocket import websocket_connect
+
+from tools.load_harness import free_port, wait_until_healthy
+
+# Median seconds from launching the server to the end of the first script run
+DEFAULT_BUDGET = 5.0
+# Import seconds the dashboard's own modules may add, as a share of the
+# import seconds of the libraries it builds on, measured in the same process
+IMPORT_BUDGET_RATIO = 0.5
+BASELINE_PACKAGES = ('streamlit', 'pandas')
+
+
+# Modules a script imports at startup: its top-level import statements
+def startup_imports(path):
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+# Cumulative import seconds per top-level package, measured in a fresh interpreter
+def import_profile(modules, cwd):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {', '.join(modules)}"],
+                            cwd=cwd, capture_output=True, text=True, check=True)
+    roots = {module.split('.')[0] for module in modules}
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented under the import that triggered them
+        if name[1:2] == ' ':
+            continue
+        package = name.strip().split('.')[0]
+        if package not in roots:
+            package = '(interpreter startup)'
+        packages[package] = packages.get(package, 0.0) + int(cumulative) / 1e6
+    return dict(sorted(packages.items(), key=lambda item: item[1], reverse=True))
+
+
+# (seconds of the modules next to the script in cwd, seconds of
+# BASELINE_PACKAGES) of an import profile
+def import_split(profile, cwd):
+    own = sum(seconds for package, seconds in profile.items()
+              if os.path.exists(os.path.join(cwd, f'{package}.py')))
+    baseline = sum(profile.get(package, 0.0) for package in BASELINE_PACKAGES)
+    return own, baseline
+
+
+async def first_run(ws_url, started):
+    request = HTTPRequest(ws_url, connect_timeout=10, request_timeout=120)
+    conn = await websocket_connect(request, subprotocols=['streamlit'], max_message_size=256 * 1024 * 1024)
+    try:
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        msg.rerun_script.page_script_hash = ''
+        await conn.write_message(msg.SerializeToString(), binary=True)
+        first_paint = None
+        while True:
+            payload = await conn.read_message()
+            if payload is None:
+                raise ConnectionError('server closed the websocket')
+            fwd = ForwardMsg()
+            fwd.ParseFromString(payload)
+            kind = fwd.WhichOneof('type')
+            if kind == 'delta' and first_paint is None and fwd.delta.WhichOneof('type') == 'new_element':
+                first_paint = time.perf_counter() - started
+            elif kind == 'script_finished':
+                return first_paint, time.perf_counter() - started
+    finally:
+        conn.close()
+
+
+def cold_start(app, cwd, env):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', app,
+         '--server.headless', 'true', '--server.port', str(port),
+         '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false'],
+        cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_healthy(base_url, timeout=60)
+        healthy = time.perf_counter() - started
+        first_paint, first_render = asyncio.run(first_run(base_url.replace('http', 'ws', 1) + '/_stcore/stream', started))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    return {'healthy': healthy, 'first_paint': first_paint, 'first_render': first_render}
+
+
+# Median of every cold-start measurement over several runs
+def median_cold_start(app, cwd, env, runs):
+    samples = [cold_start(app, cwd, env) for _ in range(runs)]
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', default='app.py')
+    parser.add_argument('--runs', type=int, default=3, help='cold starts to take the median of')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help=f"time-to-first-render budget in seconds (default: {DEFAULT_BUDGET})")
+    parser.add_argument('--top', type=int, default=12, help='packages to list in the import breakdown')
+    parser.add_argument('--no-arrow', action='store_true',
+                        help='parse the CSV exports instead of mapping the Arrow files (DASHBOARD_ARROW=0)')
+    args = parser.parse_args()
+
+    cwd = os.path.dirname(os.path.abspath(args.app))
+    env = dict(os.environ, DASHBOARD_ARROW='0') if args.no_arrow else dict(os.environ)
+
+    modules = startup_imports(args.app)
+    profile = import_profile(modules, cwd)
+    print(f"Startup imports of {args.app}: {sum(profile.values()):.3f}s")
+    for package, seconds in list(profile.items())[:args.top]:
+        print(f"  {package:<28} {seconds:8.3f}s")
+    own, baseline = import_split(profile, cwd)
+    print(f"Own modules: {own:.3f}s, {own / baseline if baseline else 0:.2f}x {' + '.join(BASELINE_PACKAGES)} "
+          f"(budget {IMPORT_BUDGET_RATIO:.2f}x)")
+
+    median = median_cold_start(os.path.basename(args.app), cwd, env, args.runs)
+    print(f"\nCold start, median of {args.runs} run(s):")
+    for key, label in (('healthy', 'server healthy'), ('first_paint', 'first paint'), ('first_render', 'first render')):
+        print(f"  {label:<28} {median[key]:8.3f}s")
+
+    first_render = median['first_render']
+    if first_render > args.budget:
+        print(f"\nFAIL: time-to-first-render {first_render:.3f}s exceeds the {args.budget:.3f}s budget")
+        sys.exit(1)
+    print(f"\nOK: time-to-first-render {first_render:.3f}s within the {args.budget:.3f}s budget")
+
+
+if __name__ == '__main__':
+    main()
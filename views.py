@@ -0,0 +1,1550 @@
+"""Spec-driven rendering of the service tabs.
+
+Every service tab (DataFlow, CloudSQL, Kubernetes) is described by a spec in
+``SERVICE_VIEWS``: its results dataset and resource column, the dimensions it
+can be filtered on, extra summed measures (such as Kubernetes node counts),
+the summary tables it offers and the ordered list of panels it shows. Panels
+come from one shared library (``PANELS``); each has a build step that does all
+the pandas work for the filtered rows and a render step that only draws.
+
+``build_view`` runs every build step of a spec once and returns a plain dict
+that the app caches per filter selection (see ``build_service_view`` in
+app.py), so a rerun with unchanged filters only draws. Built views are shared
+across sessions: render steps must never mutate them.
+
+A new service needs a spec here, not another copy of a tab.
+"""
+import importlib.util
+import sys
+
+import pandas as pd
+import streamlit as st
+
+import anomalies
+import clusters
+import data_store
+import facts
+import forecasts
+import labels
+import payload
+import ranking
+import runs
+import timeline
+
+
+# Import a module on first attribute access instead of at startup
+def lazy_import(name):
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# plotly.express is the heaviest import of the app; load it on the first chart
+# so a cold process sends its first elements sooner
+px = lazy_import('plotly.express')
+
+COST_COLORS = {
+    'Current Cost': '#ff4444',
+    'Target Cost': '#44ff44',
+    'Savings': '#4444ff'
+}
+
+# Sidebar filters of a service tab: (column, widget label, widget key suffix)
+FILTERS = [
+    ('region', 'Select Region', 'region'),
+    ('project_id', 'Select Project', 'project'),
+    ('current_machine_type', 'Current Machine Type', 'current_machine'),
+    ('target_machine_type', 'Target Machine Type', 'target_machine'),
+]
+
+COST_COLUMNS = ['current_cost', 'target_cost', 'savings']
+
+# Summary table columns: (source column, aggregation, title)
+COSTS = [
+    ('current_cost', 'sum', 'Current Cost'),
+    ('target_cost', 'sum', 'Target Cost'),
+    ('savings', 'sum', 'Savings'),
+]
+RATES = [
+    ('current_machine_hourly_rate', 'mean', 'Avg Current Rate/hr'),
+    ('target_machine_hourly_rate', 'mean', 'Avg Target Rate/hr'),
+]
+
+# Display format of summary table columns by source column
+COLUMN_FORMATS = {
+    'current_cost': '${:,.2f}',
+    'target_cost': '${:,.2f}',
+    'savings': '${:,.2f}',
+    'current_machine_hourly_rate': '${:.4f}',
+    'target_machine_hourly_rate': '${:.4f}',
+    'node_count': '{:.0f}',
+}
+
+NODES = {'column': 'node_count', 'label': 'Nodes', 'unit': 'node'}
+
+# One spec per service tab. 'resource_count' is 'rows' when every row is a
+# recommendation for its own run of the resource (DataFlow jobs repeat), or
+# 'distinct' when resources are counted by name. 'summaries' are the tabs of
+# the summary tables panel: (tab, {group column: title}, columns).
+# 'capacity_per' names the column counting machines per row (Kubernetes
+# nodes); without it every row is one machine.
+SERVICE_VIEWS = {
+    'dataflow': {
+        'dataset': 'dataflow',
+        'label': 'DataFlow',
+        'resource_column': 'job_name',
+        'resource_label': 'Job',
+        'resource_count': 'rows',
+        'dimensions': FILTERS,
+        'measures': [],
+        'machine_type_top': 15,
+        'export_file': 'cost_optimization_filtered_data.csv',
+        'load_error': "Unable to load DataFlow data. Please check if rightsizing_results_dataflow exists and is properly formatted.",
+        'summaries': [
+            ('By Region', {'region': 'Region'},
+             [('project_id', 'nunique', 'Projects'), ('job_name', 'count', 'Jobs')] + COSTS + RATES),
+            ('By Current Machine', {'current_machine_type': 'Current Machine Type'},
+             [('project_id', 'nunique', 'Projects'), ('job_name', 'count', 'Jobs')] + COSTS),
+            ('By Target Machine', {'target_machine_type': 'Target Machine Type'},
+             [('project_id', 'nunique', 'Projects'), ('job_name', 'count', 'Jobs')] + COSTS),
+            ('By Project', {'project_id': 'Project ID'},
+             [('job_name', 'count', 'Jobs')] + COSTS + [('region', 'first', 'Region')]),
+        ],
+        'insights': ['top_region', 'top_machine_type', 'max_resource'],
+        'panels': [
+            'key_metrics', 'cost_analysis', 'machine_types', 'capacity', 'migration_patterns', 'project_resources',
+            'hourly_rates', 'savings_trend', 'summary_tables', 'data_view', 'recommendation_detail', 'insights',
+        ],
+    },
+    'cloudsql': {
+        'dataset': 'cloudsql',
+        'label': 'CloudSQL',
+        'resource_column': 'resource_name',
+        'resource_label': 'Cluster',
+        'resource_count': 'distinct',
+        'dimensions': FILTERS,
+        'measures': [],
+        'machine_type_top': 10,
+        'load_error': "Unable to load CloudSQL data. Please check if Cloud SQL exists and is properly formatted.",
+        'summaries': [
+            ('By Region', {'region': 'Region'},
+             [('project_id', 'nunique', 'Projects'), ('resource_name', 'nunique', 'Clusters')] + COSTS),
+            ('By Machine Type', {'current_machine_type': 'Current Machine', 'target_machine_type': 'Target Machine'},
+             [('resource_name', 'count', 'Clusters')] + COSTS),
+            ('By Cluster', {'resource_name': 'Cluster', 'project_id': 'Project ID'},
+             COSTS + [('current_machine_type', 'first', 'Current Machine'),
+                      ('target_machine_type', 'first', 'Target Machine')]),
+        ],
+        'insights': ['top_resource', 'top_project'],
+        'panels': [
+            'savings_summary', 'top_resources', 'top_projects', 'additional_analysis', 'machine_types',
+            'capacity', 'savings_trend', 'summary_tables', 'recommendation_detail', 'insights',
+        ],
+    },
+    'kubernetes': {
+        'dataset': 'kubernetes',
+        'label': 'Kubernetes',
+        'resource_column': 'cluster_name',
+        'resource_label': 'Cluster',
+        'resource_count': 'distinct',
+        'dimensions': FILTERS,
+        'measures': [NODES],
+        'capacity_per': 'node_count',
+        'machine_type_top': 10,
+        'load_error': "Unable to load Kubernetes data. Please check if Kubernetes data exists and is properly formatted.",
+        'summaries': [
+            ('By Region', {'region': 'Region'},
+             [('project_id', 'nunique', 'Projects'), ('cluster_name', 'nunique', 'Clusters')] + COSTS
+             + [('node_count', 'sum', 'Total Nodes')]),
+            ('By Machine Type', {'current_machine_type': 'Current Machine', 'target_machine_type': 'Target Machine'},
+             [('cluster_name', 'count', 'Clusters')] + COSTS + [('node_count', 'sum', 'Total Nodes')]),
+            ('By Cluster', {'cluster_name': 'Cluster', 'project_id': 'Project ID'},
+             COSTS + [('current_machine_type', 'first', 'Current Machine'),
+                      ('target_machine_type', 'first', 'Target Machine'),
+                      ('node_count', 'first', 'Nodes')]),
+        ],
+        'insights': ['top_resource', 'top_project'],
+        'panels': [
+            'savings_summary', 'top_resources', 'top_projects', 'additional_analysis', 'machine_types',
+            'capacity', 'node_count', 'savings_trend', 'summary_tables', 'recommendation_detail', 'insights',
+        ],
+    },
+}
+
+
+# Summed columns grouped by any key, computed at most once per view
+class Rollups:
+    def __init__(self, frame, spec):
+        self.frame = frame
+        self.columns = COST_COLUMNS + [measure['column'] for measure in spec['measures']]
+        self._sums = {}
+
+    def sums(self, by):
+        key = tuple(by) if isinstance(by, list) else by
+        if key not in self._sums:
+            self._sums[key] = self.frame.groupby(by, observed=True)[self.columns].sum()
+        return self._sums[key]
+
+
+def _pct(part, whole):
+    return (part / whole * 100) if whole > 0 else 0
+
+
+def totals(spec, frame):
+    current = frame['current_cost'].sum()
+    target = frame['target_cost'].sum()
+    savings = frame['savings'].sum()
+    if spec['resource_count'] == 'rows':
+        resources = len(frame)
+    else:
+        resources = frame[spec['resource_column']].nunique()
+    return {
+        'current_cost': current,
+        'target_cost': target,
+        'savings': savings,
+        # Formula: Savings Percentage = (Savings / Current Cost) * 100
+        'savings_pct': _pct(savings, current),
+        # Formula: Cost Reduction Percentage = ((Current Cost - Target Cost) / Current Cost) * 100
+        'cost_reduction_pct': _pct(current - target, current),
+        'projects': frame['project_id'].nunique(),
+        'resources': resources,
+        'measures': {measure['column']: frame[measure['column']].sum() if measure['column'] in frame.columns else 0
+                     for measure in spec['measures']},
+    }
+
+
+# ---------- Shared figures ----------
+
+def cost_comparison_figure(total):
+    cost_comparison = pd.DataFrame({
+        'Cost Type': ['Current Cost', 'Target Cost', 'Savings'],
+        'Amount': [total['current_cost'], total['target_cost'], total['savings']],
+        'Percentage': ['100%', f"{100 - total['cost_reduction_pct']:.1f}%", f"{total['savings_pct']:.1f}%"]
+    })
+    # Custom text with both amount and percentage
+    cost_comparison['Display Text'] = labels.lines(
+        labels.currency(cost_comparison['Amount']), labels.concat('(', cost_comparison['Percentage'], ')')
+    )
+
+    fig = px.bar(
+        cost_comparison,
+        x='Cost Type',
+        y='Amount',
+        color='Cost Type',
+        color_discrete_map=COST_COLORS,
+        text='Display Text',
+        labels={'Amount': 'Cost (USD)', 'Cost Type': ''}
+    )
+    fig.update_layout(
+        showlegend=False,
+        height=400,
+        yaxis_title="Cost (USD)",
+        title=f"Total Savings: {total['savings_pct']:.2f}% (${total['savings']:,.2f})"
+    )
+    fig.update_traces(textposition='outside', textfont_size=10)
+    return fig
+
+
+def build_region_savings(rollups):
+    region_savings = rollups.sums('region')[['savings', 'current_cost', 'target_cost']].reset_index()
+    region_savings.columns = ['Region', 'Savings', 'Current Cost', 'Target Cost']
+    region_savings['Savings %'] = (region_savings['Savings'] / region_savings['Current Cost'] * 100).round(1)
+    region_savings = region_savings.sort_values('Savings', ascending=False)
+    region_savings['Display Text'] = labels.currency_with_percent(region_savings['Savings'], region_savings['Savings %'])
+    return region_savings
+
+
+def region_savings_figure(region_savings):
+    fig = px.bar(
+        region_savings,
+        x='Region',
+        y='Savings',
+        color='Savings',
+        color_continuous_scale='Viridis',
+        text='Display Text',
+        labels={'Savings': 'Total Savings (USD)', 'Region': 'Region'}
+    )
+    fig.update_traces(textposition='outside')
+    fig.update_layout(height=400, showlegend=False)
+    return fig
+
+
+# ---------- Panels ----------
+
+# Detailed KPI rows: totals, then per-resource averages and hourly rates
+def build_key_metrics(spec, rollups, total):
+    frame = rollups.frame
+    max_savings_row = frame.loc[frame['savings'].idxmax()]
+    avg_current_cost = frame['current_cost'].mean()
+    avg_savings = frame['savings'].mean()
+    avg_current_rate = frame['current_machine_hourly_rate'].mean()
+    avg_target_rate = frame['target_machine_hourly_rate'].mean()
+    return {
+        'avg_savings': avg_savings,
+        'avg_savings_pct': _pct(avg_savings, avg_current_cost),
+        'max_savings': max_savings_row['savings'],
+        'max_savings_pct': _pct(max_savings_row['savings'], max_savings_row['current_cost']),
+        'avg_current_rate': avg_current_rate,
+        'avg_target_rate': avg_target_rate,
+        'rate_reduction_pct': _pct(avg_current_rate - avg_target_rate, avg_current_rate),
+    }
+
+
+def render_key_metrics(spec, view):
+    total, metrics = view['totals'], view['key_metrics']
+    resource_label = spec['resource_label']
+    st.subheader("📊 Key Performance Indicators")
+
+    st.markdown("---")
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+
+    with col1:
+        st.metric(
+            label="Total Current Cost (Monthly)",
+            value=f"${total['current_cost']:,.2f}",
+            delta="100% of spending"
+        )
+
+    with col2:
+        st.metric(
+            label="Total Target Cost (Monthly)",
+            value=f"${total['target_cost']:,.2f}",
+            delta=f"-{total['cost_reduction_pct']:.2f}% reduction"
+        )
+
+    with col3:
+        st.metric(
+            label="Total Savings (Monthly)",
+            value=f"${total['savings']:,.2f}",
+            delta=f"{total['savings_pct']:.2f}% savings"
+        )
+
+    with col4:
+        st.metric(
+            label="Number of Projects",
+            value=total['projects']
+        )
+
+    with col5:
+        st.metric(
+            label=f"Number of {resource_label}s",
+            value=total['resources']
+        )
+
+    st.markdown("---")
+
+    col6, col7, col8, col9 = st.columns(4)
+
+    with col6:
+        st.metric(
+            label=f"Average Savings per {resource_label}",
+            value=f"${metrics['avg_savings']:,.2f}",
+            delta=f"{metrics['avg_savings_pct']:.1f}% avg"
+        )
+
+    with col7:
+        st.metric(
+            label=f"Maximum Savings (Single {resource_label})",
+            value=f"${metrics['max_savings']:,.2f}",
+            delta=f"{metrics['max_savings_pct']:.1f}% reduction"
+        )
+
+    with col8:
+        st.metric(
+            label="Avg Current Hourly Rate",
+            value=f"${metrics['avg_current_rate']:.4f}"
+        )
+
+    with col9:
+        st.metric(
+            label="Avg Target Hourly Rate",
+            value=f"${metrics['avg_target_rate']:.4f}",
+            delta=f"-{metrics['rate_reduction_pct']:.1f}% lower"
+        )
+
+
+# Compact KPI row: totals, resource and project counts, summed measures
+def render_savings_summary(spec, view):
+    total = view['totals']
+    st.subheader(f"📊 {spec['label']} Savings Summary")
+
+    columns = st.columns(5 + len(spec['measures']))
+
+    with columns[0]:
+        st.metric(
+            label="Current Cost (Monthly)",
+            value=f"${total['current_cost']:,.2f}",
+            delta="100% of spending"
+        )
+
+    with columns[1]:
+        st.metric(
+            label="Target Cost (Monthly)",
+            value=f"${total['target_cost']:,.2f}",
+            delta=f"-{total['cost_reduction_pct']:.2f}% reduction"
+        )
+
+    with columns[2]:
+        st.metric(
+            label="Total Savings (Monthly)",
+            value=f"${total['savings']:,.2f}",
+            delta=f"{total['savings_pct']:.2f}% savings"
+        )
+
+    with columns[3]:
+        st.metric(
+            label=f"Number of {spec['resource_label']}s",
+            value=total['resources']
+        )
+
+    with columns[4]:
+        st.metric(
+            label="Number of Projects",
+            value=total['projects']
+        )
+
+    for column, measure in zip(columns[5:], spec['measures']):
+        with column:
+            measure_total = total['measures'][measure['column']]
+            st.metric(
+                label=f"Total {measure['label']}",
+                value=int(measure_total) if measure_total > 0 else 0
+            )
+
+
+# Cost comparison plus savings and costs by region
+def build_cost_analysis(spec, rollups, total):
+    region_costs = rollups.sums('region')[['current_cost', 'target_cost']].reset_index()
+    region_costs_melted = region_costs.melt(
+        id_vars='region',
+        value_vars=['current_cost', 'target_cost'],
+        var_name='Cost Type',
+        value_name='Cost'
+    )
+    region_costs_melted['Cost Type'] = region_costs_melted['Cost Type'].str.replace('_cost', ' Cost').str.title()
+    return {'region_savings': build_region_savings(rollups), 'region_costs': region_costs_melted}
+
+
+def render_cost_analysis(spec, view):
+    data = view['cost_analysis']
+    st.subheader("📈 Cost Analysis & Visualizations")
+
+    st.markdown("### Current vs Target Cost Comparison")
+    payload.plotly_chart(cost_comparison_figure(view['totals']), use_container_width=True)
+
+    col_chart1, col_chart2 = st.columns(2)
+
+    with col_chart1:
+        st.markdown("### Savings by Region")
+        payload.plotly_chart(region_savings_figure(data['region_savings']), use_container_width=True)
+
+    with col_chart2:
+        st.markdown("### Cost Breakdown by Region")
+        fig_region_cost = px.bar(
+            data['region_costs'],
+            x='region',
+            y='Cost',
+            color='Cost Type',
+            barmode='group',
+            color_discrete_map=COST_COLORS,
+            labels={'Cost': 'Cost (USD)', 'region': 'Region'}
+        )
+        fig_region_cost.update_layout(height=400)
+        payload.plotly_chart(fig_region_cost, use_container_width=True)
+
+
+# Cost comparison and savings by region, side by side
+def build_additional_analysis(spec, rollups, total):
+    return build_region_savings(rollups)
+
+
+def render_additional_analysis(spec, view):
+    label = spec['label']
+    st.subheader(f"📈 Additional {label} Analysis")
+
+    col_chart1, col_chart2 = st.columns(2)
+
+    with col_chart1:
+        st.markdown(f"### {label} Cost Comparison")
+        payload.plotly_chart(cost_comparison_figure(view['totals']), use_container_width=True)
+
+    with col_chart2:
+        st.markdown(f"### {label} Savings by Region")
+        payload.plotly_chart(region_savings_figure(view['additional_analysis']), use_container_width=True)
+
+
+# Top 10 resources by savings, chart and table
+def build_top_resources(spec, rollups, total):
+    resource_label = spec['resource_label']
+    measures = [measure['label'] for measure in spec['measures']]
+    # Query equivalent: GROUP BY resource, ORDER BY savings DESC, LIMIT 10
+    top = rollups.sums(spec['resource_column'])[['target_cost', 'current_cost', 'savings'] + [
+        measure['column'] for measure in spec['measures']]].reset_index()
+    top.columns = [resource_label, 'Estimated', 'Actual', 'Savings'] + measures
+    top = ranking.top_k(top, 'Savings', 10)
+    top['Savings %'] = (top['Savings'] / top['Actual'] * 100).round(2)
+    top['Display Text'] = labels.currency_with_percent(top['Savings'], top['Savings %'])
+    return top
+
+
+def render_top_resources(spec, view):
+    resource_label = spec['resource_label']
+    measures = [measure['label'] for measure in spec['measures']]
+    top = view['top_resources']
+    st.subheader(f"🏆 {spec['label']} Top 10 Savings by {resource_label}")
+
+    col_chart1, col_chart2 = st.columns(2)
+
+    with col_chart1:
+        fig = px.bar(
+            top,
+            x='Savings',
+            y=resource_label,
+            orientation='h',
+            color='Savings',
+            color_continuous_scale='Blues',
+            text='Display Text',
+            labels={'Savings': 'Savings (USD)', resource_label: f"{resource_label} Name"},
+            title=f"Top 10 {resource_label}s by Savings",
+            hover_data=measures + ['Actual', 'Estimated'] if measures else None
+        )
+        fig.update_traces(textposition='outside')
+        fig.update_layout(height=500, showlegend=False, yaxis={'categoryorder': 'total ascending'})
+        payload.plotly_chart(fig, use_container_width=True)
+
+    with col_chart2:
+        st.markdown(f"#### Detailed {resource_label} Savings")
+        payload.dataframe(
+            top[[resource_label] + measures + ['Actual', 'Estimated', 'Savings', 'Savings %']],
+            formats={
+                'Actual': '${:,.2f}',
+                'Estimated': '${:,.2f}',
+                'Savings': '${:,.2f}',
+                'Savings %': '{:.2f}%',
+                **{measure: '{:.0f}' for measure in measures}
+            },
+            name=f"Detailed {resource_label} Savings",
+            use_container_width=True,
+            height=500
+        )
+
+
+# Top 3 projects by savings, chart and table
+def build_top_projects(spec, rollups, total):
+    resources = f"{spec['resource_label']}s"
+    measures = [measure['label'] for measure in spec['measures']]
+    # Query equivalent: GROUP BY project_id, ORDER BY savings DESC, LIMIT 3
+    sums = rollups.sums('project_id')
+    top = sums[['target_cost', 'current_cost', 'savings']].copy()
+    top[resources] = rollups.frame.groupby('project_id', observed=True)[spec['resource_column']].count()
+    for measure in spec['measures']:
+        top[measure['label']] = sums[measure['column']]
+    top = top.reset_index()
+    top.columns = ['Project ID', 'Estimated', 'Actual', 'Savings', resources] + measures
+    top = ranking.top_k(top, 'Savings', 3)
+    top['Savings %'] = (top['Savings'] / top['Actual'] * 100).round(2)
+    top['Display Text'] = labels.currency_with_percent(top['Savings'], top['Savings %'])
+    return top
+
+
+def render_top_projects(spec, view):
+    resources = f"{spec['resource_label']}s"
+    measures = [measure['label'] for measure in spec['measures']]
+    top = view['top_projects']
+    st.subheader(f"🎯 {spec['label']} Top 3 Savings by Project")
+
+    col_chart1, col_chart2 = st.columns(2)
+
+    with col_chart1:
+        fig = px.bar(
+            top,
+            x='Savings',
+            y='Project ID',
+            orientation='h',
+            color='Savings',
+            color_continuous_scale='Greens',
+            text='Display Text',
+            labels={'Savings': 'Savings (USD)', 'Project ID': 'Project ID'},
+            title="Top 3 Projects by Savings",
+            hover_data=[resources] + measures + ['Actual', 'Estimated']
+        )
+        fig.update_traces(textposition='outside')
+        fig.update_layout(height=400, showlegend=False, yaxis={'categoryorder': 'total ascending'})
+        payload.plotly_chart(fig, use_container_width=True)
+
+    with col_chart2:
+        st.markdown("#### Detailed Project Savings")
+        payload.dataframe(
+            top[['Project ID', resources] + measures + ['Actual', 'Estimated', 'Savings', 'Savings %']],
+            formats={
+                'Actual': '${:,.2f}',
+                'Estimated': '${:,.2f}',
+                'Savings': '${:,.2f}',
+                'Savings %': '{:.2f}%',
+                **{measure: '{:.0f}' for measure in measures}
+            },
+            name="Detailed Project Savings",
+            use_container_width=True,
+            height=400
+        )
+
+
+# Cost by current and target machine type
+def build_machine_types(spec, rollups, total):
+    top = spec['machine_type_top']
+    measures = [measure['column'] for measure in spec['measures']]
+    current = rollups.sums('current_machine_type')[['current_cost', 'savings'] + measures].reset_index()
+    current = ranking.top_with_other(current, 'current_cost', top, 'current_machine_type',
+                                     ['current_cost', 'savings'] + measures)
+    target = rollups.sums('target_machine_type')[['target_cost', 'savings'] + measures].reset_index()
+    target = ranking.top_with_other(target, 'target_cost', top, 'target_machine_type',
+                                    ['target_cost', 'savings'] + measures)
+    return {'current_machine_type': current, 'target_machine_type': target}
+
+
+def render_machine_types(spec, view):
+    top = spec['machine_type_top']
+    measures = [measure['column'] for measure in spec['measures']]
+    st.markdown("### 🖥️ Machine Type Analysis")
+
+    charts = (
+        ('current', 'Current', 'Reds'),
+        ('target', 'Target', 'Greens'),
+    )
+    for column, (side, title, scale) in zip(st.columns(2), charts):
+        with column:
+            st.markdown(f"#### {title} Machine Types - Cost Distribution")
+            machine_cost = view['machine_types'][f'{side}_machine_type']
+            fig = px.bar(
+                machine_cost,
+                x=f'{side}_machine_type',
+                y=f'{side}_cost',
+                color='savings',
+                color_continuous_scale=scale,
+                text=labels.currency(machine_cost[f'{side}_cost']),
+                labels={
+                    f'{side}_cost': f'{title} Cost (USD)',
+                    f'{side}_machine_type': f'{title} Machine Type',
+                    'savings': 'Savings'
+                },
+                title=f"Top {top} {title} Machine Types" if top else None,
+                hover_data=measures or None
+            )
+            fig.update_traces(textposition='outside')
+            fig.update_layout(height=400, showlegend=True, xaxis_tickangle=-45)
+            payload.plotly_chart(fig, use_container_width=True)
+
+
+# vCPUs and memory before and after rightsizing, in total and per machine
+# family, from the machine specs of the catalog (see catalog.py)
+def build_capacity(spec, rollups, total):
+    frame = rollups.frame
+    if not set(facts.CAPACITY_COLUMNS) <= set(frame.columns):
+        return None
+    machines = frame[spec['capacity_per']].fillna(0) if spec.get('capacity_per') else 1
+    sides = []
+    for side, title in (('current', 'Current'), ('target', 'Target')):
+        capacity = pd.DataFrame({
+            'family': frame[f'{side}_family'],
+            'vCPUs': frame[f'{side}_vcpus'] * machines,
+            'Memory (GB)': frame[f'{side}_memory_gb'] * machines,
+        })
+        by_family = capacity.groupby('family', observed=True).sum().reset_index()
+        by_family.insert(1, 'side', title)
+        sides.append(by_family)
+    unknown = frame['current_vcpus'].isna() | frame['target_vcpus'].isna()
+    return {
+        'by_family': pd.concat(sides, ignore_index=True),
+        'totals': {side: {column: (frame[f'{side}_{column}'] * machines).sum() for column in ('vcpus', 'memory_gb')}
+                   for side in ('current', 'target')},
+        'unknown': int(unknown.sum()),
+    }
+
+
+def render_capacity(spec, view):
+    capacity = view['capacity']
+    if capacity is None:
+        return
+    st.markdown("### 🧮 Capacity Before and After")
+    current, target = capacity['totals']['current'], capacity['totals']['target']
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(label="Current vCPUs", value=f"{current['vcpus']:,.1f}")
+    with col2:
+        st.metric(label="Target vCPUs", value=f"{target['vcpus']:,.1f}",
+                  delta=f"{_pct(target['vcpus'] - current['vcpus'], current['vcpus']):+.1f}%")
+    with col3:
+        st.metric(label="Current Memory", value=f"{current['memory_gb']:,.1f} GB")
+    with col4:
+        st.metric(label="Target Memory", value=f"{target['memory_gb']:,.1f} GB",
+                  delta=f"{_pct(target['memory_gb'] - current['memory_gb'], current['memory_gb']):+.1f}%")
+
+    for column, measure in zip(st.columns(2), ('vCPUs', 'Memory (GB)')):
+        with column:
+            fig = px.bar(
+                capacity['by_family'],
+                x='family',
+                y=measure,
+                color='side',
+                barmode='group',
+                color_discrete_map={'Current': COST_COLORS['Current Cost'], 'Target': COST_COLORS['Target Cost']},
+                labels={'family': 'Machine Family', 'side': ''},
+                title=f"{measure} by Machine Family"
+            )
+            fig.update_layout(height=400)
+            payload.plotly_chart(fig, use_container_width=True)
+
+    if spec.get('capacity_per'):
+        st.caption(f"Capacity counts every machine: machine specs times {spec['capacity_per'].replace('_', ' ')}.")
+    if capacity['unknown']:
+        st.caption(f"{capacity['unknown']:,} recommendation(s) with a machine type missing from the catalog are not counted.")
+
+
+# Savings against current cost of every current -> target machine pair
+def build_migration_patterns(spec, rollups, total):
+    frame = rollups.frame
+    migration_pattern = rollups.sums(['current_machine_type', 'target_machine_type'])[
+        ['savings', 'current_cost', 'target_cost']].copy()
+    migration_pattern.insert(1, 'count', frame.groupby(['current_machine_type', 'target_machine_type'],
+                                                       observed=True)['savings'].count())
+    migration_pattern = migration_pattern.reset_index()
+    migration_pattern.columns = ['Current Machine', 'Target Machine', 'Total Savings', 'Count', 'Current Cost', 'Target Cost']
+    return migration_pattern.sort_values('Total Savings', ascending=False)
+
+
+def render_migration_patterns(spec, view):
+    st.markdown("#### Machine Type Migration Patterns")
+    fig = px.scatter(
+        view['migration_patterns'],
+        x='Current Cost',
+        y='Total Savings',
+        size='Count',
+        color='Current Machine',
+        hover_data=['Target Machine', 'Count'],
+        labels={
+            'Current Cost': 'Current Cost (USD)',
+            'Total Savings': 'Total Savings (USD)',
+            'Count': 'Number of Migrations'
+        },
+        title="Migration Impact: Current Cost vs Savings"
+    )
+    fig.update_layout(height=500)
+    payload.plotly_chart(fig, use_container_width=True)
+
+
+# Top 15 projects and top 20 single recommendations by savings
+def build_project_resources(spec, rollups, total):
+    resource_column = spec['resource_column']
+    project_savings = rollups.sums('project_id')[['savings', 'current_cost']].copy()
+    project_savings['count'] = rollups.frame.groupby('project_id', observed=True)[resource_column].count()
+    project_savings = project_savings.reset_index()
+    project_savings.columns = ['Project ID', 'Total Savings', 'Current Cost', f"{spec['resource_label']} Count"]
+    project_savings = ranking.top_with_other(project_savings, 'Total Savings', 15, 'Project ID',
+                                             ['Total Savings', 'Current Cost', f"{spec['resource_label']} Count"])
+    resource_savings = ranking.top_with_other(
+        rollups.frame[[resource_column, 'savings', 'current_cost', 'target_cost', 'project_id']],
+        'savings', 20, resource_column, ['savings', 'current_cost', 'target_cost'])
+    return {'projects': project_savings, 'resources': resource_savings}
+
+
+def render_project_resources(spec, view):
+    resource_column, resource_label = spec['resource_column'], spec['resource_label']
+    data = view['project_resources']
+    st.markdown(f"### 📋 Project & {resource_label} Level Analysis")
+
+    col_chart1, col_chart2 = st.columns(2)
+
+    with col_chart1:
+        st.markdown("#### Top Projects by Savings")
+        project_savings = data['projects']
+        fig_projects = px.bar(
+            project_savings,
+            x='Total Savings',
+            y='Project ID',
+            orientation='h',
+            color='Total Savings',
+            color_continuous_scale='Blues',
+            text=labels.currency(project_savings['Total Savings']),
+            labels={'Total Savings': 'Total Savings (USD)', 'Project ID': 'Project ID'}
+        )
+        fig_projects.update_traces(textposition='outside')
+        fig_projects.update_layout(height=500, showlegend=False)
+        payload.plotly_chart(fig_projects, use_container_width=True)
+
+    with col_chart2:
+        st.markdown(f"#### Top {resource_label}s by Savings")
+        resource_savings = data['resources']
+        fig_resources = px.bar(
+            resource_savings,
+            x='savings',
+            y=resource_column,
+            orientation='h',
+            color='savings',
+            color_continuous_scale='Oranges',
+            text=labels.currency(resource_savings['savings']),
+            labels={'savings': 'Savings (USD)', resource_column: f"{resource_label} Name"},
+            hover_data=['project_id', 'current_cost', 'target_cost']
+        )
+        fig_resources.update_traces(textposition='outside')
+        fig_resources.update_layout(height=500, showlegend=False)
+        payload.plotly_chart(fig_resources, use_container_width=True)
+
+
+# Distribution of current against target hourly rates
+def build_hourly_rates(spec, rollups, total):
+    rate_comparison = rollups.frame[['current_machine_hourly_rate', 'target_machine_hourly_rate']].melt(
+        var_name='Rate Type',
+        value_name='Hourly Rate'
+    )
+    rate_comparison['Rate Type'] = rate_comparison['Rate Type'].str.replace('_machine_hourly_rate', '').str.replace('_', ' ').str.title()
+    return rate_comparison
+
+
+def render_hourly_rates(spec, view):
+    st.markdown("### 📊 Hourly Rates Analysis")
+
+    st.markdown("#### Current vs Target Hourly Rates")
+    fig_rates = px.box(
+        view['hourly_rates'],
+        x='Rate Type',
+        y='Hourly Rate',
+        color='Rate Type',
+        color_discrete_map={
+            'Current Machine Hourly Rate': '#ff4444',
+            'Target Machine Hourly Rate': '#44ff44'
+        },
+        labels={'Hourly Rate': 'Hourly Rate (USD)'}
+    )
+    fig_rates.update_layout(height=400, showlegend=False)
+    payload.plotly_chart(fig_rates, use_container_width=True)
+
+
+# Node count of the 15 largest clusters, the count, nodes and savings of the
+# rest, and average nodes per cluster of each project. The rest are not one
+# "Other" bar: their summed nodes would dwarf every cluster on the chart.
+def build_node_count(spec, rollups, total):
+    frame, resource_column = rollups.frame, spec['resource_column']
+    node_dist = frame.groupby(resource_column, observed=True).agg({
+        'node_count': 'first',
+        'savings': 'sum'
+    }).reset_index()
+    top = ranking.top_k(node_dist, 'node_count', 15)
+    rest = node_dist.drop(index=top.index)
+    others = None
+    if len(rest):
+        others = {'count': len(rest), 'node_count': rest['node_count'].sum(), 'savings': rest['savings'].sum()}
+    project_nodes = frame.groupby('project_id', observed=True).agg({
+        'node_count': 'mean',
+        resource_column: 'count',
+        'savings': 'sum'
+    }).reset_index()
+    project_nodes.columns = ['Project ID', 'Avg Nodes', f"{spec['resource_label']}s", 'Savings']
+    project_nodes = project_nodes.sort_values('Avg Nodes', ascending=False)
+    return {'clusters': top, 'others': others, 'projects': project_nodes}
+
+
+def render_node_count(spec, view):
+    resource_column, resource_label = spec['resource_column'], spec['resource_label']
+    data = view['node_count']
+    st.markdown("### 📊 Node Count Analysis")
+    col_chart1, col_chart2 = st.columns(2)
+
+    with col_chart1:
+        st.markdown(f"#### {resource_label}s by Node Count")
+        fig_nodes = px.bar(
+            data['clusters'],
+            x='node_count',
+            y=resource_column,
+            orientation='h',
+            color='savings',
+            color_continuous_scale='Purples',
+            labels={
+                'node_count': 'Number of Nodes',
+                resource_column: f"{resource_label} Name",
+                'savings': 'Savings (USD)'
+            },
+            title=f"Top 15 {resource_label}s by Node Count"
+        )
+        fig_nodes.update_layout(height=500, showlegend=True, yaxis={'categoryorder': 'total ascending'})
+        payload.plotly_chart(fig_nodes, use_container_width=True)
+        others = data['others']
+        if others:
+            st.caption(f"Not shown: {others['count']:,} more {resource_label.lower()}s with "
+                       f"{others['node_count']:,.0f} nodes and ${others['savings']:,.2f} savings.")
+
+    with col_chart2:
+        st.markdown(f"#### Average Nodes per {resource_label} by Project")
+        fig_avg_nodes = px.bar(
+            data['projects'],
+            x='Avg Nodes',
+            y='Project ID',
+            orientation='h',
+            color='Savings',
+            color_continuous_scale='Oranges',
+            labels={
+                'Avg Nodes': f'Average Nodes per {resource_label}',
+                'Project ID': 'Project ID',
+                'Savings': 'Total Savings (USD)'
+            },
+            title=f"Average Nodes per {resource_label} by Project",
+            hover_data=[f"{resource_label}s"]
+        )
+        fig_avg_nodes.update_layout(height=500, showlegend=True, yaxis={'categoryorder': 'total ascending'})
+        payload.plotly_chart(fig_avg_nodes, use_container_width=True)
+
+
+# Costs and savings over created_at at every resolution, resampled once per filter state
+def build_savings_trend(spec, rollups, total):
+    if timeline.TIME_COLUMN not in rollups.frame.columns:
+        return None
+    return timeline.savings_trends(rollups.frame)
+
+
+def render_savings_trend(spec, view):
+    st.markdown("### 📅 Savings Over Time")
+    trends = view['savings_trend']
+    if trends is None or not trends['Daily']['recommendations'].sum():
+        st.info(f"No {spec['label']} recommendation has a creation date.")
+        return
+    resolution = st.radio("Resolution", list(timeline.FREQUENCIES), horizontal=True,
+                          key=f"{spec['dataset']}_trend_resolution")
+    trend = trends[resolution]
+    undated = len(view['frame']) - int(trend['recommendations'].sum())
+    fig = px.line(
+        trend,
+        x='period',
+        y=['current_cost', 'target_cost', 'savings'],
+        markers=True,
+        color_discrete_sequence=[COST_COLORS['Current Cost'], COST_COLORS['Target Cost'], COST_COLORS['Savings']],
+        labels={'period': 'Created', 'value': 'Cost (USD)', 'variable': ''},
+        title=f"{resolution} Cost and Savings by Creation Date",
+        hover_data={'recommendations': True}
+    )
+    fig.update_layout(height=400)
+    payload.plotly_chart(fig, use_container_width=True)
+    if undated:
+        st.caption(f"{undated:,} recommendation(s) without a creation date are not shown.")
+    if st.session_state.get(f"{spec['dataset']}_latest"):
+        st.caption("Only the latest recommendation of every resource in the selected dates is counted. Switch off "
+                   "\"Latest recommendation per resource\" to include the runs it superseded.")
+
+
+# One tab per entry of the spec's 'summaries'
+def build_summary_tables(spec, rollups, total):
+    tables = []
+    for _, group_titles, columns in spec['summaries']:
+        summary = rollups.frame.groupby(list(group_titles), observed=True).agg(
+            **{title: (column, how) for column, how, title in columns}
+        ).reset_index().rename(columns=group_titles)
+        summary['Savings %'] = (summary['Savings'] / summary['Current Cost'] * 100).round(2)
+        tables.append(summary.sort_values('Savings', ascending=False))
+    return tables
+
+
+def render_summary_tables(spec, view):
+    st.subheader(f"📋 {spec['label']} Detailed Summary Tables")
+
+    summary_tabs = st.tabs([tab for tab, _, _ in spec['summaries']])
+    for summary_tab, (tab, _, columns), summary in zip(summary_tabs, spec['summaries'], view['summary_tables']):
+        with summary_tab:
+            formats = {title: COLUMN_FORMATS[column] for column, _, title in columns if column in COLUMN_FORMATS}
+            formats['Savings %'] = '{:.1f}%'
+            payload.dataframe(summary, formats=formats, name=f"{tab} summary", use_container_width=True)
+
+
+# Searchable, column-selectable table of the filtered rows with CSV export
+def render_data_view(spec, view):
+    filtered = view['frame']
+    resource_column, resource_label = spec['resource_column'], spec['resource_label']
+    st.subheader("🔍 Complete Data View")
+
+    search_term = st.text_input(f"Search in data ({resource_label} Name, Project ID, etc.)", "")
+
+    display_df = filtered
+    if search_term:
+        mask = (
+            filtered[resource_column].str.contains(search_term, case=False, na=False) |
+            filtered['project_id'].str.contains(search_term, case=False, na=False) |
+            filtered['current_machine_type'].str.contains(search_term, case=False, na=False) |
+            filtered['target_machine_type'].str.contains(search_term, case=False, na=False)
+        )
+        display_df = filtered[mask]
+
+    default_cols = ['project_id', resource_column, 'current_machine_type', 'target_machine_type',
+                    'region', 'current_cost', 'target_cost', 'savings']
+    selected_cols = st.multiselect("Select columns to display", filtered.columns.tolist(), default=default_cols)
+
+    if selected_cols:
+        display_df = display_df[selected_cols]
+
+    # Savings percentage right after savings, when the cost columns are shown
+    if 'current_cost' in display_df.columns and 'savings' in display_df.columns:
+        display_df = display_df.assign(**{'Savings %': (display_df['savings'] / display_df['current_cost'] * 100).round(2)})
+        cols = [col for col in display_df.columns if col != 'Savings %']
+        cols.insert(cols.index('savings') + 1, 'Savings %')
+        display_df = display_df[cols]
+
+    format_dict = {
+        'current_cost': '${:,.2f}',
+        'target_cost': '${:,.2f}',
+        'savings': '${:,.2f}',
+        'current_machine_hourly_rate': '${:.4f}',
+        'target_machine_hourly_rate': '${:.4f}'
+    }
+    if 'Savings %' in display_df.columns:
+        format_dict['Savings %'] = '{:.2f}%'
+
+    payload.dataframe(
+        display_df,
+        formats=format_dict,
+        name="Data View",
+        use_container_width=True,
+        height=400
+    )
+
+    st.download_button(
+        label="📥 Download Filtered Data as CSV",
+        data=display_df.to_csv(index=False).encode('utf-8'),
+        file_name=spec.get('export_file', f"{spec['dataset']}_filtered_data.csv"),
+        mime='text/csv'
+    )
+
+
+# Workload clusters of the filtered rows, from the dataset's cluster labels
+# (by source row) and centers (see clusters.py)
+def build_clusters(spec, frame, cluster_labels, centers):
+    features = clusters.feature_frame(frame)
+    rows = pd.concat([frame[[spec['resource_column'], 'project_id']], features], axis=1)
+    rows['cluster'] = cluster_labels.reindex(frame.index)
+    grouped = rows.groupby('cluster', observed=True)
+    profile = pd.DataFrame({
+        'Resources': grouped.size(),
+        'Current Cost': grouped['current_cost'].sum(),
+        'Savings': frame['savings'].groupby(rows['cluster'], observed=True).sum(),
+    })
+    for column in features.columns:
+        if column != 'current_cost':
+            profile[f"Avg {clusters.FEATURE_LABELS[column]}"] = grouped[column].mean()
+    return {'rows': rows, 'profile': profile.reset_index(), 'centers': centers}
+
+
+def render_clusters(spec, view):
+    st.subheader(f"🧩 {spec['label']} Workload Clusters")
+    rows = view['rows']
+    if rows['cluster'].isna().all():
+        st.info(f"No {spec['label']} rows to cluster.")
+        return
+    size = 'node_count' if 'node_count' in rows.columns else None
+    fig = px.scatter(
+        rows,
+        x='current_cost',
+        y='savings_ratio',
+        color='cluster',
+        size=size,
+        log_x=True,
+        category_orders={'cluster': list(view['centers'].index)},
+        hover_data=[spec['resource_column'], 'project_id'],
+        labels={'current_cost': 'Current Cost (USD)', 'savings_ratio': 'Savings Ratio', 'cluster': 'Cluster'},
+        title="Resources by Cost and Savings Ratio"
+    )
+    fig.update_layout(height=450)
+    payload.plotly_chart(fig, use_container_width=True)
+
+    money = '${:,.2f}'
+    formats = {'Current Cost': money, 'Savings': money, 'Avg Current Rate/hr': '${:.4f}',
+               'Avg Savings Ratio': '{:.1%}', 'Avg Nodes': '{:.1f}', 'Avg Predicted CPU': '{:.2f}',
+               'Avg Predicted Memory (GB)': '{:.2f}'}
+    payload.dataframe(view['profile'], formats=formats, name="Cluster profile", use_container_width=True,
+                      hide_index=True)
+    st.caption("Clusters are learned from every row of the dataset; the table covers the filtered rows.")
+
+
+# Overview cost anomalies: the flagged service and project totals and
+# resources. Scoring fits an isolation forest (scikit-learn), so it only runs
+# once switched on: detect() then gives {level: {'rows', 'flagged'}} (see
+# anomaly_view in app.py).
+def render_anomalies(detect):
+    st.subheader("🚨 Cost Anomalies")
+    if not st.toggle("Detect cost anomalies", key='overview_anomalies'):
+        st.caption("Scores every service, project and resource against its service's peers; "
+                   "switch on to run it.")
+        return
+    view = detect()
+    tabs = st.tabs(["Projects", "Resources"])
+    levels = [
+        ('projects', 'project', ['service', 'project_id'], 'Actual', 'Estimated'),
+        ('resources', 'resource', ['service', 'project_id', 'resource'], 'Current Cost', 'Target Cost'),
+    ]
+    for tab, (level, noun, keys, actual, estimated) in zip(tabs, levels):
+        with tab:
+            rows = view[level]['rows']
+            flagged = view[level]['flagged']
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric(f"Flagged {noun.title()}s", f"{len(flagged):,}",
+                          help=f"Out of {rows:,} {noun} rows in the selection")
+            with col2:
+                st.metric(f"{actual} of Flagged", f"${flagged['actual'].sum():,.2f}")
+            if flagged.empty:
+                st.info(f"No {noun} in this selection stands out.")
+                continue
+            table = flagged[keys + ['actual', 'estimated', 'z_ratio', 'z_peer', 'anomaly_score', 'reason']].rename(
+                columns={'actual': actual, 'estimated': estimated, 'z_ratio': 'Z vs Estimate',
+                         'z_peer': 'Z vs Peers', 'anomaly_score': 'Anomaly Score', 'reason': 'Reason'})
+            money = '${:,.2f}'
+            payload.dataframe(
+                table,
+                formats={actual: money, estimated: money, 'Z vs Estimate': '{:.2f}', 'Z vs Peers': '{:.2f}',
+                         'Anomaly Score': '{:.3f}'},
+                name=f"Cost Anomalies ({noun.title()}s)",
+                use_container_width=True,
+                hide_index=True,
+                height=400
+            )
+    st.caption(f"Robust z-scores against the same service: a row is flagged beyond ±{anomalies.Z_THRESHOLD} "
+               f"or when an isolation forest isolates it (about {anomalies.CONTAMINATION:.0%} of rows). "
+               "Scored on the latest recommendation of every resource.")
+
+
+# Forecast grouping label -> forecasts.savings_forecast by
+FORECAST_GROUPINGS = {'Service': 'service', 'Project': ('service', 'project_id')}
+
+
+# Overview savings forecast of cumulative monthly savings, computed once
+# switched on. forecast(by) gives forecasts.savings_forecast of the filtered
+# rows for a key of FORECAST_GROUPINGS; the chart shows the top series by
+# forecast.
+def render_savings_forecast(forecast, top=10):
+    st.subheader("🔮 Savings Forecast")
+    if not st.toggle("Forecast savings", key='overview_forecast'):
+        st.caption(f"Projects the cumulative savings of every service or project "
+                   f"{forecasts.FORECAST_MONTHS} months ahead; switch on to run it.")
+        return
+    grouping = st.radio("Forecast by", list(FORECAST_GROUPINGS), horizontal=True, key='overview_forecast_by')
+    keys = FORECAST_GROUPINGS[grouping]
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    result = forecast(FORECAST_GROUPINGS[grouping])
+    if result['resolution'] is None:
+        st.info(f"A forecast needs creation dates spanning at least {forecasts.MIN_PERIODS} days; "
+                f"this selection spans {result['periods']}.")
+        return
+
+    fit = result['fit']
+    horizon = result['forecast']['month'].max()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Cumulative Savings to Date", f"${fit['cumulative'].sum():,.2f}")
+    with col2:
+        gain = fit['projected'].sum() - fit['cumulative'].sum()
+        st.metric(f"Forecast by End of {horizon:%b %Y}", f"${fit['projected'].sum():,.2f}",
+                  delta=f"{'-' if gain < 0 else '+'}${abs(gain):,.2f}")
+    with col3:
+        st.metric("Trend", f"${fit['trend_per_month'].sum():,.2f}/month")
+
+    shown = fit.head(top)[keys]
+    history = result['history'].merge(shown, on=keys)
+    projected = result['forecast'].merge(shown, on=keys)
+    # The forecast line starts from the last actual point of its series
+    start = history.groupby(keys, observed=True).tail(1)
+    chart = pd.concat([
+        history.assign(kind='Actual', lower=history['cumulative'], upper=history['cumulative']),
+        start.assign(kind='Forecast', lower=start['cumulative'], upper=start['cumulative']),
+        projected.assign(kind='Forecast'),
+    ], ignore_index=True)
+    chart['series'] = chart[keys].astype(str).agg(' / '.join, axis=1)
+    chart['error_plus'] = chart['upper'] - chart['cumulative']
+    chart['error_minus'] = chart['cumulative'] - chart['lower']
+    fig = px.line(
+        chart,
+        x='as_of',
+        y='cumulative',
+        color='series',
+        line_dash='kind',
+        markers=True,
+        error_y='error_plus',
+        error_y_minus='error_minus',
+        labels={'as_of': 'As of', 'cumulative': 'Cumulative Monthly Savings (USD)', 'series': grouping,
+                'kind': ''},
+        title=f"Cumulative Savings and Forecast by {grouping}" + (f" (top {top})" if len(fit) > top else "")
+    )
+    fig.update_layout(height=450)
+    payload.plotly_chart(fig, use_container_width=True)
+
+    money = '${:,.2f}'
+    projected_label = f"Forecast by End of {horizon:%b %Y}"
+    table = fit.rename(columns={'service': 'Service', 'project_id': 'Project', 'periods': 'Periods',
+                                'cumulative': 'Cumulative Savings', 'trend_per_month': 'Trend/Month',
+                                'projected': projected_label})
+    payload.dataframe(
+        table,
+        formats={'Cumulative Savings': money, 'Trend/Month': money, projected_label: money},
+        name=f"Savings Forecast by {grouping}",
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption(f"A least-squares line through each series' cumulative savings, fitted on "
+               f"{result['periods']} {result['resolution'].lower()} periods; error bars are approximate 95% "
+               "prediction intervals. Services reported only as totals in overview.csv have no creation "
+               "dates and are not forecast.")
+
+
+# Two runs of a service tab, told apart by the day of created_at, compared
+# resource by resource. compare(before, after) gives {'changes': one row per
+# resource, 'summary': per change} for the filtered resources (see runs.py).
+def render_run_changes(spec, days, compare):
+    st.subheader(f"🔁 {spec['label']} Run-over-Run Changes")
+    if len(days) < 2:
+        st.info(f"Only one {spec['label']} run is loaded; changes appear once a later run adds recommendations.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        before = st.selectbox("Earlier run", days[:-1], index=len(days) - 2, key=f"{spec['dataset']}_run_before")
+    with col2:
+        later = [day for day in days if day > before]
+        after = st.selectbox("Later run", later, index=len(later) - 1, key=f"{spec['dataset']}_run_after")
+
+    comparison = compare(before, after)
+    summary = comparison['summary']
+    for column, change in zip(st.columns(len(runs.CHANGES)), runs.CHANGES):
+        moved = summary.at[change, 'savings_delta']
+        with column:
+            st.metric(
+                label=change,
+                value=f"{summary.at[change, 'resources']:,}",
+                delta=f"{'-' if moved < 0 else '+'}${abs(moved):,.2f} savings" if change != runs.UNCHANGED else None
+            )
+
+    shown = st.multiselect("Show changes", runs.CHANGES, default=[change for change in runs.CHANGES if change != runs.UNCHANGED],
+                           key=f"{spec['dataset']}_run_changes")
+    changes = comparison['changes']
+    changes = changes[changes['change'].isin(shown)]
+    money = '${:,.2f}'
+    payload.dataframe(
+        changes.rename(columns={'resource': spec['resource_column']}),
+        formats={'savings_before': money, 'savings_after': money, 'savings_delta': money},
+        name="Run-over-Run Changes",
+        use_container_width=True,
+        height=400
+    )
+
+
+# Recommendations re-solved in the app from the predicted CPU and memory
+# peaks: headroom and candidate machine families, and an editable machine
+# price table starting from prices. resolve(prices, families, cpu_headroom,
+# memory_headroom) gives {'rows', 'summary', 'skipped', 'machines'} (see
+# resolver.py).
+def render_resolver(spec, prices, resolve):
+    st.subheader(f"🛠️ Re-run {spec['label']} Recommendations")
+    st.caption("Picks the cheapest machine type of the price table that covers each instance's predicted CPU "
+               "and memory peak plus headroom.")
+    key = spec['dataset']
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        cpu_headroom = st.slider("CPU headroom (%)", 0, 200, 20, step=5, key=f"{key}_cpu_headroom")
+    with col2:
+        memory_headroom = st.slider("Memory headroom (%)", 0, 200, 20, step=5, key=f"{key}_memory_headroom")
+    with col3:
+        families = st.multiselect("Machine families", sorted(prices['family'].dropna().unique()),
+                                  placeholder='All', key=f"{key}_resolver_families")
+
+    with st.expander("Machine price table"):
+        edited = st.data_editor(
+            prices[['machine_type', 'hourly_rate']],
+            num_rows='dynamic',
+            hide_index=True,
+            column_config={'hourly_rate': st.column_config.NumberColumn("hourly_rate", format='$%.4f', min_value=0)},
+            key=f"{key}_price_table"
+        )
+    price_rows = tuple(edited.dropna().itertuples(index=False, name=None))
+
+    resolved = resolve(price_rows, tuple(families), cpu_headroom / 100, memory_headroom / 100)
+    if not resolved['machines']:
+        st.warning("No machine type of the price table is a candidate: pick families that have catalogued "
+                   "machine types with an hourly rate.")
+        if resolved['skipped']:
+            st.caption(f"Not in the machine catalog, ignored: {', '.join(resolved['skipped'])}.")
+        return
+    summary = resolved['summary']
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(
+            label="Re-solved Cost (Monthly)",
+            value=f"${summary['resolved_cost']:,.2f}",
+            delta=f"{_pct(summary['resolved_cost'] - summary['current_cost'], summary['current_cost']):+.2f}% vs current"
+        )
+    with col2:
+        st.metric(
+            label="Re-solved Savings (Monthly)",
+            value=f"{'-' if summary['resolved_savings'] < 0 else ''}${abs(summary['resolved_savings']):,.2f}"
+        )
+    with col3:
+        st.metric(
+            label="Difference to Results File",
+            value=f"{'-' if summary['savings_vs_target'] < 0 else ''}${abs(summary['savings_vs_target']):,.2f}",
+            delta="more savings" if summary['savings_vs_target'] >= 0 else "less savings"
+        )
+    with col4:
+        st.metric(
+            label=f"{spec['resource_label']}s Re-targeted",
+            value=f"{summary['changed']:,} of {summary['rows']:,}"
+        )
+    if summary['unfit']:
+        st.caption(f"{summary['unfit']:,} instance(s) without a prediction or a large enough machine keep "
+                   f"their target from the results file.")
+    if resolved['skipped']:
+        st.caption(f"Not in the machine catalog, ignored: {', '.join(resolved['skipped'])}.")
+
+    rows = resolved['rows']
+    money = '${:,.2f}'
+    payload.dataframe(
+        rows[rows['resolved_machine_type'] != rows['target_machine_type']].drop(columns='fits'),
+        formats={'current_cost': money, 'target_cost': money, 'resolved_cost': money, 'resolved_savings': money,
+                 'required_vcpus': '{:.2f}', 'required_memory_gb': '{:.2f}'},
+        name="Re-solved Recommendations",
+        use_container_width=True,
+        height=400
+    )
+
+
+# Open the justification side store of a results dataset
+@st.cache_resource
+def load_justification_store(name):
+    try:
+        return data_store.load_justifications(name)
+    except Exception as e:
+        st.error(f"Error loading {name} justifications: {str(e)}")
+        return None
+
+
+# Row-level drill-in: the justification is fetched from the side store only for the selected row
+def render_recommendation_detail(spec, view):
+    name, resource_column, resource_label = spec['dataset'], spec['resource_column'], spec['resource_label']
+    st.subheader("🔎 Recommendation Detail")
+    detail_df = view['frame'][[resource_column, 'project_id', 'region', 'current_machine_type', 'target_machine_type',
+                               'current_cost', 'target_cost', 'savings']]
+    event = payload.dataframe(
+        detail_df,
+        formats={
+            'current_cost': '${:,.2f}',
+            'target_cost': '${:,.2f}',
+            'savings': '${:,.2f}'
+        },
+        name="Recommendation Detail",
+        use_container_width=True,
+        height=300,
+        on_select='rerun',
+        selection_mode='single-row',
+        key=f'{name}_detail'
+    )
+
+    if event.selection.rows:
+        # The frame index is the row number in the source file, which keys the side store
+        row_id = detail_df.index[event.selection.rows[0]]
+        row = detail_df.loc[row_id]
+        store = load_justification_store(name)
+        justification = store.get(row_id) if store is not None else None
+        st.markdown(
+            f"**{resource_label}:** {row[resource_column]} · **Project:** {row['project_id']} · "
+            f"**{row['current_machine_type']} → {row['target_machine_type']}** · "
+            f"saves ${row['savings']:,.2f}/month"
+        )
+        st.info(justification or "No justification was recorded for this recommendation.")
+    else:
+        st.caption("Select a row to see why that machine type was recommended.")
+
+
+# Top opportunity lines named in the spec's 'insights'
+def _top_group(rollups, by):
+    sums = rollups.sums(by)
+    top = sums['savings'].idxmax()
+    return top, sums.loc[top, 'savings'], _pct(sums.loc[top, 'savings'], sums.loc[top, 'current_cost'])
+
+
+def build_insights(spec, rollups, total):
+    frame = rollups.frame
+    resource = spec['resource_label'].lower()
+    lines = []
+    for insight in spec['insights']:
+        if insight == 'top_region':
+            region, savings, pct = _top_group(rollups, 'region')
+            lines.append(f"- Highest savings region: **{region}** (${savings:,.2f}, {pct:.1f}% savings)")
+        elif insight == 'top_machine_type':
+            machine_type = rollups.sums('current_machine_type')['current_cost'].idxmax()
+            lines.append(f"- Most expensive machine type: **{machine_type}**")
+        elif insight == 'max_resource':
+            row = frame.loc[frame['savings'].idxmax()]
+            lines.append(f"- Maximum single {resource} savings: **${row['savings']:,.2f}** "
+                         f"({_pct(row['savings'], row['current_cost']):.1f}% reduction)")
+        elif insight == 'top_resource':
+            name, savings, pct = _top_group(rollups, spec['resource_column'])
+            lines.append(f"- Top saving {resource}: **{name}** (${savings:,.2f}, {pct:.1f}%)")
+        elif insight == 'top_project':
+            name, savings, pct = _top_group(rollups, 'project_id')
+            lines.append(f"- Top saving project: **{name}** (${savings:,.2f}, {pct:.1f}%)")
+        else:
+            raise ValueError(f"unknown insight {insight!r}")
+    return lines
+
+
+def render_insights(spec, view):
+    total, label = view['totals'], spec['label']
+    resource = spec['resource_label'].lower()
+    st.markdown(f"### 💡 {label} Key Insights")
+    insights_col1, insights_col2 = st.columns(2)
+
+    scale = [f"- Total {resource}s analyzed: **{total['resources']}**",
+             f"- Total projects: **{total['projects']}**"]
+    opportunities = list(view['insights'])
+    opportunities.append(f"- **Cost Reduction:** Reduce {label} costs by **{total['cost_reduction_pct']:.2f}%** "
+                         "while maintaining performance")
+    per_resource = total['savings'] / total['resources'] if total['resources'] else 0
+    opportunities.append(f"- Average savings per {resource}: **${per_resource:,.2f}**")
+    for measure in spec['measures']:
+        measure_total = total['measures'][measure['column']]
+        scale.append(f"- Total {measure['label'].lower()}: **{int(measure_total)}**")
+        per_resource = measure_total / total['resources'] if total['resources'] else 0
+        scale.append(f"- Average {measure['label'].lower()} per {resource}: **{per_resource:.1f}**")
+        if measure_total > 0:
+            opportunities.append(f"- Average savings per {measure['unit']}: **${total['savings'] / measure_total:,.2f}**")
+
+    with insights_col1:
+        st.info("\n".join([
+            f"**💵 {label} Cost Impact:**",
+            f"- **Current Spending:** ${total['current_cost']:,.2f}/month (100%)",
+            f"- **Target Cost:** ${total['target_cost']:,.2f}/month ({100 - total['cost_reduction_pct']:.1f}% of current)",
+            f"- **Monthly Savings:** ${total['savings']:,.2f} ({total['savings_pct']:.2f}% reduction)",
+            f"- **Annual Savings Projection:** ${total['savings'] * 12:,.2f}",
+            "",
+            "**📊 Scale:**",
+            *scale,
+        ]))
+
+    with insights_col2:
+        st.info("\n".join(["**🎯 Top Opportunities:**", *opportunities]))
+
+
+# Panel name -> (build step or None, render step)
+PANELS = {
+    'key_metrics': (build_key_metrics, render_key_metrics),
+    'savings_summary': (None, render_savings_summary),
+    'cost_analysis': (build_cost_analysis, render_cost_analysis),
+    'additional_analysis': (build_additional_analysis, render_additional_analysis),
+    'top_resources': (build_top_resources, render_top_resources),
+    'top_projects': (build_top_projects, render_top_projects),
+    'machine_types': (build_machine_types, render_machine_types),
+    'migration_patterns': (build_migration_patterns, render_migration_patterns),
+    'project_resources': (build_project_resources, render_project_resources),
+    'hourly_rates': (build_hourly_rates, render_hourly_rates),
+    'node_count': (build_node_count, render_node_count),
+    'capacity': (build_capacity, render_capacity),
+    'savings_trend': (build_savings_trend, render_savings_trend),
+    'summary_tables': (build_summary_tables, render_summary_tables),
+    'data_view': (None, render_data_view),
+    'recommendation_detail': (None, render_recommendation_detail),
+    'insights': (build_insights, render_insights),
+}
+
+
+# All the pandas work of a service tab for one filtered frame; only the
+# totals when no row matches the filters
+def build_view(spec, frame):
+    rollups = Rollups(frame, spec)
+    view = {'frame': frame, 'totals': totals(spec, frame)}
+    if frame.empty:
+        return view
+    for panel in spec['panels']:
+        build, _ = PANELS[panel]
+        if build is not None:
+            view[panel] = build(spec, rollups, view['totals'])
+    return view
+
+
+def render_view(spec, view):
+    if view['frame'].empty:
+        st.info("No recommendations match the selected filters")
+        return
+    for i, panel in enumerate(spec['panels']):
+        if i:
+            st.markdown("---")
+        _, render = PANELS[panel]
+        render(spec, view)
+
+
+# A sidebar multi-select listing the values reachable under the other filters,
+# each with its row count (counts: Series indexed by value). Values already
+# picked stay listed. No value picked keeps every value.
+def filter_multiselect(label, key, counts):
+    picked = list(st.session_state.get(key, []))
+    options = sorted(set(counts.index) | set(picked))
+    if key in st.session_state:
+        # New options make a new widget: carry the selection over to it
+        st.session_state[key] = picked
+    return tuple(st.sidebar.multiselect(label, options, key=key, placeholder='All',
+                                        format_func=lambda value: f"{value} ({counts.get(value, 0):,})"))
+
+
+# A created_at (first day, last day) selection; () when the range covers every day
+def _period_selection(value, bounds):
+    if bounds is None or not isinstance(value, (list, tuple)) or len(value) != 2 or tuple(value) == tuple(bounds):
+        return ()
+    return tuple(value)
+
+
+# The 'latest' selection of the latest-row-per-resource mode stored under key;
+# the mode exists, and is on by default, once the rows have history
+def latest_selection(key, history):
+    return facts.LATEST_SELECTION if history and st.session_state.get(key, True) else ()
+
+
+# Sidebar toggle of the latest-row-per-resource mode with the number of rows
+# superseded by a later run (counts: rows per 'latest' flag under the other
+# filters, within the created_at range when ranged); returns the 'latest'
+# selection
+def latest_toggle(key, counts, history, ranged=False):
+    if not history:
+        return ()
+    on = st.sidebar.checkbox("Latest recommendation per resource", value=True, key=key,
+                             help="Keep only the most recent row of every resource reported by repeated runs "
+                                  "(within the Created Between range), so its savings are counted once.")
+    superseded = int(counts.get(False, 0))
+    later = "a later run in the selected range" if ranged else "a later run"
+    if on:
+        st.sidebar.caption(f"{superseded:,} row(s) superseded by {later} hidden.")
+    else:
+        st.sidebar.caption(f"{superseded:,} row(s) superseded by {later} are included.")
+    return facts.LATEST_SELECTION if on else ()
+
+
+# Sidebar filters of a service tab; returns ((column, (value, ...)), ...)
+# selections, then the created_at range when the tab has period_bounds (first
+# day, last day) and the 'latest' selection. history: whether any resource has
+# superseded rows. option_counts(selections) gives {column: counts} of the
+# values each filter can still reach.
+def render_filters(spec, option_counts, period_bounds=None, history=False):
+    st.sidebar.header(f"🔍 {spec['label']} Filters")
+    keys = [(column, label, f"{spec['dataset']}_{key}") for column, label, key in spec['dimensions']]
+    period_key = f"{spec['dataset']}_created"
+    latest_key = f"{spec['dataset']}_latest"
+    current = tuple((column, tuple(st.session_state.get(key, ()))) for column, _, key in keys)
+    current += ((timeline.TIME_COLUMN, _period_selection(st.session_state.get(period_key), period_bounds)),
+                (facts.LATEST_COLUMN, latest_selection(latest_key, history)))
+    counts = option_counts(current)
+    selections = tuple((column, filter_multiselect(label, key, counts[column])) for column, label, key in keys)
+    ranged = False
+    if period_bounds is not None:
+        period = st.sidebar.date_input("Created Between", value=period_bounds, min_value=period_bounds[0],
+                                       max_value=period_bounds[1], key=period_key)
+        ranged = bool(_period_selection(period, period_bounds))
+        selections += ((timeline.TIME_COLUMN, _period_selection(period, period_bounds)),)
+    return selections + ((facts.LATEST_COLUMN,
+                          latest_toggle(latest_key, counts[facts.LATEST_COLUMN], history, ranged)),)